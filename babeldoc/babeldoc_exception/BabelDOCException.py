@@ -17,3 +17,20 @@ class ContentFilterError(Exception):
     def __init__(self, message):
         super().__init__(message)
         self.message = message
+
+
+class BatchRequestDeferredError(Exception):
+    """A request was written to a batch request file instead of being sent."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class BatchJobPendingError(Exception):
+    """The translation stopped to wait for the results of batch requests."""
+
+    def __init__(self, message, deferred_count: int = 0):
+        super().__init__(message)
+        self.message = message
+        self.deferred_count = deferred_count
@@ -10,7 +10,6 @@ from typing import Literal
 
 import freetype
 import pymupdf
-import tiktoken
 
 import babeldoc.pdfminer.pdfinterp
 from babeldoc.format.pdf.babelpdf.base14 import get_base14_bbox
@@ -39,6 +38,7 @@ from babeldoc.pdfminer.psparser import PSLiteral
 from babeldoc.pdfminer.utils import apply_matrix_pt
 from babeldoc.pdfminer.utils import get_bound
 from babeldoc.pdfminer.utils import mult_matrix
+from babeldoc.utils.tokenizer import get_tokenizer
 
 
 def invert_matrix(
@@ -359,7 +359,7 @@ class ILCreater:
         self.clip_paths_stack: list[list[tuple]] = []
         # For valid character collection
         self.font_mapper = FontMapper(translation_config)
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4o")
+        self.tokenizer = get_tokenizer()
         self._page_valid_chars_buffer: list[str] | None = None
 
     def transform_clip_path(
@@ -584,9 +584,8 @@ class ILCreater:
                 page_text = "".join(self._page_valid_chars_buffer)
                 char_count = len(page_text)
                 try:
-                    token_count = len(
-                        self.tokenizer.encode(page_text, disallowed_special=())
-                    )
+                    # Page texts are not counted twice, keep them out of the cache.
+                    token_count = len(self.tokenizer.encode(page_text))
                 except Exception as e:
                     logger.warning("Failed to compute token count for page: %s", e)
                     token_count = 0
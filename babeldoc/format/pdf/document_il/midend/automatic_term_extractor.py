@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import threading
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-import tiktoken
 from tqdm import tqdm
 
+from babeldoc.babeldoc_exception.BabelDOCException import BatchRequestDeferredError
 from babeldoc.format.pdf.document_il import (
     Document as ILDocument,  # Renamed to avoid conflict
 )
@@ -20,7 +22,13 @@ from babeldoc.format.pdf.document_il.utils.paragraph_helper import (
 from babeldoc.format.pdf.document_il.utils.paragraph_helper import (
     is_pure_numeric_paragraph,
 )
+from babeldoc.glossary import Glossary
+from babeldoc.glossary import GlossaryMatchIndex
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.translator import AsyncBaseTranslator
+from babeldoc.utils.async_priority_executor import AsyncPriorityExecutor
 from babeldoc.utils.priority_thread_pool_executor import PriorityThreadPoolExecutor
+from babeldoc.utils.tokenizer import get_tokenizer
 
 if TYPE_CHECKING:
     from babeldoc.format.pdf.translation_config import TranslationConfig
@@ -71,9 +79,13 @@ class BatchParagraph:
         self,
         paragraphs: list[PdfParagraph],
         page_tracker: PageTermExtractTracker,
+        page_index: int | None = None,
+        batch_index: int = 0,
     ):
         self.paragraphs = paragraphs
         self.tracker = page_tracker.new_paragraph()
+        self.page_index = page_index
+        self.batch_index = batch_index
 
 
 class DocumentTermExtractTracker:
@@ -141,7 +153,15 @@ class AutomaticTermExtractor:
         self.translate_engine = translate_engine
         self.translation_config = translation_config
         self.shared_context = translation_config.shared_context_cross_split_part
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4o")
+        self.tokenizer = get_tokenizer()
+        # Set while the extraction runs ahead of the translation
+        self.pipeline: TermExtractionPipeline | None = None
+        # Replaced by the index shared with the translation of the document
+        self.glossary_match_index = GlossaryMatchIndex()
+        self.term_cache = self._create_term_cache()
+        self._cache_stats_lock = threading.Lock()
+        self.cached_paragraph_count = 0
+        self.extracted_paragraph_count = 0
 
         # Check if the translate_engine has llm_translate capability
         if not hasattr(self.translate_engine, "llm_translate") or not callable(
@@ -152,14 +172,95 @@ class AutomaticTermExtractor:
             )
 
     def calc_token_count(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def _create_term_cache(self) -> TranslationCache:
+        """
+        Cache of the term pairs extracted from every paragraph text.
+
+        Entries are keyed by the cache parameters of the translator (model, languages,
+        ...), the extraction prompt and the reference glossaries, so they survive any
+        change of the batching and are shared between documents.
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        for glossary in self.shared_context.user_glossaries:
+            hasher.update(glossary.name.encode("utf-8"))
+            for entry in glossary.entries:
+                hasher.update(f"\0{entry.source}\0{entry.target}".encode())
+            hasher.update(b"\1")
+        engine_cache = getattr(self.translate_engine, "cache", None)
+        return TranslationCache(
+            "term_extraction",
+            {
+                "engine": self.translate_engine.name,
+                "engine_params": engine_cache.params if engine_cache else {},
+                "prompt": hashlib.blake2b(
+                    LLM_PROMPT_TEMPLATE.encode("utf-8"), digest_size=16
+                ).hexdigest(),
+                "reference_glossaries": hasher.hexdigest(),
+            },
+        )
+
+    def _lookup_cached_terms(
+        self, paragraphs: BatchParagraph
+    ) -> tuple[list[tuple[str, str]], list[str]]:
+        """Cached term pairs of a batch, and the paragraph texts still to extract."""
+        inputs = [p.unicode for p in paragraphs.paragraphs if p.unicode]
+        for u in inputs:
+            paragraphs.tracker.append_paragraph_unicode(u)
+        texts = list(dict.fromkeys(inputs))
+        cached = {}
+        if not getattr(self.translate_engine, "ignore_cache", False):
+            try:
+                cached = self.term_cache.get_many(texts)
+            except Exception as e:
+                logger.debug(f"try get term cache failed, ignore it: {e}")
+        terms = []
+        missing = []
+        for text in texts:
+            if text in cached:
+                terms.extend((src, tgt) for src, tgt in json.loads(cached[text]))
+            else:
+                missing.append(text)
+        with self._cache_stats_lock:
+            self.cached_paragraph_count += len(texts) - len(missing)
+            self.extracted_paragraph_count += len(missing)
+        return terms, missing
+
+    def _store_terms(self, texts: list[str], terms: list[tuple[str, str]]):
+        """
+        Cache the terms extracted from ``texts`` per text. A term belongs to every text
+        containing it, a term found in none of them to the first one.
+        """
+        if getattr(self.translate_engine, "ignore_cache", False):
+            return
+        normalized = [Glossary.normalize_source(text) for text in texts]
+        text_terms = {text: [] for text in texts}
+        for src, tgt in dict.fromkeys(terms):
+            term = Glossary.normalize_source(src)
+            owners = [
+                text
+                for text, norm_text in zip(texts, normalized, strict=True)
+                if term in norm_text
+            ] or texts[:1]
+            for text in owners:
+                text_terms[text].append((src, tgt))
         try:
-            return len(self.tokenizer.encode(text, disallowed_special=()))
-        except Exception:
-            return 0
+            for text, pairs in text_terms.items():
+                self.term_cache.set(text, json.dumps(pairs, ensure_ascii=False))
+        except Exception as e:
+            logger.debug(f"try set term cache failed, ignore it: {e}")
+
+    def _add_terms(self, terms: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        """Add the term pairs of a batch to the shared context, each pair once."""
+        terms = list(dict.fromkeys(terms))
+        for src_term, tgt_term in terms:
+            self.shared_context.add_raw_extracted_term_pair(src_term, tgt_term)
+        return terms
 
-    def _snapshot_token_usage(self) -> tuple[int, int, int, int]:
+    def _snapshot_token_usage(self) -> tuple[int, int, int, int, int]:
         if not self.translate_engine:
-            return 0, 0, 0, 0
+            return 0, 0, 0, 0, 0
         token_counter = getattr(self.translate_engine, "token_count", None)
         prompt_counter = getattr(self.translate_engine, "prompt_token_count", None)
         completion_counter = getattr(
@@ -171,10 +272,22 @@ class AutomaticTermExtractor:
         total_tokens = token_counter.value if token_counter else 0
         prompt_tokens = prompt_counter.value if prompt_counter else 0
         completion_tokens = completion_counter.value if completion_counter else 0
+        cache_miss_prompt_counter = getattr(
+            self.translate_engine, "cache_miss_prompt_token_count", None
+        )
         cache_hit_prompt_tokens = (
             cache_hit_prompt_counter.value if cache_hit_prompt_counter else 0
         )
-        return total_tokens, prompt_tokens, completion_tokens, cache_hit_prompt_tokens
+        cache_miss_prompt_tokens = (
+            cache_miss_prompt_counter.value if cache_miss_prompt_counter else 0
+        )
+        return (
+            total_tokens,
+            prompt_tokens,
+            completion_tokens,
+            cache_hit_prompt_tokens,
+            cache_miss_prompt_tokens,
+        )
 
     def _clean_json_output(self, llm_output: str) -> str:
         llm_output = llm_output.strip()
@@ -223,16 +336,23 @@ class AutomaticTermExtractor:
         except Exception as e:
             logger.error(f"Request ID {request_id}: Error processing LLM response: {e}")
 
+    def _extract_fn(self, executor):
+        if isinstance(executor, AsyncPriorityExecutor):
+            return self.aextract_terms_from_paragraphs
+        return self.extract_terms_from_paragraphs
+
     def process_page(
         self,
         page: Page,
-        executor: PriorityThreadPoolExecutor,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
         pbar: tqdm | None = None,
         tracker: PageTermExtractTracker = None,
+        page_index: int | None = None,
     ):
         self.translation_config.raise_if_cancelled()
         paragraphs = []
         total_token_count = 0
+        batch_count = 0
         for paragraph in page.pdf_paragraph:
             if paragraph.debug_id is None or paragraph.unicode is None:
                 pbar.advance(1)
@@ -252,24 +372,46 @@ class AutomaticTermExtractor:
             total_token_count += self.calc_token_count(paragraph.unicode)
             paragraphs.append(paragraph)
             if total_token_count > 600 or len(paragraphs) > 12:
-                executor.submit(
-                    self.extract_terms_from_paragraphs,
-                    BatchParagraph(paragraphs, tracker),
+                self._submit_batch(
+                    executor,
+                    BatchParagraph(paragraphs, tracker, page_index, batch_count),
                     pbar,
                     total_token_count,
-                    priority=1048576 - total_token_count,
                 )
+                batch_count += 1
                 paragraphs = []
                 total_token_count = 0
 
         if paragraphs:
-            executor.submit(
-                self.extract_terms_from_paragraphs,
-                BatchParagraph(paragraphs, tracker),
+            self._submit_batch(
+                executor,
+                BatchParagraph(paragraphs, tracker, page_index, batch_count),
                 pbar,
                 total_token_count,
-                priority=1048576 - total_token_count,
             )
+            batch_count += 1
+        if self.pipeline is not None:
+            self.pipeline.page_submitted(page_index, batch_count)
+
+    def _submit_batch(
+        self,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
+        paragraphs: BatchParagraph,
+        pbar: tqdm | None,
+        total_token_count: int,
+    ):
+        if self.pipeline is not None:
+            # The translation waits for the pages in order, extract them in order.
+            priority = paragraphs.page_index
+        else:
+            priority = 1048576 - total_token_count
+        executor.submit(
+            self._extract_fn(executor),
+            paragraphs,
+            pbar,
+            total_token_count,
+            priority=priority,
+        )
 
     def extract_terms_from_paragraphs(
         self,
@@ -277,53 +419,16 @@ class AutomaticTermExtractor:
         pbar: tqdm | None = None,
         paragraph_token_count: int = 0,
     ):
-        self.translation_config.raise_if_cancelled()
+        terms = []
         try:
-            inputs = [p.unicode for p in paragraphs.paragraphs if p.unicode]
-            tracker = paragraphs.tracker
-            for u in inputs:
-                tracker.append_paragraph_unicode(u)
-            if not inputs:
+            self.translation_config.raise_if_cancelled()
+            if self.pipeline is not None and self.pipeline.stopped:
+                return
+            terms, texts = self._lookup_cached_terms(paragraphs)
+            prompt = self._build_extraction_prompt(paragraphs, texts)
+            if prompt is None:
+                paragraphs.tracker.set_output(json.dumps(terms, ensure_ascii=False))
                 return
-
-            # Build reference glossary section
-            reference_glossary_section = ""
-            user_glossaries = self.shared_context.user_glossaries
-            if user_glossaries:
-                text_for_glossary = "\n\n".join(inputs)
-
-                # Group entries by glossary name
-                glossary_entries = {}
-                for glossary in user_glossaries:
-                    active_entries = glossary.get_active_entries_for_text(
-                        text_for_glossary
-                    )
-                    if active_entries:
-                        glossary_entries[glossary.name] = active_entries
-
-                if glossary_entries:
-                    reference_glossary_section = (
-                        "Reference Glossaries (for consistency and quality):\n"
-                    )
-
-                    # Add entries grouped by glossary name
-                    for glossary_name, entries in glossary_entries.items():
-                        reference_glossary_section += f"\n{glossary_name}:\n"
-                        for src, tgt in sorted(set(entries)):
-                            reference_glossary_section += f"- {src} → {tgt}\n"
-
-                    reference_glossary_section += "\nPlease consider these existing translations for consistency when extracting new terms. IMPORTANT: You should also extract terms that appear in the reference glossaries above if they are found in the input text - don't skip them just because they already exist in the reference."
-
-            prompt = LLM_PROMPT_TEMPLATE.format(
-                target_language=self.translation_config.lang_out,
-                text_to_process="\n\n".join(inputs),
-                reference_glossary_section=reference_glossary_section,
-                example_output="""[
-  {"src": "LLM", "tgt": "大语言模型"},
-  {"src": "GPT", "tgt": "GPT"}
-]""",
-            )
-            tracker.set_input(prompt)
             output = self.translate_engine.llm_translate(
                 prompt,
                 rate_limit_params={
@@ -331,34 +436,134 @@ class AutomaticTermExtractor:
                     "request_json_mode": True,
                 },
             )
-            tracker.set_output(output)
-            cleaned_output = self._clean_json_output(output)
-            response = json.loads(cleaned_output)
-            if not isinstance(response, list):
-                response = [response]  # Ensure we have a list
-
-            for term in response:
-                if isinstance(term, dict) and "src" in term and "tgt" in term:
-                    src_term = str(term["src"]).strip()
-                    tgt_term = str(term["tgt"]).strip()
-                    if src_term == tgt_term and len(src_term) < 3:
-                        continue
-                    if src_term and tgt_term and len(src_term) < 100:
-                        self.shared_context.add_raw_extracted_term_pair(
-                            src_term, tgt_term
-                        )
+            terms = terms + self._collect_extracted_terms(paragraphs, output, texts)
+        except BatchRequestDeferredError:
+            return
+        except Exception as e:
+            logger.warning(f"Error during automatic terms extract: {e}")
+            return
+        finally:
+            pbar.advance(len(paragraphs.paragraphs))
+            terms = self._add_terms(terms)
+            if self.pipeline is not None:
+                self.pipeline.batch_finished(paragraphs, terms)
 
+    async def aextract_terms_from_paragraphs(
+        self,
+        paragraphs: BatchParagraph,
+        pbar: tqdm | None = None,
+        paragraph_token_count: int = 0,
+    ):
+        """Coroutine variant of :meth:`extract_terms_from_paragraphs` used in asyncio mode."""
+        terms = []
+        try:
+            self.translation_config.raise_if_cancelled()
+            if self.pipeline is not None and self.pipeline.stopped:
+                return
+            terms, texts = self._lookup_cached_terms(paragraphs)
+            prompt = self._build_extraction_prompt(paragraphs, texts)
+            if prompt is None:
+                paragraphs.tracker.set_output(json.dumps(terms, ensure_ascii=False))
+                return
+            output = await self.translate_engine.allm_translate(
+                prompt,
+                rate_limit_params={
+                    "paragraph_token_count": paragraph_token_count,
+                    "request_json_mode": True,
+                },
+            )
+            terms = terms + self._collect_extracted_terms(paragraphs, output, texts)
+        except BatchRequestDeferredError:
+            return
         except Exception as e:
             logger.warning(f"Error during automatic terms extract: {e}")
             return
         finally:
             pbar.advance(len(paragraphs.paragraphs))
+            terms = self._add_terms(terms)
+            if self.pipeline is not None:
+                self.pipeline.batch_finished(paragraphs, terms)
+
+    def _build_extraction_prompt(
+        self, paragraphs: BatchParagraph, inputs: list[str]
+    ) -> str | None:
+        """Extraction prompt for the paragraph texts ``inputs`` of the batch."""
+        tracker = paragraphs.tracker
+        if not inputs:
+            return None
+
+        # Build reference glossary section
+        reference_glossary_section = ""
+        user_glossaries = self.shared_context.user_glossaries
+        if user_glossaries:
+            # Group entries by glossary name
+            texts = set(inputs)
+            glossary_entries = self.glossary_match_index.get_active_entries(
+                (p for p in paragraphs.paragraphs if p.unicode in texts),
+                user_glossaries,
+            )
 
-    def procress(self, doc_il: ILDocument):
-        logger.info(f"{self.stage_name}: Starting term extraction for document.")
-        start_total, start_prompt, start_completion, start_cache_hit_prompt = (
-            self._snapshot_token_usage()
+            if glossary_entries:
+                reference_glossary_section = (
+                    "Reference Glossaries (for consistency and quality):\n"
+                )
+
+                # Add entries grouped by glossary name
+                for glossary_name, entries in glossary_entries.items():
+                    reference_glossary_section += f"\n{glossary_name}:\n"
+                    for src, tgt in sorted(set(entries)):
+                        reference_glossary_section += f"- {src} → {tgt}\n"
+
+                reference_glossary_section += "\nPlease consider these existing translations for consistency when extracting new terms. IMPORTANT: You should also extract terms that appear in the reference glossaries above if they are found in the input text - don't skip them just because they already exist in the reference."
+
+        prompt = LLM_PROMPT_TEMPLATE.format(
+            target_language=self.translation_config.lang_out,
+            text_to_process="\n\n".join(inputs),
+            reference_glossary_section=reference_glossary_section,
+            example_output="""[
+  {"src": "LLM", "tgt": "大语言模型"},
+  {"src": "GPT", "tgt": "GPT"}
+]""",
         )
+        tracker.set_input(prompt)
+        return prompt
+
+    def _collect_extracted_terms(
+        self, paragraphs: BatchParagraph, output: str, texts: list[str]
+    ) -> list[tuple[str, str]]:
+        """Term pairs of the LLM output for ``texts``, which are cached per text."""
+        paragraphs.tracker.set_output(output)
+        cleaned_output = self._clean_json_output(output)
+        response = json.loads(cleaned_output)
+        if not isinstance(response, list):
+            response = [response]  # Ensure we have a list
+
+        terms = []
+        for term in response:
+            if isinstance(term, dict) and "src" in term and "tgt" in term:
+                src_term = str(term["src"]).strip()
+                tgt_term = str(term["tgt"]).strip()
+                if src_term == tgt_term and len(src_term) < 3:
+                    continue
+                if src_term and tgt_term and len(src_term) < 100:
+                    terms.append((src_term, tgt_term))
+        self._store_terms(texts, terms)
+        return terms
+
+    def procress(self, doc_il: ILDocument, record_token_usage: bool = True):
+        """Extract the terms of the document into the shared context.
+
+        ``record_token_usage`` is turned off when the translator is also used for the
+        translation at the same time, the usage of the extraction cannot be told apart.
+        """
+        logger.info(f"{self.stage_name}: Starting term extraction for document.")
+        (
+            start_total,
+            start_prompt,
+            start_completion,
+            start_cache_hit_prompt,
+            start_cache_miss_prompt,
+        ) = self._snapshot_token_usage()
         tracker = DocumentTermExtractTracker()
         total = sum(len(page.pdf_paragraph) for page in doc_il.page)
         with self.translation_config.progress_monitor.stage_start(
@@ -366,25 +571,49 @@ class AutomaticTermExtractor:
             total,
         ) as pbar:
             max_workers = self.translation_config.term_pool_max_workers
-            logger.info(
-                f"Using {max_workers} worker threads for automatic term extraction."
-            )
-            with PriorityThreadPoolExecutor(
-                max_workers=max_workers,
-            ) as executor:
-                for page in doc_il.page:
-                    self.process_page(page, executor, pbar, tracker.new_page())
+            if isinstance(self.translate_engine, AsyncBaseTranslator):
+                max_workers = self.translation_config.term_async_max_concurrency
+                logger.info(
+                    f"Using asyncio with {max_workers} concurrent requests for automatic term extraction."
+                )
+                executor = AsyncPriorityExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="term_extractor",
+                )
+                executor.add_shutdown_callback(self.translate_engine.aclose)
+            else:
+                logger.info(
+                    f"Using {max_workers} worker threads for automatic term extraction."
+                )
+                executor = PriorityThreadPoolExecutor(
+                    max_workers=max_workers,
+                )
+            with executor:
+                for page_index, page in enumerate(doc_il.page):
+                    self.process_page(
+                        page, executor, pbar, tracker.new_page(), page_index
+                    )
 
         self.shared_context.finalize_auto_extracted_glossary()
-        end_total, end_prompt, end_completion, end_cache_hit_prompt = (
-            self._snapshot_token_usage()
-        )
-        self.translation_config.record_term_extraction_usage(
-            end_total - start_total,
-            end_prompt - start_prompt,
-            end_completion - start_completion,
-            end_cache_hit_prompt - start_cache_hit_prompt,
+        logger.info(
+            f"{self.stage_name}: {self.cached_paragraph_count} paragraphs answered "
+            f"from the term cache, {self.extracted_paragraph_count} sent to the LLM."
         )
+        (
+            end_total,
+            end_prompt,
+            end_completion,
+            end_cache_hit_prompt,
+            end_cache_miss_prompt,
+        ) = self._snapshot_token_usage()
+        if record_token_usage:
+            self.translation_config.record_term_extraction_usage(
+                end_total - start_total,
+                end_prompt - start_prompt,
+                end_completion - start_completion,
+                end_cache_hit_prompt - start_cache_hit_prompt,
+                end_cache_miss_prompt - start_cache_miss_prompt,
+            )
 
         if (
             self.translation_config.debug
@@ -417,3 +646,136 @@ class AutomaticTermExtractor:
                 auto_extracted_glossary = self.shared_context.auto_extracted_glossary
                 if auto_extracted_glossary:
                     f.write(auto_extracted_glossary.to_csv())
+
+
+class TermExtractionPipeline:
+    """
+    Runs an :class:`AutomaticTermExtractor` in the background, ahead of the translation
+    of the same document, instead of before it.
+
+    Pages are extracted in order. The translation asks for the glossaries of a page
+    with :meth:`wait_for_page`, which waits until the terms of that page and the
+    ``lookahead`` following pages are extracted. The glossary is built from exactly
+    these pages, in page order, so every page is translated with the same glossary
+    whatever the timing of the requests.
+    """
+
+    def __init__(
+        self,
+        extractor: AutomaticTermExtractor,
+        doc_il: ILDocument,
+        lookahead: int,
+        record_token_usage: bool = True,
+    ):
+        if lookahead < 0:
+            raise ValueError("lookahead must not be negative")
+        self.extractor = extractor
+        self.doc_il = doc_il
+        self.lookahead = lookahead
+        self.record_token_usage = record_token_usage
+        self.shared_context = extractor.shared_context
+        self.page_count = len(doc_il.page)
+        # Terms extracted by earlier parts of a split document.
+        self._base_terms = list(self.shared_context.raw_extracted_terms)
+
+        self._condition = threading.Condition()
+        self._remaining_batches: list[int | None] = [None] * self.page_count
+        self._page_terms: list[dict[int, list[tuple[str, str]]]] = [
+            {} for _ in range(self.page_count)
+        ]
+        self._done_page_count = 0
+        self._finished = False
+        self._error: BaseException | None = None
+        self._glossaries: dict[int, list[Glossary]] = {}
+        self._thread: threading.Thread | None = None
+        self.stopped = False
+
+    def start(self):
+        self.extractor.pipeline = self
+        self._thread = threading.Thread(
+            target=self._run, name="term_extraction_pipeline", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.extractor.procress(self.doc_il, self.record_token_usage)
+        except BaseException as e:
+            with self._condition:
+                self._error = e
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def page_submitted(self, page_index: int, batch_count: int):
+        with self._condition:
+            remaining = self._remaining_batches[page_index] or 0
+            self._remaining_batches[page_index] = remaining + batch_count
+            self._advance()
+
+    def batch_finished(self, paragraphs: BatchParagraph, terms: list[tuple[str, str]]):
+        with self._condition:
+            page_index = paragraphs.page_index
+            self._page_terms[page_index][paragraphs.batch_index] = terms
+            # A batch can finish before its page is completely submitted.
+            remaining = self._remaining_batches[page_index] or 0
+            self._remaining_batches[page_index] = remaining - 1
+            self._advance()
+
+    def _advance(self):
+        """Move past the pages whose batches are all done. Called with the lock held."""
+        while (
+            self._done_page_count < self.page_count
+            and self._remaining_batches[self._done_page_count] == 0
+        ):
+            self._done_page_count += 1
+        self._condition.notify_all()
+
+    def is_ready(self, page_index: int) -> bool:
+        with self._condition:
+            return self._is_ready(page_index)
+
+    def _is_ready(self, page_index: int) -> bool:
+        needed = min(page_index + self.lookahead + 1, self.page_count)
+        return self._finished or self._done_page_count >= needed
+
+    def wait_for_page(self, page_index: int) -> list[Glossary]:
+        """Glossaries to translate the page at ``page_index`` with."""
+        with self._condition:
+            while not self._is_ready(page_index):
+                self._condition.wait(timeout=1)
+                self.extractor.translation_config.raise_if_cancelled()
+            if self._error is not None:
+                raise self._error
+            needed = min(page_index + self.lookahead + 1, self.page_count)
+            terms = list(self._base_terms)
+            for page_terms in self._page_terms[:needed]:
+                for _, batch_terms in sorted(page_terms.items()):
+                    terms.extend(batch_terms)
+            # Pages without new terms share the glossary of the page before.
+            glossaries = self._glossaries.get(len(terms))
+        if glossaries is None:
+            glossary = self.shared_context.build_auto_extracted_glossary(terms)
+            if glossary is not None:
+                glossaries = [glossary]
+            else:
+                glossaries = list(self.shared_context.user_glossaries)
+            with self._condition:
+                self._glossaries[len(terms)] = glossaries
+        return glossaries
+
+    def join(self):
+        """Wait for the end of the extraction and raise its error, if any."""
+        if self._thread is not None:
+            self._thread.join()
+        self.extractor.pipeline = None
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        """Skip the remaining extraction requests, e.g. after the translation failed."""
+        self.stopped = True
+        if self._thread is not None:
+            self._thread.join()
+        self.extractor.pipeline = None
@@ -8,10 +8,10 @@ import threading
 from pathlib import Path
 from string import Template
 
-import tiktoken
 from tqdm import tqdm
 
 import babeldoc.format.pdf.document_il.il_version_1 as il_version_1
+from babeldoc.babeldoc_exception.BabelDOCException import BatchRequestDeferredError
 from babeldoc.babeldoc_exception.BabelDOCException import ContentFilterError
 from babeldoc.format.pdf.document_il import Document
 from babeldoc.format.pdf.document_il import GraphicState
@@ -41,11 +41,17 @@ from babeldoc.format.pdf.document_il.utils.paragraph_helper import (
 )
 from babeldoc.format.pdf.document_il.utils.style_helper import GRAY80
 from babeldoc.format.pdf.translation_config import TranslationConfig
+from babeldoc.glossary import GlossaryMatchIndex
 from babeldoc.translator.translator import BaseTranslator
 from babeldoc.utils.priority_thread_pool_executor import PriorityThreadPoolExecutor
+from babeldoc.utils.tokenizer import as_tokenizer
 
 logger = logging.getLogger(__name__)
 
+# Number of queued translation tasks whose cache entries are resolved together
+# before they are dispatched
+CACHE_PREFETCH_WINDOW = 256
+
 
 PROMPT_TEMPLATE = Template(
     """$role_block
@@ -341,10 +347,7 @@ class ILTranslator:
         self.shared_context_cross_split_part = (
             translation_config.shared_context_cross_split_part
         )
-        if tokenizer is None:
-            self.tokenizer = tiktoken.encoding_for_model("gpt-4o")
-        else:
-            self.tokenizer = tokenizer
+        self.tokenizer = as_tokenizer(tokenizer)
 
         # Cache glossaries at initialization
         self._cached_glossaries = (
@@ -363,7 +366,10 @@ class ILTranslator:
 
         self.use_as_fallback = False
         self.add_content_filter_hint_lock = threading.Lock()
+        # Replaced by the index shared with the other stages of the document
+        self.glossary_match_index = GlossaryMatchIndex()
         self.docs = None
+        self._pending_paragraphs: list[dict] = []
 
         # Pre-compile patterns for placeholder-like tokens that may be hallucinated by LLM.
         # We only consider the same shapes as our own formula & rich-text placeholders.
@@ -380,10 +386,7 @@ class ILTranslator:
         )
 
     def calc_token_count(self, text: str) -> int:
-        try:
-            return len(self.tokenizer.encode(text, disallowed_special=()))
-        except Exception:
-            return 0
+        return self.tokenizer.count(text)
 
     def translate(self, docs: Document):
         self.docs = docs
@@ -412,6 +415,7 @@ class ILTranslator:
             ) as executor:
                 for page in docs.page:
                     self.process_page(page, executor, pbar, tracker.new_page())
+                self.flush_pending_paragraphs(executor)
 
         path = self.translation_config.get_working_file_path("translate_tracking.json")
 
@@ -457,25 +461,83 @@ class ILTranslator:
                 for font in xobj.pdf_font:
                     page_xobj_font_map[xobj.xobj_id][font.font_id] = font
             # self.translate_paragraph(paragraph, pbar,tracker.new_paragraph(), page_font_map, page_xobj_font_map)
-            paragraph_token_count = self.calc_token_count(paragraph.unicode)
+            # Only used for the task priority and the rate limit estimate.
+            paragraph_token_count = self.tokenizer.approx_count(paragraph.unicode)
             if paragraph.layout_label == "title":
                 self.shared_context_cross_split_part.recent_title_paragraph = (
                     copy.deepcopy(paragraph)
                 )
+            self._pending_paragraphs.append(
+                {
+                    "paragraph": paragraph,
+                    "page": page,
+                    "pbar": pbar,
+                    "tracker": tracker.new_paragraph(),
+                    "page_font_map": page_font_map,
+                    "xobj_font_map": page_xobj_font_map,
+                    "paragraph_token_count": paragraph_token_count,
+                    "title_paragraph": self.translation_config.shared_context_cross_split_part.first_paragraph,
+                    "local_title_paragraph": self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
+                }
+            )
+            if len(self._pending_paragraphs) >= CACHE_PREFETCH_WINDOW:
+                self.flush_pending_paragraphs(executor)
+
+    def flush_pending_paragraphs(self, executor: PriorityThreadPoolExecutor):
+        """Dispatch the paragraphs queued by process_page.
+
+        The cache key of a paragraph is its prompt, so paragraphs are prepared once
+        here, their cache entries resolved with a few batched queries, and the
+        prepared result is handed to the worker. Cache hits are applied inline
+        without scheduling a worker task, everything else is submitted to
+        ``executor``.
+        """
+        pending, self._pending_paragraphs = self._pending_paragraphs, []
+        if not pending:
+            return
+        prepared_tasks = []
+        for task in pending:
+            try:
+                task["prepared"] = self._prepare_paragraph(
+                    task["paragraph"],
+                    task["tracker"],
+                    task["page_font_map"],
+                    task["xobj_font_map"],
+                    task["title_paragraph"],
+                    task["local_title_paragraph"],
+                )
+            except Exception as e:
+                paragraph = task["paragraph"]
+                logger.warning(
+                    f"Error preparing paragraph. Paragraph: {paragraph.debug_id} ({paragraph.unicode}). Error: {e}. "
+                )
+                task["pbar"].advance()
+                continue
+            if task["prepared"][0] is None:
+                # Nothing to translate, let translate_paragraph finish the paragraph.
+                self.translate_paragraph(**task)
+                continue
+            prepared_tasks.append((task, self._get_cache_key(task["prepared"])))
+
+        cache_hits = self.translate_engine.prefetch_cache(
+            [cache_key for _, cache_key in prepared_tasks]
+        )
+
+        for task, cache_key in prepared_tasks:
+            if cache_key in cache_hits:
+                self.translate_paragraph(**task)
+                continue
             executor.submit(
                 self.translate_paragraph,
-                paragraph,
-                page,
-                pbar,
-                tracker.new_paragraph(),
-                page_font_map,
-                page_xobj_font_map,
-                priority=1048576 - paragraph_token_count,
-                paragraph_token_count=paragraph_token_count,
-                title_paragraph=self.translation_config.shared_context_cross_split_part.first_paragraph,
-                local_title_paragraph=self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
+                priority=1048576 - task["paragraph_token_count"],
+                **task,
             )
 
+    @staticmethod
+    def _get_cache_key(prepared: tuple) -> str:
+        text, _translate_input, llm_prompt = prepared
+        return llm_prompt if llm_prompt is not None else text
+
     class TranslateInput:
         def __init__(
             self,
@@ -984,6 +1046,41 @@ class ILTranslator:
             return None, None
         return text, translate_input
 
+    def _prepare_paragraph(
+        self,
+        paragraph: PdfParagraph,
+        tracker: ParagraphTranslateTracker,
+        page_font_map: dict[str, PdfFont],
+        xobj_font_map: dict[int, dict[str, PdfFont]],
+        title_paragraph: PdfParagraph | None = None,
+        local_title_paragraph: PdfParagraph | None = None,
+    ) -> tuple:
+        """Run pre-translation and build the LLM prompt if the engine supports it.
+
+        Returns:
+            Tuple of (text, translate_input, llm_prompt). ``text`` is None if the
+            paragraph does not need translation, ``llm_prompt`` is None if the
+            engine does not support LLM translation.
+        """
+        if self.use_as_fallback:
+            # il translator llm only modifies unicode in some situations
+            paragraph.unicode = get_paragraph_unicode(paragraph)
+        text, translate_input = self.pre_translate_paragraph(
+            paragraph, tracker, page_font_map, xobj_font_map
+        )
+        if text is None:
+            return None, None, None
+        llm_prompt = None
+        if self.support_llm_translate:
+            llm_prompt = self.generate_prompt_for_llm(
+                text,
+                title_paragraph,
+                local_title_paragraph,
+                translate_input,
+                paragraph,
+            )
+        return text, translate_input, llm_prompt
+
     def post_translate_paragraph(
         self,
         paragraph: PdfParagraph,
@@ -1083,11 +1180,15 @@ class ILTranslator:
             return "## Context / Hints\n" + "\n".join(context_lines) + "\n"
         return ""
 
-    def _build_glossary_block(self, text: str) -> str:
+    def _build_glossary_block(
+        self, text: str, paragraph: PdfParagraph | None = None
+    ) -> str:
         """Build the glossary block for LLM prompt.
 
         Args:
             text: Text to match against glossary entries
+            paragraph: Paragraph of the text, its entries are looked up in
+                ``glossary_match_index`` instead of matching the text
 
         Returns:
             Glossary block string with tables, empty if no active glossary entries
@@ -1097,10 +1198,19 @@ class ILTranslator:
 
         glossary_entries_per_glossary: dict[str, list[tuple[str, str]]] = {}
 
-        for glossary in self._cached_glossaries:
-            active_entries = glossary.get_active_entries_for_text(text)
-            if active_entries:
-                glossary_entries_per_glossary[glossary.name] = sorted(active_entries)
+        if paragraph is not None:
+            glossary_entries_per_glossary = (
+                self.glossary_match_index.get_active_entries(
+                    [paragraph], self._cached_glossaries
+                )
+            )
+        else:
+            for glossary in self._cached_glossaries:
+                active_entries = glossary.get_active_entries_for_text(text)
+                if active_entries:
+                    glossary_entries_per_glossary[glossary.name] = sorted(
+                        active_entries
+                    )
 
         if not glossary_entries_per_glossary:
             return ""
@@ -1133,6 +1243,7 @@ class ILTranslator:
         title_paragraph: PdfParagraph | None = None,
         local_title_paragraph: PdfParagraph | None = None,
         translate_input: TranslateInput | None = None,
+        paragraph: PdfParagraph | None = None,
     ):
         """Generate LLM prompt using template-based approach.
 
@@ -1141,6 +1252,7 @@ class ILTranslator:
             title_paragraph: First title paragraph in the document
             local_title_paragraph: Most recent title paragraph
             translate_input: TranslateInput containing placeholder information
+            paragraph: Paragraph of the text, for the glossary lookup
 
         Returns:
             Final LLM prompt string
@@ -1149,7 +1261,7 @@ class ILTranslator:
         context_block = self._build_context_block(
             title_paragraph, local_title_paragraph, translate_input
         )
-        glossary_block = self._build_glossary_block(text)
+        glossary_block = self._build_glossary_block(text, paragraph)
 
         return PROMPT_TEMPLATE.substitute(
             role_block=role_block,
@@ -1218,29 +1330,27 @@ class ILTranslator:
         paragraph_token_count: int = 0,
         title_paragraph: PdfParagraph | None = None,
         local_title_paragraph: PdfParagraph | None = None,
+        prepared: tuple | None = None,
     ):
         """Translate a paragraph using pre and post processing functions."""
         self.translation_config.raise_if_cancelled()
         with PbarContext(pbar):
             try:
-                if self.use_as_fallback:
-                    # il translator llm only modifies unicode in some situations
-                    paragraph.unicode = get_paragraph_unicode(paragraph)
-                # Pre-translation processing
-                text, translate_input = self.pre_translate_paragraph(
-                    paragraph, tracker, page_font_map, xobj_font_map
-                )
+                if prepared is None:
+                    prepared = self._prepare_paragraph(
+                        paragraph,
+                        tracker,
+                        page_font_map,
+                        xobj_font_map,
+                        title_paragraph,
+                        local_title_paragraph,
+                    )
+                text, translate_input, llm_prompt = prepared
                 if text is None:
                     return
                 llm_translate_tracker = tracker.new_llm_translate_tracker()
                 # Perform translation
-                if self.support_llm_translate:
-                    llm_prompt = self.generate_prompt_for_llm(
-                        text,
-                        title_paragraph,
-                        local_title_paragraph,
-                        translate_input,
-                    )
+                if llm_prompt is not None:
                     llm_translate_tracker.set_input(llm_prompt)
                     translated_text = self.translate_engine.llm_translate(
                         llm_prompt,
@@ -1266,6 +1376,8 @@ class ILTranslator:
                 logger.warning(f"ContentFilterError: {e.message}")
                 self.add_content_filter_hint(page, paragraph)
                 return
+            except BatchRequestDeferredError:
+                return
             except Exception as e:
                 logger.exception(
                     f"Error translating paragraph. Paragraph: {paragraph.debug_id} ({paragraph.unicode}). Error: {e}. ",
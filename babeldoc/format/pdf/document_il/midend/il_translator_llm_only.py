@@ -2,18 +2,23 @@ import copy
 import json
 import logging
 import re
+import threading
 from pathlib import Path
 from string import Template
 
 import Levenshtein
-import tiktoken
 from tqdm import tqdm
 
+from babeldoc.babeldoc_exception.BabelDOCException import BatchRequestDeferredError
 from babeldoc.format.pdf.document_il import Document
 from babeldoc.format.pdf.document_il import Page
 from babeldoc.format.pdf.document_il import PdfFont
 from babeldoc.format.pdf.document_il import PdfParagraph
 from babeldoc.format.pdf.document_il.midend import il_translator
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    TermExtractionPipeline,
+)
+from babeldoc.format.pdf.document_il.midend.il_translator import CACHE_PREFETCH_WINDOW
 from babeldoc.format.pdf.document_il.midend.il_translator import (
     DocumentTranslateTracker,
 )
@@ -30,15 +35,27 @@ from babeldoc.format.pdf.document_il.utils.paragraph_helper import (
 from babeldoc.format.pdf.document_il.utils.paragraph_helper import (
     is_pure_numeric_paragraph,
 )
+from babeldoc.format.pdf.document_il.utils.paragraph_packer import ParagraphGroup
+from babeldoc.format.pdf.document_il.utils.paragraph_packer import ParagraphPacker
 from babeldoc.format.pdf.translation_config import TranslationConfig
+from babeldoc.glossary import Glossary
+from babeldoc.glossary import GlossaryMatchIndex
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.translation_memory import TranslationMemory
+from babeldoc.translator.translation_memory import TranslationMemoryMatch
+from babeldoc.translator.translator import AsyncBaseTranslator
 from babeldoc.translator.translator import BaseTranslator
+from babeldoc.utils.async_priority_executor import AsyncPriorityExecutor
+from babeldoc.utils.incremental_json import IncrementalJSONArrayParser
 from babeldoc.utils.priority_thread_pool_executor import PriorityThreadPoolExecutor
+from babeldoc.utils.tokenizer import as_tokenizer
 
 logger = logging.getLogger(__name__)
 
 
-PROMPT_TEMPLATE = Template(
-    """$role_block
+# Instructions shared by both prompt layouts, they only differ in where the
+# document-level context goes.
+_PROMPT_INSTRUCTIONS = """$role_block
 
 ## Structure Rules
 1. Keep **the same number of paragraphs as the input**.
@@ -84,27 +101,175 @@ Output:
     "output": "{v1}<style id='2'>你好</style>，世界！"
     }
 ]
+"""
 
-$contextual_hints_block
+# Parts that change with every batch.
+_PROMPT_BATCH = """$contextual_hints_block
 
 $glossary_tables_block
 
 ## Here is the input:
 
 $json_input_str"""
+
+PROMPT_TEMPLATE = Template(f"{_PROMPT_INSTRUCTIONS}\n{_PROMPT_BATCH}")
+
+# Layout for provider-side prompt caching: everything that is the same for every batch of
+# a document comes first, so consecutive requests share the longest possible prefix.
+PREFIX_CACHED_PROMPT_TEMPLATE = Template(
+    f"""{_PROMPT_INSTRUCTIONS}
+$document_context_block
+$document_glossary_tables_block
+# Current Batch
+
+{_PROMPT_BATCH}"""
+)
+
+GLOSSARY_USAGE_RULES_BLOCK = (
+    "## Glossary\n"
+    "If a glossary is provided:\n"
+    "- Always use the exact target term.\n"
+    "- Apply glossary items even inside tags or when broken by hyphens/line breaks.\n"
+    "- If glossary does NOT include a term, translate it naturally.\n\n"
 )
 
+# Above this size the glossary of a document is not worth repeating in every request,
+# each batch then gets the entries it uses, after the stable prefix.
+DOCUMENT_GLOSSARY_MAX_ENTRIES = 200
+
+# Most recently used paragraph translations loaded into the translation memory
+TRANSLATION_MEMORY_MAX_ENTRIES = 50_000
+
 
 class BatchParagraph:
     def __init__(
         self,
         paragraphs: list[PdfParagraph],
         pages: list[Page],
-        page_tracker: PageTranslateTracker,
+        page_tracker: PageTranslateTracker | None = None,
+        trackers: list[ParagraphTranslateTracker] | None = None,
+        font_maps: list[tuple[dict, dict]] | None = None,
     ):
         self.paragraphs = paragraphs
         self.pages = pages
-        self.trackers = [page_tracker.new_paragraph() for _ in paragraphs]
+        if trackers is None:
+            trackers = [page_tracker.new_paragraph() for _ in paragraphs]
+        self.trackers = trackers
+        # Font maps of the page of every paragraph, for batches spanning several
+        # pages. Empty if the batch context has the font maps of all paragraphs.
+        self.font_maps = font_maps or []
+
+    @classmethod
+    def from_groups(cls, groups: list[ParagraphGroup]) -> "BatchParagraph":
+        return cls(
+            [p for group in groups for p in group.paragraphs],
+            [page for group in groups for page in group.pages],
+            trackers=[tracker for group in groups for tracker in group.trackers],
+            font_maps=[font_maps for group in groups for font_maps in group.font_maps],
+        )
+
+
+class BatchTranslateContext:
+    """State shared by the phases of translating one BatchParagraph."""
+
+    def __init__(
+        self,
+        batch_paragraph: BatchParagraph,
+        pbar: tqdm | None,
+        page_font_map: dict[str, PdfFont],
+        xobj_font_map: dict[int, dict[str, PdfFont]],
+        title_paragraph: PdfParagraph | None,
+        local_title_paragraph: PdfParagraph | None,
+        executor: PriorityThreadPoolExecutor | None,
+        paragraph_token_count: int,
+        mp_id: int,
+    ):
+        self.batch_paragraph = batch_paragraph
+        self.pbar = pbar
+        self.page_font_map = page_font_map
+        self.xobj_font_map = xobj_font_map
+        self.title_paragraph = title_paragraph
+        self.local_title_paragraph = local_title_paragraph
+        self.executor = executor
+        self.paragraph_token_count = paragraph_token_count
+        self.mp_id = mp_id
+        self.should_translate_paragraph: list[int] = []
+        self.inputs: list[tuple] = []
+        self.llm_translate_trackers = []
+        self.paragraph_cache_keys: list[str] = []
+        # Translation memory matches given to the LLM, by paragraph cache key.
+        self.translation_memory_hints: dict[str, TranslationMemoryMatch] = {}
+        # Glossaries of the pages of the batch when the terms are extracted during the
+        # translation, None for the glossaries known when the translation started.
+        self.glossaries: list[Glossary] | None = None
+
+    def get_font_maps(self, index: int) -> tuple[dict, dict]:
+        """Page and xobject font maps for the paragraph at ``index`` of the batch."""
+        if self.batch_paragraph.font_maps:
+            return self.batch_paragraph.font_maps[index]
+        return self.page_font_map, self.xobj_font_map
+
+
+class IncrementalBatchOutput:
+    """Applies the paragraphs of a streamed batch output as soon as each one is complete."""
+
+    def __init__(self, translator: "ILTranslatorLLMOnly", ctx: BatchTranslateContext):
+        self.translator = translator
+        self.ctx = ctx
+        self.parser = IncrementalJSONArrayParser()
+        self.chunks: list[str] = []
+        self.applied_ids: set[int] = set()
+
+    def feed(self, chunk: str):
+        self.chunks.append(chunk)
+        for item in self.parser.feed(chunk):
+            if not isinstance(item, dict) or "id" not in item:
+                continue
+            try:
+                id_ = int(item["id"])
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid id {item['id']}, skipping")
+                continue
+            if id_ in self.applied_ids or not 0 <= id_ < len(self.ctx.inputs):
+                logger.warning(f"Invalid or duplicate id {id_}, skipping")
+                continue
+            self.applied_ids.add(id_)
+            self.translator._apply_llm_result(
+                self.ctx, id_, item.get("output", item.get("input"))
+            )
+
+    def finish(self, error: Exception | None = None) -> list[int]:
+        """Handle the paragraphs the stream did not deliver.
+
+        If nothing could be applied, the error is raised so that the whole batch falls
+        back, or a completed output is parsed as a whole. Otherwise the ones already
+        received are kept.
+
+        Returns:
+            Ids of the paragraphs missing from the output, see
+            :meth:`ILTranslatorLLMOnly._split_failed_batch`.
+        """
+        ctx = self.ctx
+        llm_output = "".join(self.chunks)
+        if not self.applied_ids:
+            if error is not None:
+                raise error
+            return self.translator._apply_llm_output(ctx, llm_output)
+        for llm_translate_tracker in ctx.llm_translate_trackers:
+            llm_translate_tracker.set_output(llm_output)
+        missing_ids = [
+            id_ for id_ in range(len(ctx.inputs)) if id_ not in self.applied_ids
+        ]
+        if missing_ids:
+            logger.warning(
+                f"LLM stream delivered {len(self.applied_ids)} of {len(ctx.inputs)} "
+                f"paragraphs. Error: {error}"
+            )
+        for id_ in missing_ids:
+            ctx.inputs[id_][4].set_error_message(
+                f"Paragraph missing from streamed output. Error: {error}"
+            )
+        return missing_ids
 
 
 class ILTranslatorLLMOnly:
@@ -115,6 +280,7 @@ class ILTranslatorLLMOnly:
         translate_engine: BaseTranslator,
         translation_config: TranslationConfig,
         tokenizer=None,
+        packer: ParagraphPacker | None = None,
     ):
         self.translate_engine = translate_engine
         self.translation_config = translation_config
@@ -123,10 +289,14 @@ class ILTranslatorLLMOnly:
             translation_config.shared_context_cross_split_part
         )
 
-        if tokenizer is None:
-            self.tokenizer = tiktoken.encoding_for_model("gpt-4o")
-        else:
-            self.tokenizer = tokenizer
+        self.tokenizer = as_tokenizer(tokenizer)
+        if packer is None:
+            packer = ParagraphPacker(
+                max_tokens=translation_config.llm_batch_max_tokens,
+                max_paragraphs=translation_config.llm_batch_max_paragraphs,
+                across_pages=translation_config.llm_batch_across_pages,
+            )
+        self.packer = packer
 
         # Cache glossaries at initialization
         self._cached_glossaries = (
@@ -146,15 +316,53 @@ class ILTranslatorLLMOnly:
         except NotImplementedError as e:
             raise ValueError("LLM translator not supported") from e
 
+        # Engines with coroutine entry points are driven by an event loop
+        # instead of one blocking worker thread per in-flight request.
+        self.use_asyncio = isinstance(translate_engine, AsyncBaseTranslator)
+
+        # Batch prompts depend on their neighbours and on the title context, so an
+        # edit anywhere in a batch misses the prompt cache. Translations of single
+        # paragraphs are cached as well, and only the misses are sent to the LLM.
+        self.paragraph_cache = TranslationCache(
+            f"{translate_engine.name}_paragraph",
+            {
+                **translate_engine.cache.params,
+                "custom_system_prompt": translation_config.custom_system_prompt,
+            },
+        )
+
         self.ok_count = 0
         self.fallback_count = 0
         self.total_count = 0
+        self.dedup_count = 0
+        self.batch_count = 0
+        # Outputs that were malformed or incomplete, and how they were recovered
+        self._recovery_lock = threading.Lock()
+        self._recovery_stats = {
+            "malformed_batches": 0,
+            "salvaged_paragraphs": 0,
+            "retry_batches": 0,
+            "fallback_paragraphs": 0,
+        }
+        self._pending_batches: list[BatchTranslateContext] = []
+        self._inflight_paragraphs: dict[str, tuple[BatchTranslateContext, list]] = {}
+        self._inflight_lock = threading.Lock()
+        # Glossary entries of the whole document, part of the stable prompt prefix.
+        self._document_glossary_entries: dict[str, list[tuple[str, str]]] = {}
+        # Set to extract the terms of the document while it is translated
+        self.term_extraction_pipeline: TermExtractionPipeline | None = None
+        self._page_indexes: dict[int, int] = {}
+        # Replaced by the index shared with the other stages of the document
+        self.glossary_match_index = GlossaryMatchIndex()
+        self.translation_memory: TranslationMemory | None = None
+        if translation_config.translation_memory_threshold is not None:
+            self.translation_memory = TranslationMemory(
+                threshold=translation_config.translation_memory_threshold,
+                reuse_threshold=translation_config.translation_memory_reuse_threshold,
+            )
 
     def calc_token_count(self, text: str) -> int:
-        try:
-            return len(self.tokenizer.encode(text, disallowed_special=()))
-        except Exception:
-            return 0
+        return self.tokenizer.count(text)
 
     def find_title_paragraph(self, docs: Document) -> PdfParagraph | None:
         """Find the first paragraph with layout_label 'title' in the document.
@@ -189,6 +397,27 @@ class ILTranslatorLLMOnly:
             if title_paragraph:
                 logger.info(f"Found first title paragraph: {title_paragraph.unicode}")
 
+        self.il_translator.glossary_match_index = self.glossary_match_index
+        pipeline = self.term_extraction_pipeline
+        if pipeline is not None:
+            self._page_indexes = {id(page): i for i, page in enumerate(docs.page)}
+        else:
+            self.glossary_match_index.index_document(docs, self._cached_glossaries)
+        if pipeline is None and self.translation_config.prompt_prefix_caching:
+            # Not known up front when the terms are extracted during the translation.
+            self._document_glossary_entries = self._get_document_glossary_entries(docs)
+
+        if self.translation_config.progress_monitor is not None:
+            self.translation_config.progress_monitor.add_stats_provider(
+                "llm_batch_recovery", self.recovery_stats
+            )
+        if self.translation_memory is not None:
+            self._load_translation_memory()
+            if self.translation_config.progress_monitor is not None:
+                self.translation_config.progress_monitor.add_stats_provider(
+                    "translation_memory", self.translation_memory.stats
+                )
+
         # count total paragraph
         total = sum(
             [
@@ -203,6 +432,11 @@ class ILTranslatorLLMOnly:
             ]
         )
         translated_ids = set()
+        # When batches span pages, paragraphs split across pages or columns are packed
+        # with their neighbours instead of being sent on their own. They are also packed
+        # when the terms are extracted during the translation, submitted up front they
+        # would wait for the terms of the last pages.
+        groups = {} if self.packer.across_pages or pipeline is not None else None
         with self.translation_config.progress_monitor.stage_start(
             self.stage_name,
             total,
@@ -210,9 +444,7 @@ class ILTranslatorLLMOnly:
             with PriorityThreadPoolExecutor(
                 max_workers=self.translation_config.pool_max_workers,
             ) as executor2:
-                with PriorityThreadPoolExecutor(
-                    max_workers=self.translation_config.pool_max_workers,
-                ) as executor:
+                with self._create_batch_executor() as executor:
                     self.process_cross_page_paragraph(
                         docs,
                         executor,
@@ -220,6 +452,7 @@ class ILTranslatorLLMOnly:
                         tracker,
                         executor2,
                         translated_ids,
+                        groups,
                     )
                     # Cross-column detection per page (after cross-page processing)
                     for page in docs.page:
@@ -230,6 +463,7 @@ class ILTranslatorLLMOnly:
                             tracker,
                             executor2,
                             translated_ids,
+                            groups,
                         )
                     for page in docs.page:
                         self.process_page(
@@ -239,7 +473,15 @@ class ILTranslatorLLMOnly:
                             tracker.new_page(),
                             executor2,
                             translated_ids,
+                            groups,
                         )
+                    # Groups whose first paragraph was not reached, if any
+                    for group in (groups or {}).values():
+                        for batch in self.packer.add(group):
+                            self._submit_packed_batch(executor, batch, pbar, executor2)
+                    for batch in self.packer.flush():
+                        self._submit_packed_batch(executor, batch, pbar, executor2)
+                    self.flush_pending_batches(executor)
 
         path = self.translation_config.get_working_file_path("translate_tracking.json")
 
@@ -251,8 +493,138 @@ class ILTranslatorLLMOnly:
             with Path(path).open("w", encoding="utf-8") as f:
                 f.write(tracker.to_json())
         logger.info(
-            f"Translation completed. Total: {self.total_count}, Successful: {self.ok_count}, Fallback: {self.fallback_count}"
+            f"Translation completed. Total: {self.total_count}, Successful: {self.ok_count}, Fallback: {self.fallback_count}, Deduplicated: {self.dedup_count}, Batches: {self.batch_count}"
         )
+        logger.info(f"Malformed batch recovery: {self.recovery_stats()}")
+        if self.translation_memory is not None:
+            logger.info(f"Translation memory: {self.translation_memory.stats()}")
+
+    def _create_batch_executor(
+        self,
+    ) -> PriorityThreadPoolExecutor | AsyncPriorityExecutor:
+        """Create the executor that runs batch translation tasks."""
+        if not self.use_asyncio:
+            return PriorityThreadPoolExecutor(
+                max_workers=self.translation_config.pool_max_workers,
+            )
+        executor = AsyncPriorityExecutor(
+            max_workers=self.translation_config.async_max_concurrency,
+            thread_name_prefix="llm_only_translator",
+        )
+        executor.add_shutdown_callback(self.translate_engine.aclose)
+        return executor
+
+    def _submit_batch(
+        self,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
+        batch_paragraph: BatchParagraph,
+        pbar: tqdm | None,
+        page_font_map: dict[str, PdfFont],
+        page_xobj_font_map: dict[int, dict[str, PdfFont]],
+        executor2: PriorityThreadPoolExecutor | None,
+        total_token_count: int,
+    ):
+        """Queue one batch for translation, see :meth:`flush_pending_batches`."""
+        self.mid += 1
+        self.batch_count += 1
+        ctx = BatchTranslateContext(
+            batch_paragraph,
+            pbar,
+            page_font_map,
+            page_xobj_font_map,
+            self.translation_config.shared_context_cross_split_part.first_paragraph,
+            self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
+            executor2,
+            total_token_count,
+            self.mid,
+        )
+        pipeline = self.term_extraction_pipeline
+        if pipeline is not None:
+            page_index = max(
+                self._page_indexes[id(page)] for page in ctx.batch_paragraph.pages
+            )
+            if not pipeline.is_ready(page_index):
+                # Keep the workers busy while the terms are extracted.
+                self.flush_pending_batches(executor)
+            ctx.glossaries = pipeline.wait_for_page(page_index)
+        self._pending_batches.append(ctx)
+        if len(self._pending_batches) >= CACHE_PREFETCH_WINDOW:
+            self.flush_pending_batches(executor)
+
+    def _submit_packed_batch(
+        self,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
+        groups: list[ParagraphGroup],
+        pbar: tqdm | None,
+        executor2: PriorityThreadPoolExecutor | None,
+    ):
+        """Queue a batch closed by the packer."""
+        page_font_map, page_xobj_font_map = groups[0].font_maps[0]
+        self._submit_batch(
+            executor,
+            BatchParagraph.from_groups(groups),
+            pbar,
+            page_font_map,
+            page_xobj_font_map,
+            executor2,
+            sum(group.token_count for group in groups),
+        )
+
+    def flush_pending_batches(
+        self, executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor
+    ):
+        """Dispatch the batches queued by :meth:`_submit_batch`.
+
+        Paragraphs found in the paragraph cache are applied directly and the prompts
+        of the remaining ones are built up front, so that cache entries can be
+        resolved with a few batched queries. Cache hits are applied inline without
+        scheduling a worker task, everything else is submitted to ``executor``.
+        """
+        pending, self._pending_batches = self._pending_batches, []
+        collected = []
+        for ctx in pending:
+            try:
+                self._collect_batch_inputs(ctx)
+            except Exception as e:
+                self._fallback_batch(ctx, e)
+                continue
+            collected.append(ctx)
+
+        paragraph_cache_hits = self._lookup_paragraph_cache(
+            [key for ctx in collected for key in ctx.paragraph_cache_keys]
+        )
+        prepared = []
+        for ctx in collected:
+            try:
+                self._apply_paragraph_cache_hits(ctx, paragraph_cache_hits)
+                self._apply_translation_memory(ctx)
+                self._join_inflight_paragraphs(ctx)
+                final_input = self._build_batch_prompt(ctx)
+            except Exception as e:
+                self._fallback_batch(ctx, e)
+                continue
+            if final_input is not None:
+                prepared.append((ctx, final_input))
+        if not prepared:
+            return
+
+        cache_hits = self.translate_engine.prefetch_cache(
+            [final_input for _, final_input in prepared]
+        )
+        if isinstance(executor, AsyncPriorityExecutor):
+            translate_fn = self._atranslate_prepared_batch
+        else:
+            translate_fn = self._translate_prepared_batch
+        for ctx, final_input in prepared:
+            if final_input in cache_hits:
+                self._translate_prepared_batch(ctx, final_input)
+                continue
+            executor.submit(
+                translate_fn,
+                ctx,
+                final_input,
+                priority=1048576 - ctx.paragraph_token_count,
+            )
 
     def _is_body_text_paragraph(self, paragraph: PdfParagraph) -> bool:
         """判断正文段落（当前仅 layout_label == 'text'）。
@@ -357,11 +729,12 @@ class ILTranslatorLLMOnly:
     def process_cross_page_paragraph(
         self,
         docs: Document,
-        executor: PriorityThreadPoolExecutor,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
         pbar: tqdm | None = None,
         tracker: DocumentTranslateTracker | None = None,
         executor2: PriorityThreadPoolExecutor | None = None,
         translated_ids: set[int] | None = None,
+        groups: dict[int, ParagraphGroup] | None = None,
     ):
         """Process cross-page paragraphs by combining last body text paragraph of current page
         with first body text paragraph of next page.
@@ -373,6 +746,8 @@ class ILTranslatorLLMOnly:
             tracker: Page translation tracker
             executor2: Secondary executor for fallback translation
             translated_ids: Set of already translated paragraph IDs
+            groups: If given, the pairs are collected here by the id of their first
+                paragraph for :meth:`process_page` to pack, instead of being submitted
         """
         self.translation_config.raise_if_cancelled()
 
@@ -420,9 +795,9 @@ class ILTranslatorLLMOnly:
             merged_xobj_font_map = {**curr_xobj_font_map, **next_xobj_font_map}
 
             # Calculate total token count
-            total_token_count = self.calc_token_count(
+            total_token_count = self.tokenizer.approx_count(
                 last_curr_paragraph.unicode
-            ) + self.calc_token_count(first_next_paragraph.unicode)
+            ) + self.tokenizer.approx_count(first_next_paragraph.unicode)
 
             # Create batch with both paragraphs
             cross_page_paragraphs = [last_curr_paragraph, first_next_paragraph]
@@ -431,21 +806,28 @@ class ILTranslatorLLMOnly:
                 cross_page_paragraphs, cross_page_pages, tracker.new_cross_page()
             )
 
-            self.mid += 1
-            # Submit translation task (force submit regardless of token count)
-            executor.submit(
-                self.translate_paragraph,
-                batch_paragraph,
-                pbar,
-                merged_font_map,
-                merged_xobj_font_map,
-                self.translation_config.shared_context_cross_split_part.first_paragraph,
-                self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
-                executor2,
-                priority=1048576 - total_token_count,
-                paragraph_token_count=total_token_count,
-                mp_id=self.mid,
-            )
+            if groups is not None:
+                groups[id(last_curr_paragraph)] = ParagraphGroup(
+                    cross_page_paragraphs,
+                    cross_page_pages,
+                    batch_paragraph.trackers,
+                    total_token_count,
+                    [
+                        (curr_font_map, curr_xobj_font_map),
+                        (next_font_map, next_xobj_font_map),
+                    ],
+                )
+            else:
+                # Submit translation task (force submit regardless of token count)
+                self._submit_batch(
+                    executor,
+                    batch_paragraph,
+                    pbar,
+                    merged_font_map,
+                    merged_xobj_font_map,
+                    executor2,
+                    total_token_count,
+                )
 
             # Mark paragraphs as translated
             translated_ids.add(id(last_curr_paragraph))
@@ -454,17 +836,19 @@ class ILTranslatorLLMOnly:
     def process_cross_column_paragraph(
         self,
         page: Page,
-        executor: PriorityThreadPoolExecutor,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
         pbar: tqdm | None = None,
         tracker: DocumentTranslateTracker | None = None,
         executor2: PriorityThreadPoolExecutor | None = None,
         translated_ids: set[int] | None = None,
+        groups: dict[int, ParagraphGroup] | None = None,
     ):
         """Process cross-column paragraphs within the same page.
 
         If two adjacent body-text paragraphs have a gap in their y2 coordinate
         greater than 20 units, they are considered split across columns and
-        will be translated together.
+        will be translated together. With ``groups`` the pairs are collected as in
+        :meth:`process_cross_page_paragraph`.
         """
         self.translation_config.raise_if_cancelled()
 
@@ -500,25 +884,29 @@ class ILTranslatorLLMOnly:
             if p2.box.y2 - p1.box.y2 <= 20:
                 continue
 
-            total_token_count = self.calc_token_count(
+            total_token_count = self.tokenizer.approx_count(
                 p1.unicode
-            ) + self.calc_token_count(p2.unicode)
+            ) + self.tokenizer.approx_count(p2.unicode)
 
             batch = BatchParagraph([p1, p2], [page, page], tracker.new_cross_column())
-            self.mid += 1
-            executor.submit(
-                self.translate_paragraph,
-                batch,
-                pbar,
-                page_font_map,
-                page_xobj_font_map,
-                self.translation_config.shared_context_cross_split_part.first_paragraph,
-                self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
-                executor2,
-                priority=1048576 - total_token_count,
-                paragraph_token_count=total_token_count,
-                mp_id=self.mid,
-            )
+            if groups is not None:
+                groups[id(p1)] = ParagraphGroup(
+                    [p1, p2],
+                    [page, page],
+                    batch.trackers,
+                    total_token_count,
+                    [(page_font_map, page_xobj_font_map)] * 2,
+                )
+            else:
+                self._submit_batch(
+                    executor,
+                    batch,
+                    pbar,
+                    page_font_map,
+                    page_xobj_font_map,
+                    executor2,
+                    total_token_count,
+                )
 
             translated_ids.add(id(p1))
             translated_ids.add(id(p2))
@@ -526,12 +914,18 @@ class ILTranslatorLLMOnly:
     def process_page(
         self,
         page: Page,
-        executor: PriorityThreadPoolExecutor,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
         pbar: tqdm | None = None,
         tracker: PageTranslateTracker = None,
         executor2: PriorityThreadPoolExecutor | None = None,
         translated_ids: set | None = None,
+        groups: dict[int, ParagraphGroup] | None = None,
     ):
+        """Pack the paragraphs of a page into batches, see ParagraphPacker.
+
+        Groups collected by the cross-page and cross-column passes are packed at the
+        position of their first paragraph.
+        """
         self.translation_config.raise_if_cancelled()
         page_font_map = {}
         for font in page.pdf_font:
@@ -542,10 +936,13 @@ class ILTranslatorLLMOnly:
             for font in xobj.pdf_font:
                 page_xobj_font_map[xobj.xobj_id][font.font_id] = font
 
-        paragraphs = []
-
-        total_token_count = 0
         for paragraph in page.pdf_paragraph:
+            group = groups.pop(id(paragraph), None) if groups else None
+            if group is not None:
+                for batch in self.packer.add(group):
+                    self._submit_packed_batch(executor, batch, pbar, executor2)
+                continue
+
             # Check if already translated
             if id(paragraph) in translated_ids:
                 continue
@@ -577,47 +974,24 @@ class ILTranslatorLLMOnly:
                 continue
 
             # self.translate_paragraph(paragraph, pbar,tracker.new_paragraph(), page_font_map, page_xobj_font_map)
-            total_token_count += self.calc_token_count(paragraph.unicode)
-            paragraphs.append(paragraph)
+            group = ParagraphGroup(
+                [paragraph],
+                [page],
+                [tracker.new_paragraph()],
+                self.calc_token_count(paragraph.unicode),
+                [(page_font_map, page_xobj_font_map)],
+            )
             translated_ids.add(id(paragraph))
             if paragraph.layout_label == "title":
                 self.shared_context_cross_split_part.recent_title_paragraph = (
                     copy.deepcopy(paragraph)
                 )
 
-            if total_token_count > 200 or len(paragraphs) > 5:
-                self.mid += 1
-                executor.submit(
-                    self.translate_paragraph,
-                    BatchParagraph(paragraphs, [page] * len(paragraphs), tracker),
-                    pbar,
-                    page_font_map,
-                    page_xobj_font_map,
-                    self.translation_config.shared_context_cross_split_part.first_paragraph,
-                    self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
-                    executor2,
-                    priority=1048576 - total_token_count,
-                    paragraph_token_count=total_token_count,
-                    mp_id=self.mid,
-                )
-                paragraphs = []
-                total_token_count = 0
+            for batch in self.packer.add(group):
+                self._submit_packed_batch(executor, batch, pbar, executor2)
 
-        if paragraphs:
-            self.mid += 1
-            executor.submit(
-                self.translate_paragraph,
-                BatchParagraph(paragraphs, [page] * len(paragraphs), tracker),
-                pbar,
-                page_font_map,
-                page_xobj_font_map,
-                self.translation_config.shared_context_cross_split_part.first_paragraph,
-                self.translation_config.shared_context_cross_split_part.recent_title_paragraph,
-                executor2,
-                priority=1048576 - total_token_count,
-                paragraph_token_count=total_token_count,
-                mp_id=self.mid,
-            )
+        for batch in self.packer.end_page():
+            self._submit_packed_batch(executor, batch, pbar, executor2)
 
     def translate_paragraph(
         self,
@@ -633,279 +1007,740 @@ class ILTranslatorLLMOnly:
     ):
         """Translate a paragraph using pre and post processing functions."""
         self.translation_config.raise_if_cancelled()
-        should_translate_paragraph = []
+        ctx = BatchTranslateContext(
+            batch_paragraph,
+            pbar,
+            page_font_map,
+            xobj_font_map,
+            title_paragraph,
+            local_title_paragraph,
+            executor,
+            paragraph_token_count,
+            mp_id,
+        )
+        try:
+            final_input = self._prepare_batch(ctx)
+        except Exception as e:
+            self._fallback_batch(ctx, e)
+            return
+        if final_input is not None:
+            self._translate_prepared_batch(ctx, final_input)
+
+    def _translate_prepared_batch(self, ctx: BatchTranslateContext, final_input: str):
+        """Send the prompt of a prepared batch to the LLM and apply the result."""
+        self.translation_config.raise_if_cancelled()
+        rate_limit_params = {
+            "paragraph_token_count": ctx.paragraph_token_count,
+            "request_json_mode": True,
+        }
+        retries = []
         try:
-            inputs = []
-            llm_translate_trackers = []
-            paragraph_unicodes = []
-            for i in range(len(batch_paragraph.paragraphs)):
-                paragraph = batch_paragraph.paragraphs[i]
-                tracker = batch_paragraph.trackers[i]
-                text, translate_input = self.il_translator.pre_translate_paragraph(
-                    paragraph, tracker, page_font_map, xobj_font_map
+            if self.translation_config.llm_streaming:
+                stream = IncrementalBatchOutput(self, ctx)
+                try:
+                    for chunk in self.translate_engine.llm_translate_stream(
+                        final_input, rate_limit_params=rate_limit_params
+                    ):
+                        stream.feed(chunk)
+                except BatchRequestDeferredError:
+                    raise
+                except Exception as e:
+                    missing_ids = stream.finish(e)
+                else:
+                    missing_ids = stream.finish()
+            else:
+                llm_output = self.translate_engine.llm_translate(
+                    final_input, rate_limit_params=rate_limit_params
                 )
-                if text is None:
-                    pbar.advance(1)
-                    continue
+                missing_ids = self._apply_llm_output(ctx, llm_output)
+            retries = self._split_failed_batch(ctx, missing_ids)
+        except BatchRequestDeferredError:
+            self._drop_inflight_paragraphs(ctx)
+        except Exception as e:
+            self._fallback_batch(ctx, e)
+        finally:
+            self._release_inflight_paragraphs(ctx)
+        for retry_ctx, retry_input in retries:
+            self._translate_prepared_batch(retry_ctx, retry_input)
+
+    async def _atranslate_prepared_batch(
+        self, ctx: BatchTranslateContext, final_input: str
+    ):
+        """Coroutine variant of :meth:`_translate_prepared_batch` used in asyncio mode.
+
+        Only the LLM request is awaited; fallback translations are still
+        submitted to the thread pool ``ctx.executor``.
+        """
+        self.translation_config.raise_if_cancelled()
+        rate_limit_params = {
+            "paragraph_token_count": ctx.paragraph_token_count,
+            "request_json_mode": True,
+        }
+        retries = []
+        try:
+            if self.translation_config.llm_streaming:
+                stream = IncrementalBatchOutput(self, ctx)
+                try:
+                    async for chunk in self.translate_engine.allm_translate_stream(
+                        final_input, rate_limit_params=rate_limit_params
+                    ):
+                        stream.feed(chunk)
+                except BatchRequestDeferredError:
+                    raise
+                except Exception as e:
+                    missing_ids = stream.finish(e)
+                else:
+                    missing_ids = stream.finish()
+            else:
+                llm_output = await self.translate_engine.allm_translate(
+                    final_input, rate_limit_params=rate_limit_params
+                )
+                missing_ids = self._apply_llm_output(ctx, llm_output)
+            retries = self._split_failed_batch(ctx, missing_ids)
+        except BatchRequestDeferredError:
+            self._drop_inflight_paragraphs(ctx)
+        except Exception as e:
+            self._fallback_batch(ctx, e)
+        finally:
+            self._release_inflight_paragraphs(ctx)
+        for retry_ctx, retry_input in retries:
+            await self._atranslate_prepared_batch(retry_ctx, retry_input)
+
+    def _prepare_batch(self, ctx: BatchTranslateContext) -> str | None:
+        """Run pre-translation for every paragraph of the batch and build the LLM prompt.
+
+        Returns:
+            The final prompt, or None if no paragraph in the batch needs translation.
+        """
+        self._collect_batch_inputs(ctx)
+        self._apply_paragraph_cache_hits(
+            ctx, self._lookup_paragraph_cache(ctx.paragraph_cache_keys)
+        )
+        self._apply_translation_memory(ctx)
+        self._join_inflight_paragraphs(ctx)
+        return self._build_batch_prompt(ctx)
+
+    def _collect_batch_inputs(self, ctx: BatchTranslateContext):
+        """Run pre-translation for every paragraph of the batch."""
+        batch_paragraph = ctx.batch_paragraph
+        paragraph_unicodes = []
+        for i in range(len(batch_paragraph.paragraphs)):
+            paragraph = batch_paragraph.paragraphs[i]
+            tracker = batch_paragraph.trackers[i]
+            text, translate_input = self.il_translator.pre_translate_paragraph(
+                paragraph, tracker, *ctx.get_font_maps(i)
+            )
+            if text is None:
+                ctx.pbar.advance(1)
+                continue
 
-                tracker.record_multi_paragraph_id(mp_id)
+            tracker.record_multi_paragraph_id(ctx.mp_id)
 
-                llm_translate_tracker = tracker.new_llm_translate_tracker()
-                should_translate_paragraph.append(i)
-                llm_translate_trackers.append(llm_translate_tracker)
-                inputs.append(
+            llm_translate_tracker = tracker.new_llm_translate_tracker()
+            ctx.should_translate_paragraph.append(i)
+            ctx.llm_translate_trackers.append(llm_translate_tracker)
+            ctx.inputs.append(
+                (
+                    text,
+                    translate_input,
+                    paragraph,
+                    tracker,
+                    llm_translate_tracker,
+                    paragraph_unicodes,
+                )
+            )
+            ctx.paragraph_cache_keys.append(
+                self._get_paragraph_cache_key(
+                    text, translate_input, ctx.glossaries, paragraph
+                )
+            )
+            paragraph_unicodes.append(paragraph.unicode)
+
+    def _get_paragraph_cache_key(
+        self,
+        text: str,
+        translate_input: il_translator.ILTranslator.TranslateInput,
+        glossaries: list[Glossary] | None = None,
+        paragraph: PdfParagraph | None = None,
+    ) -> str:
+        """Build the paragraph cache key.
+
+        Target language, model and system prompt are part of the cache params. The
+        key holds everything else the translation of a single paragraph depends on:
+        its whitespace-normalized text, the formulas behind its placeholders and the
+        glossary entries that apply to it.
+        """
+        normalized_text = " ".join(text.split())
+        key = {
+            "input": normalized_text,
+            "placeholders": translate_input.get_placeholders_hint(),
+            "formula_placeholders_hint": (
+                self.translation_config.add_formula_placehold_hint
+            ),
+            "glossary": self._get_active_glossary_entries(
+                normalized_text,
+                glossaries,
+                [paragraph] if paragraph is not None else None,
+            ),
+        }
+        return json.dumps(key, ensure_ascii=False, sort_keys=True)
+
+    def _lookup_paragraph_cache(self, keys: list[str]) -> dict[str, str]:
+        if self.translate_engine.ignore_cache or not keys:
+            return {}
+        return self.paragraph_cache.get_many(keys)
+
+    def _apply_paragraph_cache_hits(
+        self, ctx: BatchTranslateContext, paragraph_cache_hits: dict[str, str]
+    ):
+        """Apply cached paragraph translations and drop them from ``ctx.inputs``."""
+        if not paragraph_cache_hits:
+            return
+        self._keep_inputs(
+            ctx,
+            [
+                id_
+                for id_, key in enumerate(ctx.paragraph_cache_keys)
+                if key not in paragraph_cache_hits
+                or not self._apply_paragraph_translation(
+                    ctx,
+                    ctx.inputs[id_],
+                    ctx.inputs[id_][5][id_],
+                    key,
+                    paragraph_cache_hits[key],
+                )
+            ],
+        )
+
+    def _load_translation_memory(self):
+        """Index the cached paragraph translations, most recently used first."""
+        if self.translate_engine.ignore_cache:
+            return
+        for key, translation in self.paragraph_cache.recent_entries(
+            TRANSLATION_MEMORY_MAX_ENTRIES
+        ):
+            try:
+                source = json.loads(key)["input"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.translation_memory.add(source, translation)
+        logger.info(
+            f"Translation memory loaded {len(self.translation_memory)} paragraphs"
+        )
+
+    def _apply_translation_memory(self, ctx: BatchTranslateContext):
+        """Look up the paragraphs left in ``ctx.inputs`` in the translation memory.
+
+        Reusable matches are applied and dropped from ``ctx.inputs``, the other
+        matches are kept as hints for the prompt. Reuses are not written to the
+        paragraph cache, which only holds exact translations.
+        """
+        if self.translation_memory is None or not ctx.inputs:
+            return
+        keep = []
+        for id_, key in enumerate(ctx.paragraph_cache_keys):
+            input_ = ctx.inputs[id_]
+            match = self.translation_memory.lookup(" ".join(input_[0].split()))
+            if match is None:
+                keep.append(id_)
+                continue
+            if match.reusable and self._apply_paragraph_translation(
+                ctx, input_, input_[5][id_], key, match.translation
+            ):
+                self.translation_memory.record_reuse()
+                continue
+            ctx.translation_memory_hints[key] = match
+            keep.append(id_)
+        self._keep_inputs(ctx, keep)
+
+    def _join_inflight_paragraphs(self, ctx: BatchTranslateContext):
+        """Deduplicate paragraphs that are already being translated.
+
+        Repeated headers, footers and boilerplate would otherwise be sent once per
+        copy, since the copies are in flight at the same time and none of them can
+        hit the cache. Only the first copy of a paragraph is translated; the others
+        are dropped from ``ctx.inputs`` and receive its translation once the batch
+        of the first copy is done, see :meth:`_resolve_inflight_paragraph`.
+        """
+        keep = []
+        with self._inflight_lock:
+            for id_, key in enumerate(ctx.paragraph_cache_keys):
+                flight = self._inflight_paragraphs.get(key)
+                if flight is None:
+                    self._inflight_paragraphs[key] = (ctx, [])
+                    keep.append(id_)
+                    continue
+                flight[1].append(
                     (
-                        text,
-                        translate_input,
-                        paragraph,
-                        tracker,
-                        llm_translate_tracker,
-                        paragraph_unicodes,
+                        ctx,
+                        ctx.inputs[id_],
+                        ctx.should_translate_paragraph[id_],
+                        ctx.inputs[id_][5][id_],
                     )
                 )
-                paragraph_unicodes.append(paragraph.unicode)
-            if not inputs:
-                return
-            json_format_input = []
-
-            for id_, input_text in enumerate(inputs):
-                ti: il_translator.ILTranslator.TranslateInput = input_text[1]
-                tracker: ParagraphTranslateTracker = input_text[3]
-                tracker.record_multi_paragraph_index(id_)
-                placeholders_hint = ti.get_placeholders_hint()
-                obj = {
-                    "id": id_,
-                    "input": input_text[0],
-                    "layout_label": input_text[2].layout_label,
-                }
-                if (
-                    placeholders_hint
-                    and self.translation_config.add_formula_placehold_hint
-                ):
-                    obj["formula_placeholders_hint"] = placeholders_hint
-                json_format_input.append(obj)
+                self.dedup_count += 1
+        self._keep_inputs(ctx, keep)
 
-            json_format_input_str = json.dumps(
-                json_format_input, ensure_ascii=False, indent=2
-            )
+    def _resolve_inflight_paragraph(
+        self, ctx: BatchTranslateContext, key: str, translated_text: str | None
+    ):
+        """Hand the translation of a paragraph owned by ``ctx`` to its duplicates.
 
-            batch_text_for_glossary_matching = "\n".join(
-                item.get("input", "") for item in json_format_input
+        Duplicates fall back to simple translation if ``translated_text`` is None.
+        """
+        with self._inflight_lock:
+            flight = self._inflight_paragraphs.get(key)
+            if flight is None or flight[0] is not ctx:
+                return
+            del self._inflight_paragraphs[key]
+        for waiter_ctx, input_, paragraph_index, original_unicode in flight[1]:
+            if translated_text is not None and self._apply_paragraph_translation(
+                waiter_ctx, input_, original_unicode, key, translated_text
+            ):
+                continue
+            self._fallback_paragraph(
+                waiter_ctx, input_, paragraph_index, original_unicode
             )
 
-            final_input = self._build_llm_prompt(
-                json_input_str=json_format_input_str,
-                title_paragraph=title_paragraph,
-                local_title_paragraph=local_title_paragraph,
-                batch_text_for_glossary_matching=batch_text_for_glossary_matching,
-            )
+    def _drop_inflight_paragraphs(self, ctx: BatchTranslateContext):
+        """Forget the paragraphs owned by ``ctx`` without translating their duplicates.
 
-            for llm_translate_tracker in llm_translate_trackers:
-                llm_translate_tracker.set_input(final_input)
-            llm_output = self.translate_engine.llm_translate(
-                final_input,
-                rate_limit_params={
-                    "paragraph_token_count": paragraph_token_count,
-                    "request_json_mode": True,
-                },
+        Used when the request of the batch was deferred to the batch API: the
+        duplicates are translated from the cache by the next round, falling back now
+        would only defer single requests for them.
+        """
+        with self._inflight_lock:
+            for key in ctx.paragraph_cache_keys:
+                flight = self._inflight_paragraphs.get(key)
+                if flight is not None and flight[0] is ctx:
+                    del self._inflight_paragraphs[key]
+
+    def _release_inflight_paragraphs(self, ctx: BatchTranslateContext):
+        for key in ctx.paragraph_cache_keys:
+            self._resolve_inflight_paragraph(ctx, key, None)
+
+    def _apply_paragraph_translation(
+        self,
+        ctx: BatchTranslateContext,
+        input_: tuple,
+        original_unicode: str,
+        key: str,
+        translated_text: str,
+    ) -> bool:
+        """Apply a translation that was not produced by the batch of ``ctx``."""
+        llm_translate_tracker = input_[4]
+        llm_translate_tracker.set_input(key)
+        llm_translate_tracker.set_output(translated_text)
+        try:
+            self.il_translator.post_translate_paragraph(
+                input_[2], input_[3], input_[1], translated_text
             )
-            for llm_translate_tracker in llm_translate_trackers:
-                llm_translate_tracker.set_output(llm_output)
-            llm_output = llm_output.strip()
+        except Exception as e:
+            logger.warning(
+                f"Failed to apply paragraph translation: {e}. "
+                f"paragraph id: {input_[2].debug_id}"
+            )
+            input_[2].unicode = original_unicode
+            return False
+        self.total_count += 1
+        self.ok_count += 1
+        if ctx.pbar:
+            ctx.pbar.advance(1)
+        return True
 
-            llm_output = self._clean_json_output(llm_output)
+    def _fallback_paragraph(
+        self,
+        ctx: BatchTranslateContext,
+        input_: tuple,
+        paragraph_index: int,
+        original_unicode: str,
+    ):
+        """Submit a single paragraph to the fallback executor."""
+        paragraph = input_[2]
+        self.total_count += 1
+        self.fallback_count += 1
+        input_[4].set_fallback_to_translate()
+        logger.warning(
+            f"Fallback to simple translation. paragraph id: {paragraph.debug_id}"
+        )
+        paragraph.unicode = original_unicode
+        paragraph_token_count = self.tokenizer.approx_count(paragraph.unicode)
+        ctx.executor.submit(
+            self.il_translator.translate_paragraph,
+            paragraph,
+            ctx.batch_paragraph.pages[paragraph_index],
+            ctx.pbar,
+            input_[3],
+            *ctx.get_font_maps(paragraph_index),
+            priority=1048576 - paragraph_token_count,
+            paragraph_token_count=paragraph_token_count,
+            title_paragraph=ctx.title_paragraph,
+            local_title_paragraph=ctx.local_title_paragraph,
+        )
 
-            parsed_output = json.loads(llm_output)
+    @staticmethod
+    def _keep_inputs(ctx: BatchTranslateContext, ids: list[int]):
+        """Restrict the batch to the inputs at ``ids``."""
+        if len(ids) == len(ctx.inputs):
+            return
+        paragraph_unicodes = []
+        inputs = []
+        for id_ in ids:
+            inputs.append((*ctx.inputs[id_][:5], paragraph_unicodes))
+            paragraph_unicodes.append(ctx.inputs[id_][5][id_])
+        ctx.inputs = inputs
+        ctx.should_translate_paragraph = [
+            ctx.should_translate_paragraph[id_] for id_ in ids
+        ]
+        ctx.paragraph_cache_keys = [ctx.paragraph_cache_keys[id_] for id_ in ids]
+        ctx.llm_translate_trackers = [input_[4] for input_ in inputs]
 
-            if isinstance(parsed_output, dict) and parsed_output.get(
-                "output", parsed_output.get("input", False)
-            ):
-                parsed_output = [parsed_output]
+    def _build_batch_prompt(self, ctx: BatchTranslateContext) -> str | None:
+        """Build the LLM prompt for the paragraphs left in ``ctx.inputs``.
 
-            translation_results = {
-                item["id"]: item.get("output", item.get("input"))
-                for item in parsed_output
+        Returns:
+            The final prompt, or None if no paragraph in the batch needs translation.
+        """
+        if not ctx.inputs:
+            return None
+        json_format_input = []
+
+        for id_, input_text in enumerate(ctx.inputs):
+            ti: il_translator.ILTranslator.TranslateInput = input_text[1]
+            tracker: ParagraphTranslateTracker = input_text[3]
+            tracker.record_multi_paragraph_index(id_)
+            placeholders_hint = ti.get_placeholders_hint()
+            obj = {
+                "id": id_,
+                "input": input_text[0],
+                "layout_label": input_text[2].layout_label,
             }
+            if placeholders_hint and self.translation_config.add_formula_placehold_hint:
+                obj["formula_placeholders_hint"] = placeholders_hint
+            match = ctx.translation_memory_hints.get(ctx.paragraph_cache_keys[id_])
+            if match is not None:
+                obj["similar_translation"] = {
+                    "input": match.source,
+                    "output": match.translation,
+                }
+            json_format_input.append(obj)
 
-            if len(translation_results) != len(inputs):
-                raise Exception(
-                    f"Translation results length mismatch. Expected: {len(inputs)}, Got: {len(translation_results)}"
-                )
+        json_format_input_str = json.dumps(
+            json_format_input, ensure_ascii=False, indent=2
+        )
 
-            for id_, output in translation_results.items():
-                should_fallback = True
-                try:
-                    if not isinstance(output, str):
-                        logger.warning(
-                            f"Translation result is not a string. Output: {output}"
-                        )
-                        continue
+        batch_text_for_glossary_matching = "\n".join(
+            item.get("input", "") for item in json_format_input
+        )
 
-                    id_ = int(id_)  # Ensure id is an integer
-                    if id_ >= len(inputs):
-                        logger.warning(f"Invalid id {id_}, skipping")
-                        continue
+        final_input = self._build_llm_prompt(
+            json_input_str=json_format_input_str,
+            title_paragraph=ctx.title_paragraph,
+            local_title_paragraph=ctx.local_title_paragraph,
+            batch_text_for_glossary_matching=batch_text_for_glossary_matching,
+            batch_paragraphs=[input_[2] for input_ in ctx.inputs],
+            has_similar_translations=any(
+                "similar_translation" in obj for obj in json_format_input
+            ),
+            glossaries=ctx.glossaries,
+        )
 
-                    # Clean up any excessive punctuation in the translated text
-                    translated_text = re.sub(r"[. 。…，]{20,}", ".", output)
+        for llm_translate_tracker in ctx.llm_translate_trackers:
+            llm_translate_tracker.set_input(final_input)
+        return final_input
 
-                    # Get the original input for this translation
-                    translate_input = inputs[id_][1]
-                    llm_translate_tracker = inputs[id_][4]
+    def _apply_llm_output(
+        self, ctx: BatchTranslateContext, llm_output: str
+    ) -> list[int]:
+        """Parse the LLM output of a batch and post-process every paragraph.
 
-                    input_unicode = inputs[id_][0]
-                    output_unicode = translated_text
+        Paragraphs whose translation is rejected are submitted to the fallback executor.
+        If the output is not valid JSON, its well-formed paragraph objects are kept.
 
-                    trimed_input = re.sub(r"[. 。…，]{20,}", ".", input_unicode)
+        Returns:
+            Ids of the paragraphs missing from the output, see :meth:`_split_failed_batch`.
+        """
+        inputs = ctx.inputs
+        for llm_translate_tracker in ctx.llm_translate_trackers:
+            llm_translate_tracker.set_output(llm_output)
+        llm_output = llm_output.strip()
 
-                    input_token_count = self.calc_token_count(trimed_input)
-                    output_token_count = self.calc_token_count(output_unicode)
+        llm_output = self._clean_json_output(llm_output)
 
-                    same_as_input = trimed_input == output_unicode
-                    if (
-                        same_as_input
-                        and input_token_count > 10
-                        and not self.translation_config.disable_same_text_fallback
-                    ):
-                        llm_translate_tracker.set_error_message(
-                            "Translation result is the same as input, fallback."
-                        )
-                        llm_translate_tracker.set_placeholder_full_match()
-                        logger.warning(
-                            "Translation result is the same as input, fallback."
-                        )
-                        continue
+        try:
+            parsed_output = json.loads(llm_output)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Malformed LLM output, keep its complete paragraphs: {e}")
+            parsed_output = IncrementalJSONArrayParser().feed(llm_output)
 
-                    if not (0.3 < output_token_count / input_token_count < 3):
-                        llm_translate_tracker.set_error_message(
-                            f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
-                        )
-                        logger.warning(
-                            f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
-                        )
-                        llm_translate_tracker.set_placeholder_full_match()
-                        continue
+        if isinstance(parsed_output, dict) and parsed_output.get(
+            "output", parsed_output.get("input", False)
+        ):
+            parsed_output = [parsed_output]
+        if not isinstance(parsed_output, list):
+            parsed_output = []
 
-                    if not self.translation_config.disable_same_text_fallback:
-                        edit_distance = Levenshtein.distance(
-                            input_unicode, output_unicode
-                        )
-                        if edit_distance < 5 and input_token_count > 20:
-                            llm_translate_tracker.set_error_message(
-                                f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
-                            )
-                            logger.warning(
-                                f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
-                            )
-                            llm_translate_tracker.set_placeholder_full_match()
-                            continue
-                    # Apply the translation to the paragraph
-                    self.il_translator.post_translate_paragraph(
-                        inputs[id_][2],
-                        inputs[id_][3],
-                        translate_input,
-                        translated_text,
-                    )
-                    should_fallback = False
-                    if pbar:
-                        pbar.advance(1)
-                except Exception as e:
-                    error_message = f"Error translating paragraph. Error: {e}."
-                    logger.exception(error_message)
-                    # Ignore error and continue
-                    for llm_translate_tracker in llm_translate_trackers:
-                        llm_translate_tracker.set_error_message(error_message)
-                    continue
-                finally:
-                    self.total_count += 1
-                    if should_fallback:
-                        self.fallback_count += 1
-                        inputs[id_][4].set_fallback_to_translate()
-                        logger.warning(
-                            f"Fallback to simple translation. paragraph id: {inputs[id_][2].debug_id}"
-                        )
-                        paragraph_token_count = self.calc_token_count(
-                            inputs[id_][2].unicode
-                        )
-                        paragraph_unicodes = inputs[id_][5]
-                        inputs[id_][2].unicode = paragraph_unicodes[id_]
-                        executor.submit(
-                            self.il_translator.translate_paragraph,
-                            inputs[id_][2],
-                            batch_paragraph.pages[id_],
-                            pbar,
-                            inputs[id_][3],
-                            page_font_map,
-                            xobj_font_map,
-                            priority=1048576 - paragraph_token_count,
-                            paragraph_token_count=paragraph_token_count,
-                            title_paragraph=title_paragraph,
-                            local_title_paragraph=local_title_paragraph,
-                        )
-                    else:
-                        self.ok_count += 1
+        translation_results = {}
+        for item in parsed_output:
+            if not isinstance(item, dict) or "id" not in item:
+                continue
+            try:
+                id_ = int(item["id"])
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid id {item['id']}, skipping")
+                continue
+            if 0 <= id_ < len(inputs) and id_ not in translation_results:
+                translation_results[id_] = item.get("output", item.get("input"))
+
+        for id_, output in translation_results.items():
+            self._apply_llm_result(ctx, id_, output)
+        missing_ids = [
+            id_ for id_ in range(len(inputs)) if id_ not in translation_results
+        ]
+        if missing_ids:
+            logger.warning(
+                f"Translation results length mismatch. Expected: {len(inputs)}, "
+                f"Got: {len(translation_results)}"
+            )
+        return missing_ids
+
+    def _split_failed_batch(
+        self, ctx: BatchTranslateContext, missing_ids: list[int]
+    ) -> list[tuple[BatchTranslateContext, str]]:
+        """Sub-batches retrying the paragraphs at ``missing_ids``.
+
+        The paragraphs missing from a malformed or incomplete output are split in half
+        and each half is sent again, recursively, so that a paragraph that trips the
+        model costs a few requests and the others keep the context of their batch. A
+        paragraph that fails on its own falls back to simple translation.
+
+        Returns:
+            (context, prompt) of every sub-batch to send.
+        """
+        if not missing_ids:
+            return []
+        with self._recovery_lock:
+            self._recovery_stats["malformed_batches"] += 1
+            self._recovery_stats["salvaged_paragraphs"] += len(ctx.inputs) - len(
+                missing_ids
+            )
+        if len(ctx.inputs) == 1:
+            with self._recovery_lock:
+                self._recovery_stats["fallback_paragraphs"] += 1
+            self._fallback_paragraph(
+                ctx,
+                ctx.inputs[0],
+                ctx.should_translate_paragraph[0],
+                ctx.inputs[0][5][0],
+            )
+            self._resolve_inflight_paragraph(ctx, ctx.paragraph_cache_keys[0], None)
+            return []
+
+        middle = (len(missing_ids) + 1) // 2
+        retries = []
+        for ids in (missing_ids[:middle], missing_ids[middle:]):
+            if not ids:
+                continue
+            retry_ctx = copy.copy(ctx)
+            self._keep_inputs(retry_ctx, ids)
+            retry_ctx.paragraph_token_count = sum(
+                self.tokenizer.approx_count(input_[0]) for input_ in retry_ctx.inputs
+            )
+            # The duplicates of these paragraphs now wait for the retry.
+            with self._inflight_lock:
+                for key in retry_ctx.paragraph_cache_keys:
+                    flight = self._inflight_paragraphs.get(key)
+                    if flight is not None and flight[0] is ctx:
+                        self._inflight_paragraphs[key] = (retry_ctx, flight[1])
+            try:
+                retry_input = self._build_batch_prompt(retry_ctx)
+            except Exception as e:
+                self._fallback_batch(retry_ctx, e)
+                continue
+            retries.append((retry_ctx, retry_input))
+        with self._recovery_lock:
+            self._recovery_stats["retry_batches"] += len(retries)
+        return retries
+
+    def recovery_stats(self) -> dict:
+        """Malformed batch outputs and their recovery, by model."""
+        model = getattr(self.translate_engine, "model", self.translate_engine.name)
+        with self._recovery_lock:
+            return {model: dict(self._recovery_stats)}
+
+    def _apply_llm_result(self, ctx: BatchTranslateContext, id_, output):
+        """Validate and apply the LLM output of one paragraph of the batch.
+
+        Rejected translations are submitted to the fallback executor.
+        """
+        inputs = ctx.inputs
+        should_fallback = True
+        translated_text = None
+        try:
+            if not isinstance(output, str):
+                logger.warning(f"Translation result is not a string. Output: {output}")
+                return
+
+            id_ = int(id_)  # Ensure id is an integer
+            if id_ >= len(inputs):
+                logger.warning(f"Invalid id {id_}, skipping")
+                return
+
+            # Clean up any excessive punctuation in the translated text
+            translated_text = re.sub(r"[. 。…，]{20,}", ".", output)
+
+            # Get the original input for this translation
+            translate_input = inputs[id_][1]
+            llm_translate_tracker = inputs[id_][4]
+
+            input_unicode = inputs[id_][0]
+            output_unicode = translated_text
+
+            trimed_input = re.sub(r"[. 。…，]{20,}", ".", input_unicode)
+
+            input_token_count = self.calc_token_count(trimed_input)
+            output_token_count = self.calc_token_count(output_unicode)
+
+            same_as_input = trimed_input == output_unicode
+            if (
+                same_as_input
+                and input_token_count > 10
+                and not self.translation_config.disable_same_text_fallback
+            ):
+                llm_translate_tracker.set_error_message(
+                    "Translation result is the same as input, fallback."
+                )
+                llm_translate_tracker.set_placeholder_full_match()
+                logger.warning("Translation result is the same as input, fallback.")
+                return
+
+            if not (0.3 < output_token_count / input_token_count < 3):
+                llm_translate_tracker.set_error_message(
+                    f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
+                )
+                logger.warning(
+                    f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
+                )
+                llm_translate_tracker.set_placeholder_full_match()
+                return
 
+            if not self.translation_config.disable_same_text_fallback:
+                edit_distance = Levenshtein.distance(input_unicode, output_unicode)
+                if edit_distance < 5 and input_token_count > 20:
+                    llm_translate_tracker.set_error_message(
+                        f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
+                    )
+                    logger.warning(
+                        f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
+                    )
+                    llm_translate_tracker.set_placeholder_full_match()
+                    return
+            # Apply the translation to the paragraph
+            self.il_translator.post_translate_paragraph(
+                inputs[id_][2],
+                inputs[id_][3],
+                translate_input,
+                translated_text,
+            )
+            should_fallback = False
+            if not self.translate_engine.ignore_cache:
+                self.paragraph_cache.set(ctx.paragraph_cache_keys[id_], translated_text)
+            if self.translation_memory is not None:
+                self.translation_memory.add(
+                    " ".join(input_unicode.split()), translated_text
+                )
+            if ctx.pbar:
+                ctx.pbar.advance(1)
         except Exception as e:
-            error_message = f"Error {e} during translation. try fallback"
-            logger.warning(error_message)
-            for llm_translate_tracker in llm_translate_trackers:
+            error_message = f"Error translating paragraph. Error: {e}."
+            logger.exception(error_message)
+            # Ignore error and continue
+            for llm_translate_tracker in ctx.llm_translate_trackers:
                 llm_translate_tracker.set_error_message(error_message)
-                llm_translate_tracker.set_fallback_to_translate()
-            self.total_count += len(llm_translate_trackers)
-            self.fallback_count += len(llm_translate_trackers)
-            for input_ in inputs:
-                input_[2].unicode = input_[5]
-            if not should_translate_paragraph:
-                should_translate_paragraph = list(
-                    range(len(batch_paragraph.paragraphs))
+        finally:
+            if not (isinstance(id_, int) and 0 <= id_ < len(inputs)):
+                self.total_count += 1
+                self.fallback_count += 1
+            elif should_fallback:
+                self._fallback_paragraph(
+                    ctx,
+                    inputs[id_],
+                    ctx.should_translate_paragraph[id_],
+                    inputs[id_][5][id_],
                 )
-            for i in should_translate_paragraph:
-                paragraph = batch_paragraph.paragraphs[i]
-                tracker = batch_paragraph.trackers[i]
-                if paragraph.debug_id is None:
-                    continue
-                paragraph_token_count = self.calc_token_count(paragraph.unicode)
-                executor.submit(
-                    self.il_translator.translate_paragraph,
-                    paragraph,
-                    batch_paragraph.pages[i],
-                    pbar,
-                    tracker,
-                    page_font_map,
-                    xobj_font_map,
-                    priority=1048576 - paragraph_token_count,
-                    paragraph_token_count=paragraph_token_count,
-                    title_paragraph=title_paragraph,
-                    local_title_paragraph=local_title_paragraph,
+                self._resolve_inflight_paragraph(
+                    ctx, ctx.paragraph_cache_keys[id_], None
+                )
+            else:
+                self.total_count += 1
+                self.ok_count += 1
+                self._resolve_inflight_paragraph(
+                    ctx, ctx.paragraph_cache_keys[id_], translated_text
                 )
 
+    def _fallback_batch(self, ctx: BatchTranslateContext, e: Exception):
+        """Fall back to per-paragraph translation for the whole batch."""
+        error_message = f"Error {e} during translation. try fallback"
+        logger.warning(error_message)
+        for llm_translate_tracker in ctx.llm_translate_trackers:
+            llm_translate_tracker.set_error_message(error_message)
+            llm_translate_tracker.set_fallback_to_translate()
+        self.total_count += len(ctx.llm_translate_trackers)
+        self.fallback_count += len(ctx.llm_translate_trackers)
+        for id_, input_ in enumerate(ctx.inputs):
+            input_[2].unicode = input_[5][id_]
+        should_translate_paragraph = ctx.should_translate_paragraph
+        if not should_translate_paragraph:
+            should_translate_paragraph = list(
+                range(len(ctx.batch_paragraph.paragraphs))
+            )
+        for i in should_translate_paragraph:
+            paragraph = ctx.batch_paragraph.paragraphs[i]
+            tracker = ctx.batch_paragraph.trackers[i]
+            if paragraph.debug_id is None:
+                continue
+            paragraph_token_count = self.tokenizer.approx_count(paragraph.unicode)
+            ctx.executor.submit(
+                self.il_translator.translate_paragraph,
+                paragraph,
+                ctx.batch_paragraph.pages[i],
+                ctx.pbar,
+                tracker,
+                *ctx.get_font_maps(i),
+                priority=1048576 - paragraph_token_count,
+                paragraph_token_count=paragraph_token_count,
+                title_paragraph=ctx.title_paragraph,
+                local_title_paragraph=ctx.local_title_paragraph,
+            )
+        self._release_inflight_paragraphs(ctx)
+
     def _build_llm_prompt(
         self,
         json_input_str: str,
         title_paragraph: PdfParagraph | None,
         local_title_paragraph: PdfParagraph | None,
         batch_text_for_glossary_matching: str,
+        has_similar_translations: bool = False,
+        glossaries: list[Glossary] | None = None,
+        batch_paragraphs: list[PdfParagraph] | None = None,
     ) -> str:
         """Build LLM prompt using a single template for easier maintenance."""
-        # Build role block, honoring custom_system_prompt if provided.
-        custom_prompt = getattr(self.translation_config, "custom_system_prompt", None)
-        if custom_prompt:
-            role_block = custom_prompt.strip()
-            if "Follow all rules strictly." not in role_block:
-                if not role_block.endswith("\n"):
-                    role_block += "\n"
-                role_block += "Follow all rules strictly."
-        else:
-            role_block = (
-                f"You are a professional {self.translation_config.lang_out} native translator who needs to fluently translate text "
-                f"into {self.translation_config.lang_out}.\n\n"
-                "Follow all rules strictly."
-            )
+        if glossaries is None:
+            glossaries = self._cached_glossaries
+        role_block = self._build_role_block()
 
         # Build contextual hints section.
+        prefix_caching = self.translation_config.prompt_prefix_caching
         contextual_lines: list[str] = []
         hint_idx = 1
-        if title_paragraph:
+        document_context_block = ""
+        if title_paragraph and prefix_caching:
+            # The first title is the same for the whole document, it belongs to the prefix.
+            document_context_block = (
+                "## Document Context\n"
+                f"First title in full text: {title_paragraph.unicode}\n"
+            )
+        elif title_paragraph:
             contextual_lines.append(
                 f"{hint_idx}. First title in full text: {title_paragraph.unicode}"
             )
@@ -921,6 +1756,14 @@ class ILTranslatorLLMOnly:
                 contextual_lines.append(
                     f"{hint_idx}. The most recent title is: {local_title_paragraph.unicode}"
                 )
+                hint_idx += 1
+
+        if has_similar_translations:
+            contextual_lines.append(
+                f"{hint_idx}. Inputs with a `similar_translation` resemble a text translated "
+                "before, given with its translation. Keep its wording and terminology "
+                "where the input is unchanged and translate only the differences."
+            )
 
         if contextual_lines:
             contextual_hints_block = (
@@ -933,51 +1776,126 @@ class ILTranslatorLLMOnly:
 
         # Build glossary usage rules and glossary tables.
         glossary_usage_rules_block = ""
-        glossary_tables_block = ""
-        glossary_entries_per_glossary: dict[str, list[tuple[str, str]]] = {}
-
-        if self._cached_glossaries:
-            for glossary in self._cached_glossaries:
-                active_entries = glossary.get_active_entries_for_text(
-                    batch_text_for_glossary_matching
-                )
-                if active_entries:
-                    glossary_entries_per_glossary[glossary.name] = sorted(
-                        active_entries
-                    )
+        glossary_entries_per_glossary = self._get_active_glossary_entries(
+            batch_text_for_glossary_matching, glossaries, batch_paragraphs
+        )
 
-        if glossary_entries_per_glossary:
-            glossary_usage_rules_block = (
-                "## Glossary\n"
-                "If a glossary is provided:\n"
-                "- Always use the exact target term.\n"
-                "- Apply glossary items even inside tags or when broken by hyphens/line breaks.\n"
-                "- If glossary does NOT include a term, translate it naturally.\n\n"
+        if prefix_caching:
+            # The usage rules must not depend on the batch, they are part of the prefix.
+            if glossaries:
+                glossary_usage_rules_block = GLOSSARY_USAGE_RULES_BLOCK
+            document_entries = self._document_glossary_entries
+            batch_entries: dict[str, list[tuple[str, str]]] = {}
+            for glossary_name, entries in glossary_entries_per_glossary.items():
+                known = set(document_entries.get(glossary_name, ()))
+                remaining = [entry for entry in entries if entry not in known]
+                if remaining:
+                    batch_entries[glossary_name] = remaining
+            return PREFIX_CACHED_PROMPT_TEMPLATE.substitute(
+                role_block=role_block,
+                glossary_usage_rules_block=glossary_usage_rules_block,
+                document_context_block=document_context_block,
+                document_glossary_tables_block=self._build_glossary_tables_block(
+                    document_entries
+                ),
+                contextual_hints_block=contextual_hints_block,
+                json_input_str=json_input_str,
+                glossary_tables_block=self._build_glossary_tables_block(batch_entries),
+                lang_out=self.translation_config.lang_out,
             )
 
-            glossary_table_lines: list[str] = ["## Glossary Tables", ""]
-            for glossary_name, entries in glossary_entries_per_glossary.items():
-                glossary_table_lines.append(f"### Glossary: {glossary_name}")
-                glossary_table_lines.append("")
-                glossary_table_lines.append(
-                    "| Source Term | Target Term |\n|-------------|-------------|"
-                )
-                for original_source, target_text in entries:
-                    glossary_table_lines.append(
-                        f"| {original_source} | {target_text} |"
-                    )
-                glossary_table_lines.append("")
-            glossary_tables_block = "\n".join(glossary_table_lines)
+        if glossary_entries_per_glossary:
+            glossary_usage_rules_block = GLOSSARY_USAGE_RULES_BLOCK
 
         return PROMPT_TEMPLATE.substitute(
             role_block=role_block,
             glossary_usage_rules_block=glossary_usage_rules_block,
             contextual_hints_block=contextual_hints_block,
             json_input_str=json_input_str,
-            glossary_tables_block=glossary_tables_block,
+            glossary_tables_block=self._build_glossary_tables_block(
+                glossary_entries_per_glossary
+            ),
             lang_out=self.translation_config.lang_out,
         )
 
+    def _build_role_block(self) -> str:
+        # Build role block, honoring custom_system_prompt if provided.
+        custom_prompt = getattr(self.translation_config, "custom_system_prompt", None)
+        if custom_prompt:
+            role_block = custom_prompt.strip()
+            if "Follow all rules strictly." not in role_block:
+                if not role_block.endswith("\n"):
+                    role_block += "\n"
+                role_block += "Follow all rules strictly."
+        else:
+            role_block = (
+                f"You are a professional {self.translation_config.lang_out} native translator who needs to fluently translate text "
+                f"into {self.translation_config.lang_out}.\n\n"
+                "Follow all rules strictly."
+            )
+        return role_block
+
+    @staticmethod
+    def _build_glossary_tables_block(
+        glossary_entries_per_glossary: dict[str, list[tuple[str, str]]],
+    ) -> str:
+        if not glossary_entries_per_glossary:
+            return ""
+        glossary_table_lines: list[str] = ["## Glossary Tables", ""]
+        for glossary_name, entries in glossary_entries_per_glossary.items():
+            glossary_table_lines.append(f"### Glossary: {glossary_name}")
+            glossary_table_lines.append("")
+            glossary_table_lines.append(
+                "| Source Term | Target Term |\n|-------------|-------------|"
+            )
+            for original_source, target_text in entries:
+                glossary_table_lines.append(f"| {original_source} | {target_text} |")
+            glossary_table_lines.append("")
+        return "\n".join(glossary_table_lines)
+
+    def _get_document_glossary_entries(
+        self, docs: Document
+    ) -> dict[str, list[tuple[str, str]]]:
+        paragraphs = [
+            paragraph
+            for page in docs.page
+            for paragraph in page.pdf_paragraph
+            if paragraph.unicode
+        ]
+        entries = self._get_active_glossary_entries("", paragraphs=paragraphs)
+        entry_count = sum(len(e) for e in entries.values())
+        if entry_count > DOCUMENT_GLOSSARY_MAX_ENTRIES:
+            logger.info(
+                f"Document glossary has {entry_count} active entries, "
+                "keeping them out of the stable prompt prefix"
+            )
+            return {}
+        return entries
+
+    def _get_active_glossary_entries(
+        self,
+        text: str,
+        glossaries: list[Glossary] | None = None,
+        paragraphs: list[PdfParagraph] | None = None,
+    ) -> dict[str, list[tuple[str, str]]]:
+        """Active glossary entries by glossary name. The entries of ``paragraphs`` are
+        looked up in the glossary match index, ``text`` is only matched without them."""
+        if glossaries is None:
+            glossaries = self._cached_glossaries
+        if paragraphs is not None:
+            return self.glossary_match_index.get_active_entries(
+                paragraphs, glossaries or []
+            )
+        glossary_entries_per_glossary: dict[str, list[tuple[str, str]]] = {}
+        if glossaries:
+            for glossary in glossaries:
+                active_entries = glossary.get_active_entries_for_text(text)
+                if active_entries:
+                    glossary_entries_per_glossary[glossary.name] = sorted(
+                        active_entries
+                    )
+        return glossary_entries_per_glossary
+
     def _clean_json_output(self, llm_output: str) -> str:
         # Clean up JSON output by removing common wrapper tags
         llm_output = llm_output.strip()
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from dataclasses import field
+
+from babeldoc.format.pdf.document_il import il_version_1
+
+
+@dataclass
+class ParagraphGroup:
+    """
+    Paragraphs that go into the same LLM batch, in reading order, e.g. the two halves of
+    a paragraph split across a page or a column. A single paragraph is a group of one.
+    """
+
+    paragraphs: list[il_version_1.PdfParagraph]
+    pages: list[il_version_1.Page]
+    # ParagraphTranslateTracker of every paragraph
+    trackers: list
+    token_count: int
+    # (page_font_map, xobj_font_map) of every paragraph
+    font_maps: list[tuple[dict, dict]] = field(default_factory=list)
+
+
+class ParagraphPacker:
+    """
+    Packs paragraph groups into LLM batches.
+
+    Groups are added in reading order and kept in that order, so that every batch is a
+    run of neighbouring paragraphs and gives the LLM their context. A batch is closed
+    once it holds more than ``max_tokens`` tokens or more than ``max_paragraphs``
+    paragraphs. With ``across_pages`` the open batch carries over to the next page,
+    otherwise every page ends its batch. Each request repeats the instructions of the
+    prompt, so sparse pages such as slides need far fewer requests when packed.
+
+    Subclasses may override :meth:`should_close` to change where batches end.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 200,
+        max_paragraphs: int = 5,
+        across_pages: bool = False,
+    ):
+        if max_tokens < 1 or max_paragraphs < 1:
+            raise ValueError("batch budgets must be positive")
+        self.max_tokens = max_tokens
+        self.max_paragraphs = max_paragraphs
+        self.across_pages = across_pages
+        self._groups: list[ParagraphGroup] = []
+        self._token_count = 0
+        self._paragraph_count = 0
+
+    def should_close(self, token_count: int, paragraph_count: int) -> bool:
+        return token_count > self.max_tokens or paragraph_count > self.max_paragraphs
+
+    def add(self, group: ParagraphGroup) -> list[list[ParagraphGroup]]:
+        """Add the next group, and return the batches it closed."""
+        self._groups.append(group)
+        self._token_count += group.token_count
+        self._paragraph_count += len(group.paragraphs)
+        if self.should_close(self._token_count, self._paragraph_count):
+            return self.flush()
+        return []
+
+    def end_page(self) -> list[list[ParagraphGroup]]:
+        """Mark the end of a page, and return the batches it closed."""
+        if self.across_pages:
+            return []
+        return self.flush()
+
+    def flush(self) -> list[list[ParagraphGroup]]:
+        """Close the open batch."""
+        if not self._groups:
+            return []
+        batch, self._groups = self._groups, []
+        self._token_count = 0
+        self._paragraph_count = 0
+        return [batch]
@@ -19,6 +19,7 @@ from pymupdf import Font
 
 from babeldoc import asynchronize
 from babeldoc.assets.assets import warmup
+from babeldoc.babeldoc_exception.BabelDOCException import BatchJobPendingError
 from babeldoc.babeldoc_exception.BabelDOCException import ExtractTextError
 from babeldoc.babeldoc_exception.BabelDOCException import (
     InputFileGeneratedByBabelDOCError,
@@ -39,6 +40,9 @@ from babeldoc.format.pdf.document_il.midend.add_debug_information import (
 from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
     AutomaticTermExtractor,
 )
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    TermExtractionPipeline,
+)
 from babeldoc.format.pdf.document_il.midend.detect_scanned_file import DetectScannedFile
 from babeldoc.format.pdf.document_il.midend.il_translator import ILTranslator
 from babeldoc.format.pdf.document_il.midend.il_translator_llm_only import (
@@ -57,11 +61,19 @@ from babeldoc.format.pdf.split_manager import SplitManager
 from babeldoc.format.pdf.translation_config import TranslateResult
 from babeldoc.format.pdf.translation_config import TranslationConfig
 from babeldoc.format.pdf.translation_config import WatermarkOutputMode
+from babeldoc.glossary import GlossaryMatchIndex
 from babeldoc.pdfminer.pdfdocument import PDFDocument
 from babeldoc.pdfminer.pdfinterp import PDFResourceManager
 from babeldoc.pdfminer.pdfpage import PDFPage
 from babeldoc.pdfminer.pdfparser import PDFParser
 from babeldoc.progress_monitor import ProgressMonitor
+from babeldoc.translator.batch import BatchBackend
+from babeldoc.translator.batch import BatchJob
+from babeldoc.translator.batch import BatchRequestCollector
+from babeldoc.translator.batch import raise_if_requests_deferred
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import migrate_legacy_cache
+from babeldoc.translator.translator import BaseTranslator
 from babeldoc.utils import memory
 
 logger = logging.getLogger(__name__)
@@ -328,6 +340,55 @@ def translate(translation_config: TranslationConfig) -> TranslateResult:
         return do_translate(pm, translation_config)
 
 
+def batch_translate(
+    translation_config: TranslationConfig, backend: BatchBackend, job_dir: Path
+) -> TranslateResult | None:
+    """Run one step of a translation whose LLM requests go through a batch API.
+
+    Collects the results of the batches submitted by the previous step, then replays
+    the translation from the cache. If requests are still missing they are submitted
+    as new batches. Call again, e.g. from a later process, until a result is returned.
+
+    Args:
+        translation_config: Configuration for the translation process
+        backend: Batch API used to run the requests
+        job_dir: Directory holding the state of the job
+
+    Returns:
+        The translation result, or None while batches are pending.
+    """
+    if translation_config.ignore_cache:
+        raise ValueError("batch API mode needs the translation cache")
+    translators = {"translator": translation_config.translator}
+    term_extraction_translator = translation_config.get_term_extraction_translator()
+    if term_extraction_translator is not translation_config.translator:
+        translators["term_extraction_translator"] = term_extraction_translator
+    for translator in translators.values():
+        if type(translator).build_batch_request is BaseTranslator.build_batch_request:
+            raise ValueError(f"{translator.name} does not support the batch API")
+
+    job = BatchJob(job_dir, backend)
+    if job.done:
+        logger.info(f"Batch job {job_dir} is done, translating from the cache")
+    elif not job.collect_results(translators):
+        return None
+
+    collectors = {role: BatchRequestCollector() for role in translators}
+    for role, translator in translators.items():
+        translator.batch_collector = collectors[role]
+    try:
+        result = translate(translation_config)
+    except BatchJobPendingError as e:
+        logger.info(f"Batch job {job_dir}: {e}")
+        job.submit(collectors, translators)
+        return None
+    finally:
+        for translator in translators.values():
+            translator.batch_collector = None
+    job.finish()
+    return result
+
+
 def get_translation_stage(
     translation_config: TranslationConfig,
 ) -> list[tuple[str, float]]:
@@ -596,6 +657,22 @@ def do_translate(
 ) -> TranslateResult:
     try:
         translation_config.progress_monitor = pm
+        for name, translator in (
+            ("translator", translation_config.translator),
+            (
+                "term_extraction_translator",
+                translation_config.term_extraction_translator,
+            ),
+        ):
+            concurrency_limiter = getattr(translator, "concurrency_limiter", None)
+            if concurrency_limiter is not None:
+                pm.add_stats_provider(name, concurrency_limiter.stats)
+            hedging_policy = getattr(translator, "hedging_policy", None)
+            if hedging_policy is not None:
+                pm.add_stats_provider(f"{name}_hedging", hedging_policy.stats)
+            endpoint_pool = getattr(translator, "endpoint_pool", None)
+            if endpoint_pool is not None and len(endpoint_pool) > 1:
+                pm.add_stats_provider(f"{name}_endpoints", endpoint_pool.stats)
         original_pdf_path = translation_config.input_file
         logger.info(f"start to translate: {original_pdf_path}")
         try:
@@ -729,6 +806,8 @@ def do_translate(
                                 )
                                 results[i] = result
 
+                            except BatchJobPendingError:
+                                raise
                             except Exception as e:
                                 logger.error(f"Error in part {i}: {e}")
                                 pm.translate_error(e)
@@ -786,6 +865,8 @@ def do_translate(
         pm.translate_done(result)
         return result
 
+    except BatchJobPendingError:
+        raise
     except Exception as e:
         if translation_config.debug:
             logger.exception("translate error:")
@@ -796,6 +877,7 @@ def do_translate(
         raise
     finally:
         logger.debug("do_translate finally")
+        flush_cache_writes()
         pm.on_finish()
         translation_config.cleanup_temp_files()
 
@@ -1061,19 +1143,54 @@ def _do_translate_single(
     support_llm_translate = translator_supports_llm(translate_engine)
     support_llm_term_extraction = translator_supports_llm(term_extraction_engine)
 
+    # Glossary entries of every paragraph, shared by term extraction and translation
+    glossary_match_index = GlossaryMatchIndex()
+    glossary_match_index.index_document(
+        docs, translation_config.shared_context_cross_split_part.user_glossaries
+    )
+
+    term_extraction_pipeline = None
     if support_llm_term_extraction and translation_config.auto_extract_glossary:
-        AutomaticTermExtractor(term_extraction_engine, translation_config).procress(
-            docs
+        term_extractor = AutomaticTermExtractor(
+            term_extraction_engine, translation_config
         )
+        term_extractor.glossary_match_index = glossary_match_index
+        # In batch API mode the translation must not start before the terms are known.
+        if (
+            translation_config.term_extraction_lookahead is not None
+            and support_llm_translate
+            and not translation_config.skip_translation
+            and getattr(term_extraction_engine, "batch_collector", None) is None
+        ):
+            term_extraction_pipeline = TermExtractionPipeline(
+                term_extractor,
+                docs,
+                translation_config.term_extraction_lookahead,
+                record_token_usage=term_extraction_engine is not translate_engine,
+            )
+            term_extraction_pipeline.start()
+        else:
+            term_extractor.procress(docs)
+            raise_if_requests_deferred(term_extraction_engine)
 
     if not translation_config.skip_translation:
         if support_llm_translate:
             il_translator = ILTranslatorLLMOnly(translate_engine, translation_config)
+            il_translator.term_extraction_pipeline = term_extraction_pipeline
         else:
             il_translator = ILTranslator(translate_engine, translation_config)
+        il_translator.glossary_match_index = glossary_match_index
 
-        il_translator.translate(docs)
+        try:
+            il_translator.translate(docs)
+        except BaseException:
+            if term_extraction_pipeline is not None:
+                term_extraction_pipeline.stop()
+            raise
+        if term_extraction_pipeline is not None:
+            term_extraction_pipeline.join()
         del il_translator
+        raise_if_requests_deferred(translate_engine)
         logger.debug(f"finish ILTranslator from {temp_pdf_path}")
     else:
         logger.info("skip ILTranslator")
@@ -1247,3 +1364,4 @@ def create_cache_folder():
 
 def init():
     create_cache_folder()
+    migrate_legacy_cache()
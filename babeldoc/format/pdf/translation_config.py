@@ -16,6 +16,10 @@ from babeldoc.translator.translator import BaseTranslator
 
 logger = logging.getLogger(__name__)
 
+# Concurrent requests per worker thread in asyncio mode. Coroutines are cheap and LLM
+# requests take seconds, so more requests than threads fit within the rate limits.
+ASYNC_CONCURRENCY_PER_WORKER = 8
+
 
 class WatermarkOutputMode(enum.Enum):
     Watermarked = "watermarked"
@@ -79,6 +83,25 @@ class SharedContextCrossSplitPart:
             except Exception:
                 return False
 
+    def build_auto_extracted_glossary(
+        self, raw_terms: list[tuple[str, str]]
+    ) -> Glossary | None:
+        """Glossary of extracted term pairs, with the most frequent translation of each term."""
+        term_translations: dict[str, list[str]] = {}
+        for src, tgt in raw_terms:
+            term_translations.setdefault(src, []).append(tgt)
+
+        final_entries: list[GlossaryEntry] = []
+        for src, tgts in term_translations.items():
+            if not tgts:
+                continue
+            most_common_tgt = Counter(tgts).most_common(1)[0][0]
+            final_entries.append(GlossaryEntry(src, most_common_tgt))
+
+        if not final_entries:
+            return None
+        return Glossary(name=self.unique_name, entries=final_entries)
+
     def finalize_auto_extracted_glossary(self):
         with self._lock:
             self.auto_extracted_glossary = None
@@ -87,21 +110,9 @@ class SharedContextCrossSplitPart:
                 self.raw_extracted_terms = []
                 return
 
-            term_translations: dict[str, list[str]] = {}
-            for src, tgt in self.raw_extracted_terms:
-                term_translations.setdefault(src, []).append(tgt)
-
-            final_entries: list[GlossaryEntry] = []
-            for src, tgts in term_translations.items():
-                if not tgts:
-                    continue
-                most_common_tgt = Counter(tgts).most_common(1)[0][0]
-                final_entries.append(GlossaryEntry(src, most_common_tgt))
-
-            if final_entries:
-                self.auto_extracted_glossary = Glossary(
-                    name=self.unique_name, entries=final_entries
-                )
+            self.auto_extracted_glossary = self.build_auto_extracted_glossary(
+                self.raw_extracted_terms
+            )
 
     def get_glossaries(self) -> list[Glossary]:
         with self._lock:
@@ -200,6 +211,15 @@ class TranslationConfig:
         metadata_extra_data: str | None = None,
         term_pool_max_workers: int | None = None,
         disable_same_text_fallback: bool = False,
+        llm_streaming: bool = False,
+        prompt_prefix_caching: bool = False,
+        translation_memory_threshold: float | None = None,
+        translation_memory_reuse_threshold: float | None = None,
+        llm_batch_max_tokens: int = 200,
+        llm_batch_max_paragraphs: int = 5,
+        llm_batch_across_pages: bool = False,
+        term_extraction_lookahead: int | None = None,
+        async_max_concurrency: int | None = None,
     ):
         self.translator = translator
         self.term_extraction_translator = term_extraction_translator or translator
@@ -235,6 +255,18 @@ class TranslationConfig:
             if term_pool_max_workers is not None
             else self.pool_max_workers
         )
+        # Concurrent requests of asyncio translators, for the translation and for the
+        # automatic term extraction each.
+        self.async_max_concurrency = (
+            async_max_concurrency
+            if async_max_concurrency is not None
+            else self.pool_max_workers * ASYNC_CONCURRENCY_PER_WORKER
+        )
+        self.term_async_max_concurrency = (
+            async_max_concurrency
+            if async_max_concurrency is not None
+            else self.term_pool_max_workers * ASYNC_CONCURRENCY_PER_WORKER
+        )
         self.split_short_lines = split_short_lines
 
         self.short_line_split_factor = short_line_split_factor
@@ -354,8 +386,27 @@ class TranslationConfig:
             "prompt_tokens": 0,
             "completion_tokens": 0,
             "cache_hit_prompt_tokens": 0,
+            "cache_miss_prompt_tokens": 0,
         }
         self.disable_same_text_fallback = disable_same_text_fallback
+        # Stream LLM batch output and apply each paragraph as soon as it is complete.
+        self.llm_streaming = llm_streaming
+        # Lay out LLM batch prompts with a byte-stable prefix for provider-side prompt caching.
+        self.prompt_prefix_caching = prompt_prefix_caching
+        # Fuzzy translation memory over the paragraph cache: near matches at or above
+        # the threshold are given to the LLM as hints, None disables the lookup.
+        self.translation_memory_threshold = translation_memory_threshold
+        # Near matches at or above this similarity are reused without a request.
+        self.translation_memory_reuse_threshold = translation_memory_reuse_threshold
+        # An LLM batch is closed once it holds more than this many tokens or paragraphs,
+        # see ParagraphPacker. Across pages, sparse pages share batches.
+        self.llm_batch_max_tokens = llm_batch_max_tokens
+        self.llm_batch_max_paragraphs = llm_batch_max_paragraphs
+        self.llm_batch_across_pages = llm_batch_across_pages
+        # Extract terms concurrently with the translation, which translates a page once
+        # the terms of this many following pages are known. None extracts the terms of
+        # the whole document first.
+        self.term_extraction_lookahead = term_extraction_lookahead
 
         if self.ocr_workaround:
             self.remove_non_formula_lines = False
@@ -472,6 +523,7 @@ class TranslationConfig:
         prompt_tokens: int,
         completion_tokens: int,
         cache_hit_prompt_tokens: int,
+        cache_miss_prompt_tokens: int = 0,
     ) -> None:
         """Accumulate token usage for automatic term extraction."""
         if total_tokens > 0:
@@ -484,6 +536,10 @@ class TranslationConfig:
             self.term_extraction_token_usage["cache_hit_prompt_tokens"] += (
                 cache_hit_prompt_tokens
             )
+        if cache_miss_prompt_tokens > 0:
+            self.term_extraction_token_usage["cache_miss_prompt_tokens"] += (
+                cache_miss_prompt_tokens
+            )
 
 
 class TranslateResult:
@@ -3,7 +3,10 @@ import io
 import itertools
 import logging
 import re
+import threading
 import time
+import weakref
+from collections.abc import Iterable
 from pathlib import Path
 
 import chardet
@@ -54,6 +57,9 @@ class Glossary:
         self.normalized_lookup: dict[str, tuple[str, str]] = {}
         self.id_lookup: list[tuple[str, str]] = []
         self.hs_dbs: list[hyperscan.Database] | None = None
+        # Scratch space of every database, per thread: a scratch cannot be shared by
+        # concurrent scans, and allocating one per scan is costly for large databases.
+        self._local = threading.local()
         self._build_regex_and_lookup()
 
     @staticmethod
@@ -190,6 +196,15 @@ class Glossary:
     def __repr__(self):
         return f"Glossary(name='{self.name}', num_entries={len(self.entries)})"
 
+    def _get_scratch(self, index: int) -> hyperscan.Scratch:
+        scratches = getattr(self._local, "scratches", None)
+        if scratches is None:
+            scratches = self._local.scratches = {}
+        scratch = scratches.get(index)
+        if scratch is None:
+            scratch = scratches[index] = hyperscan.Scratch(self.hs_dbs[index])
+        return scratch
+
     def get_active_entries_for_text(self, text: str) -> list[tuple[str, str]]:
         """Returns a list of (original_source, target_text) tuples for terms found in the given text."""
         if not self.hs_dbs or not text:
@@ -207,8 +222,71 @@ class Glossary:
             active_entries.append(self.id_lookup[idx])
             return False
 
-        for hs_db in self.hs_dbs:
+        data = text.encode("utf-8")
+        for index, hs_db in enumerate(self.hs_dbs):
             # Scan the text with the hyperscan database
-            scratch = hyperscan.Scratch(hs_db)
-            hs_db.scan(text.encode("utf-8"), on_match, scratch=scratch)
+            hs_db.scan(data, on_match, scratch=self._get_scratch(index))
         return active_entries
+
+
+class GlossaryMatchIndex:
+    """
+    Active glossary entries of the paragraphs of a document, by paragraph id.
+
+    Term extraction, the translation prompts and the paragraph cache keys all need the
+    glossary entries of the same paragraphs. :meth:`index_document` scans every
+    paragraph once per glossary, and lookups of several paragraphs merge their entries
+    instead of scanning the joined text again. Paragraphs or glossaries that were not
+    indexed, e.g. glossaries built during the translation, are scanned on first lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: weakref.WeakKeyDictionary[
+            Glossary, dict[str, list[tuple[str, str]]]
+        ] = weakref.WeakKeyDictionary()
+        self.scan_count = 0
+
+    def index_document(self, doc, glossaries: Iterable[Glossary]):
+        """Scan every paragraph of ``doc`` for the entries of ``glossaries``."""
+        start = time.time()
+        scan_count = self.scan_count
+        for glossary in glossaries:
+            for page in doc.page:
+                for paragraph in page.pdf_paragraph:
+                    if paragraph.debug_id is not None and paragraph.unicode:
+                        self._get_paragraph_entries(glossary, paragraph)
+        logger.debug(
+            f"indexed {self.scan_count - scan_count} paragraph glossary matches "
+            f"in {time.time() - start:.2f} seconds"
+        )
+
+    def _get_paragraph_entries(self, glossary: Glossary, paragraph):
+        if paragraph.debug_id is None:
+            return glossary.get_active_entries_for_text(paragraph.unicode)
+        with self._lock:
+            paragraph_entries = self._entries.get(glossary)
+            if paragraph_entries is None:
+                paragraph_entries = self._entries[glossary] = {}
+            entries = paragraph_entries.get(paragraph.debug_id)
+        if entries is None:
+            entries = glossary.get_active_entries_for_text(paragraph.unicode)
+            with self._lock:
+                paragraph_entries[paragraph.debug_id] = entries
+                self.scan_count += 1
+        return entries
+
+    def get_active_entries(
+        self, paragraphs: Iterable, glossaries: Iterable[Glossary]
+    ) -> dict[str, list[tuple[str, str]]]:
+        """Sorted (original_source, target_text) entries found in any of
+        ``paragraphs``, by glossary name."""
+        paragraphs = list(paragraphs)
+        entries_per_glossary = {}
+        for glossary in glossaries:
+            active_entries = set()
+            for paragraph in paragraphs:
+                active_entries.update(self._get_paragraph_entries(glossary, paragraph))
+            if active_entries:
+                entries_per_glossary[glossary.name] = sorted(active_entries)
+        return entries_per_glossary
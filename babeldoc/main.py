@@ -1,4 +1,5 @@
 import asyncio
+import json
 import logging
 import multiprocessing as mp
 import queue
@@ -22,8 +23,19 @@ from babeldoc.const import enable_process_pool
 from babeldoc.format.pdf.translation_config import TranslationConfig
 from babeldoc.format.pdf.translation_config import WatermarkOutputMode
 from babeldoc.glossary import Glossary
+from babeldoc.translator.batch import LocalFilesystemBatchBackend
+from babeldoc.translator.batch import OpenAIBatchBackend
+from babeldoc.translator.cache import compress_cache_entries
+from babeldoc.translator.cache import configure_cache_compression
+from babeldoc.translator.cache import configure_cache_eviction
+from babeldoc.translator.cache import configure_memory_cache
+from babeldoc.translator.cache import export_cache
+from babeldoc.translator.cache import get_memory_cache_stats
+from babeldoc.translator.cache import import_cache
+from babeldoc.translator.translator import AsyncOpenAITranslator
 from babeldoc.translator.translator import OpenAITranslator
-from babeldoc.translator.translator import set_translate_rate_limiter
+from babeldoc.utils.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from babeldoc.utils.hedging import HedgingPolicy
 
 logger = logging.getLogger(__name__)
 __version__ = "0.5.23"
@@ -97,6 +109,28 @@ def create_parser():
         default=None,
         help="Restore offline assets package from the specified file",
     )
+    parser.add_argument(
+        "--export-cache",
+        default=None,
+        help="Export the translation cache to the specified zstd-compressed archive, then exit",
+    )
+    parser.add_argument(
+        "--import-cache",
+        default=None,
+        help="Merge the translation cache archive written by --export-cache, then exit",
+    )
+    parser.add_argument(
+        "--import-cache-conflict",
+        choices=["keep", "replace", "newer"],
+        default="keep",
+        help="Entries of --import-cache already in the cache: keep the local translation, replace it, or keep the most recently used one. (default: keep)",
+    )
+    parser.add_argument(
+        "--compress-cache",
+        action="store_true",
+        default=False,
+        help="Compress the stored translation cache entries of at least --cache-compress-min-bytes (default 1024) bytes in place and release the free pages, then exit",
+    )
     parser.add_argument(
         "--working-dir",
         default=None,
@@ -152,11 +186,101 @@ def create_parser():
         default=4,
         help="QPS limit of translation service",
     )
+    translation_group.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Tokens-per-minute limit of translation service. Not limited by default.",
+    )
+    translation_group.add_argument(
+        "--rate-limit-burst",
+        type=int,
+        default=1,
+        help="Number of requests that may be sent back to back before the QPS limit applies.",
+    )
+    translation_group.add_argument(
+        "--llm-streaming",
+        action="store_true",
+        default=False,
+        help="Stream the LLM output of paragraph batches and apply each paragraph as soon as it is complete. Paragraphs received before a stream is cut off are kept.",
+    )
+    translation_group.add_argument(
+        "--prompt-prefix-caching",
+        action="store_true",
+        default=False,
+        help="Lay out LLM batch prompts for provider-side prompt caching: instructions, output format and the glossary terms of the whole document form a prefix that is identical for every batch, the title context and the paragraphs come last.",
+    )
+    translation_group.add_argument(
+        "--translation-memory-threshold",
+        type=float,
+        default=None,
+        help="Look up paragraphs missing from the cache in a fuzzy translation memory built from earlier translations, e.g. of a previous revision of the document. Translations of paragraphs at least this similar (0-1, e.g. 0.85) are given to the LLM as reference. Disabled by default.",
+    )
+    translation_group.add_argument(
+        "--translation-memory-reuse-threshold",
+        type=float,
+        default=None,
+        help="Reuse the translation of a translation memory match at least this similar (0-1, e.g. 0.97) without sending a request, if both texts have the same numbers and placeholders. Requires --translation-memory-threshold. Disabled by default.",
+    )
+    translation_group.add_argument(
+        "--llm-batch-max-tokens",
+        type=int,
+        default=200,
+        help="An LLM paragraph batch is closed once it holds more than this many tokens. (default: 200)",
+    )
+    translation_group.add_argument(
+        "--llm-batch-max-paragraphs",
+        type=int,
+        default=5,
+        help="An LLM paragraph batch is closed once it holds more than this many paragraphs. (default: 5)",
+    )
+    translation_group.add_argument(
+        "--llm-batch-across-pages",
+        action="store_true",
+        default=False,
+        help="Let LLM paragraph batches continue on the next page, and pack paragraphs split across pages or columns with their neighbours. Sparse pages such as slides then need far fewer requests.",
+    )
+    translation_group.add_argument(
+        "--batch-api-dir",
+        type=str,
+        default=None,
+        help="Send LLM requests through a batch API instead of one by one. Requests missing from the translation cache are written to JSONL files and submitted as batches, the job state is kept in this directory. Run the same command again to collect the results and continue; the output is written once every request is answered. Cannot be combined with --ignore-cache.",
+    )
+    translation_group.add_argument(
+        "--batch-api-backend",
+        choices=["openai", "local"],
+        default="openai",
+        help="Batch API used by --batch-api-dir. 'local' only writes the batches to <batch-api-dir>/batches, for testing or for running them with another tool. (default: openai)",
+    )
     translation_group.add_argument(
         "--ignore-cache",
         action="store_true",
         help="Ignore translation cache.",
     )
+    translation_group.add_argument(
+        "--memory-cache-max-entries",
+        type=int,
+        default=None,
+        help="Maximum number of translations kept in the in-process cache in front of the SQLite cache. 0 disables the in-process cache. (default: 20000)",
+    )
+    translation_group.add_argument(
+        "--memory-cache-max-mb",
+        type=float,
+        default=None,
+        help="Maximum size in MiB of the in-process translation cache. 0 disables the in-process cache. (default: 64)",
+    )
+    translation_group.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=None,
+        help="Size budget in MiB of the on-disk translation cache. Least recently used entries are evicted in the background once it is exceeded. 0 disables eviction. (default: 256)",
+    )
+    translation_group.add_argument(
+        "--cache-compress-min-bytes",
+        type=int,
+        default=None,
+        help="Store texts of at least this many bytes zstd-compressed in the translation cache. 0 disables compression. (default: 0)",
+    )
     translation_group.add_argument(
         "--no-dual",
         action="store_true",
@@ -291,6 +415,30 @@ def create_parser():
         type=int,
         help="Maximum number of worker threads dedicated to automatic term extraction. If not specified, defaults to --pool-max-workers (or QPS value when unset).",
     )
+    translation_group.add_argument(
+        "--adaptive-concurrency-max",
+        type=int,
+        default=None,
+        help="Enable adaptive concurrency: the number of in-flight requests per translator starts at --pool-max-workers and is adjusted at runtime from request latency and rate limit errors, up to this value. Worker pools are enlarged to this value.",
+    )
+    translation_group.add_argument(
+        "--llm-hedge-percentile",
+        type=float,
+        default=None,
+        help="Enable hedged LLM requests: a request still running after this percentile (e.g. 95) of the recently observed latencies is sent again, possibly to another endpoint, and the first answer wins. Streamed requests are not hedged.",
+    )
+    translation_group.add_argument(
+        "--llm-hedge-max-ratio",
+        type=float,
+        default=0.05,
+        help="Maximum share of requests that may be hedged. (default: 0.05)",
+    )
+    translation_group.add_argument(
+        "--term-extraction-lookahead",
+        type=int,
+        default=None,
+        help="Extract terms while translating instead of before: a page is translated once the terms of the next N pages are extracted, and the glossary grows as terms arrive. Each page always sees the terms of the same pages, so the output does not depend on timing. Not used in batch API mode.",
+    )
     translation_group.add_argument(
         "--no-auto-extract-glossary",
         action="store_false",
@@ -409,6 +557,12 @@ def create_parser():
         "-k",
         help="The API key for the OpenAI API.",
     )
+    service_group.add_argument(
+        "--openai-endpoints",
+        type=str,
+        default=None,
+        help='Additional OpenAI compatible endpoints serving the same model, as a JSON list, e.g. \'[{"base_url": "http://localhost:8000/v1", "api_key": "EMPTY", "weight": 2}]\'. Requests are balanced over --openai-base-url and these endpoints by load and latency; an endpoint failing repeatedly (rate limits, 5xx, timeouts) is skipped for a cooldown.',
+    )
     service_group.add_argument(
         "--openai-term-extraction-model",
         default=None,
@@ -454,6 +608,18 @@ def create_parser():
         default=None,
         help="Reasoning string for the OpenAI term extraction translator. If not set, no reasoning field is sent for term extraction requests.",
     )
+    service_group.add_argument(
+        "--openai-async",
+        action="store_true",
+        default=False,
+        help="Use the asyncio OpenAI client for LLM paragraph translation and automatic term extraction, so in-flight requests are not bound to worker threads. Concurrent requests are limited by --async-max-concurrency.",
+    )
+    service_group.add_argument(
+        "--async-max-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent requests with --openai-async, for paragraph translation and automatic term extraction each. (default: 8 times --pool-max-workers and --term-pool-max-workers)",
+    )
 
     return parser
 
@@ -479,6 +645,21 @@ async def main():
         logger.info("Offline assets package restored, exiting...")
         return
 
+    if args.cache_compress_min_bytes is not None:
+        configure_cache_compression(args.cache_compress_min_bytes)
+
+    if args.export_cache or args.import_cache or args.compress_cache:
+        if args.import_cache:
+            import_cache(Path(args.import_cache), args.import_cache_conflict)
+        if args.compress_cache:
+            if args.cache_compress_min_bytes is None:
+                configure_cache_compression(1024)
+            compress_cache_entries()
+        if args.export_cache:
+            export_cache(Path(args.export_cache))
+        logger.info("Translation cache tooling completed, exiting...")
+        return
+
     if args.warmup:
         babeldoc.assets.assets.warmup()
         logger.info("Warmup completed, exiting...")
@@ -492,15 +673,63 @@ async def main():
     if args.openai and not args.openai_api_key:
         parser.error("使用 OpenAI 服务时必须提供 API key")
 
+    openai_endpoints = None
+    if args.openai_endpoints:
+        try:
+            openai_endpoints = json.loads(args.openai_endpoints)
+        except json.JSONDecodeError as e:
+            parser.error(f"--openai-endpoints 不是有效的 JSON：{e}")
+        if not isinstance(openai_endpoints, list) or not all(
+            isinstance(endpoint, dict) and endpoint.get("base_url")
+            for endpoint in openai_endpoints
+        ):
+            parser.error("--openai-endpoints 必须是包含 base_url 的对象列表")
+
+    if (
+        args.translation_memory_reuse_threshold is not None
+        and args.translation_memory_threshold is None
+    ):
+        parser.error(
+            "--translation-memory-reuse-threshold 需要同时设置 --translation-memory-threshold"
+        )
+
+    if (
+        args.term_extraction_lookahead is not None
+        and args.term_extraction_lookahead < 0
+    ):
+        parser.error("--term-extraction-lookahead 不能为负数")
+    if args.llm_batch_max_tokens < 1 or args.llm_batch_max_paragraphs < 1:
+        parser.error("--llm-batch-max-tokens 与 --llm-batch-max-paragraphs 必须大于 0")
+    if args.llm_hedge_percentile is not None and not (
+        0 < args.llm_hedge_percentile < 100
+    ):
+        parser.error("--llm-hedge-percentile 必须在 0 到 100 之间")
+    if not 0 <= args.llm_hedge_max_ratio <= 1:
+        parser.error("--llm-hedge-max-ratio 必须在 0 到 1 之间")
+
+    batch_backend = None
+    if args.batch_api_dir:
+        if args.ignore_cache:
+            parser.error("--batch-api-dir 不能与 --ignore-cache 同时使用")
+        if args.batch_api_backend == "local":
+            batch_backend = LocalFilesystemBatchBackend(
+                Path(args.batch_api_dir) / "batches"
+            )
+        else:
+            batch_backend = OpenAIBatchBackend()
+
     if args.enable_process_pool:
         enable_process_pool()
 
     # 实例化翻译器
     if args.openai:
+        translator_cls = (
+            AsyncOpenAITranslator if args.openai_async else OpenAITranslator
+        )
         translator_kwargs: dict[str, Any] = {}
         if args.openai_reasoning is not None:
             translator_kwargs["reasoning"] = args.openai_reasoning
-        translator = OpenAITranslator(
+        translator = translator_cls(
             lang_in=args.lang_in,
             lang_out=args.lang_out,
             model=args.openai_model,
@@ -510,6 +739,7 @@ async def main():
             enable_json_mode_if_requested=args.enable_json_mode_if_requested,
             send_dashscope_header=args.send_dashscope_header,
             send_temperature=not args.no_send_temperature,
+            endpoints=openai_endpoints,
             **translator_kwargs,
         )
         term_extraction_translator = translator
@@ -523,7 +753,7 @@ async def main():
                 term_translator_kwargs["reasoning"] = (
                     args.openai_term_extraction_reasoning
                 )
-            term_extraction_translator = OpenAITranslator(
+            term_extraction_translator = translator_cls(
                 lang_in=args.lang_in,
                 lang_out=args.lang_out,
                 model=args.openai_term_extraction_model or args.openai_model,
@@ -533,13 +763,59 @@ async def main():
                 enable_json_mode_if_requested=args.enable_json_mode_if_requested,
                 send_dashscope_header=args.send_dashscope_header,
                 send_temperature=not args.no_send_temperature,
+                endpoints=(
+                    None
+                    if args.openai_term_extraction_base_url
+                    or args.openai_term_extraction_api_key
+                    else openai_endpoints
+                ),
                 **term_translator_kwargs,
             )
     else:
         raise ValueError("Invalid translator type")
 
     # 设置翻译速率限制
-    set_translate_rate_limiter(args.qps)
+    translator.set_rate_limits(args.qps, args.tpm, args.rate_limit_burst)
+    if term_extraction_translator is not translator:
+        term_extraction_translator.set_rate_limits(
+            args.qps, args.tpm, args.rate_limit_burst
+        )
+    if args.adaptive_concurrency_max:
+        max_limit = args.adaptive_concurrency_max
+        initial_limit = min(args.pool_max_workers or args.qps, max_limit)
+        translator.set_concurrency_limiter(
+            AdaptiveConcurrencyLimiter(initial_limit, max_limit=max_limit)
+        )
+        if term_extraction_translator is not translator:
+            term_extraction_translator.set_concurrency_limiter(
+                AdaptiveConcurrencyLimiter(
+                    min(args.term_pool_max_workers or initial_limit, max_limit),
+                    max_limit=max_limit,
+                )
+            )
+        # The worker pools must be able to hold the largest admitted concurrency.
+        args.term_pool_max_workers = max(
+            args.term_pool_max_workers or initial_limit, max_limit
+        )
+        args.pool_max_workers = max(initial_limit, max_limit)
+    if args.llm_hedge_percentile is not None:
+        translator.set_hedging_policy(
+            HedgingPolicy(args.llm_hedge_percentile, args.llm_hedge_max_ratio)
+        )
+        if term_extraction_translator is not translator:
+            term_extraction_translator.set_hedging_policy(
+                HedgingPolicy(args.llm_hedge_percentile, args.llm_hedge_max_ratio)
+            )
+    configure_memory_cache(
+        max_entries=args.memory_cache_max_entries,
+        max_bytes=(
+            int(args.memory_cache_max_mb * 1024 * 1024)
+            if args.memory_cache_max_mb is not None
+            else None
+        ),
+    )
+    if args.cache_max_mb is not None:
+        configure_cache_eviction(max_bytes=int(args.cache_max_mb * 1024 * 1024))
     # 初始化文档布局模型
     if args.rpc_doclayout:
         from babeldoc.docvision.rpc_doclayout import RpcDocLayoutModel
@@ -670,6 +946,7 @@ async def main():
     total_term_extraction_prompt_tokens = 0
     total_term_extraction_completion_tokens = 0
     total_term_extraction_cache_hit_prompt_tokens = 0
+    total_term_extraction_cache_miss_prompt_tokens = 0
 
     for file in pending_files:
         # 清理文件路径，去除两端的引号
@@ -729,6 +1006,15 @@ async def main():
             skip_formula_offset_calculation=args.skip_formula_offset_calculation,
             metadata_extra_data=args.metadata_extra_data,
             term_pool_max_workers=args.term_pool_max_workers,
+            llm_streaming=args.llm_streaming,
+            prompt_prefix_caching=args.prompt_prefix_caching,
+            translation_memory_threshold=args.translation_memory_threshold,
+            translation_memory_reuse_threshold=args.translation_memory_reuse_threshold,
+            llm_batch_max_tokens=args.llm_batch_max_tokens,
+            llm_batch_max_paragraphs=args.llm_batch_max_paragraphs,
+            llm_batch_across_pages=args.llm_batch_across_pages,
+            term_extraction_lookahead=args.term_extraction_lookahead,
+            async_max_concurrency=args.async_max_concurrency,
         )
 
         def nop(_x):
@@ -740,6 +1026,20 @@ async def main():
             config, show_log=False
         )
 
+        if batch_backend is not None:
+            job_dir = Path(args.batch_api_dir) / Path(file).stem
+            result = await asyncio.to_thread(
+                babeldoc.format.pdf.high_level.batch_translate,
+                config,
+                batch_backend,
+                job_dir,
+            )
+            if result is None:
+                logger.info(f"批量任务未完成，请稍后重新运行：{file}")
+            else:
+                logger.info(str(result))
+            continue
+
         # 开始翻译
         with progress_context:
             async for event in babeldoc.format.pdf.high_level.async_translate(config):
@@ -760,6 +1060,9 @@ async def main():
         total_term_extraction_cache_hit_prompt_tokens += usage[
             "cache_hit_prompt_tokens"
         ]
+        total_term_extraction_cache_miss_prompt_tokens += usage[
+            "cache_miss_prompt_tokens"
+        ]
     logger.info(f"Total tokens: {translator.token_count.value}")
     logger.info(f"Prompt tokens: {translator.prompt_token_count.value}")
     logger.info(f"Completion tokens: {translator.completion_token_count.value}")
@@ -767,19 +1070,43 @@ async def main():
         f"Cache hit prompt tokens: {translator.cache_hit_prompt_token_count.value}"
     )
     logger.info(
-        "Term extraction tokens: total=%s prompt=%s completion=%s cache_hit_prompt=%s",
+        f"Cache miss prompt tokens: {translator.cache_miss_prompt_token_count.value}"
+    )
+    logger.info(
+        "Term extraction tokens: total=%s prompt=%s completion=%s cache_hit_prompt=%s cache_miss_prompt=%s",
         total_term_extraction_total_tokens,
         total_term_extraction_prompt_tokens,
         total_term_extraction_completion_tokens,
         total_term_extraction_cache_hit_prompt_tokens,
+        total_term_extraction_cache_miss_prompt_tokens,
+    )
+    if translator.concurrency_limiter is not None:
+        logger.info("Adaptive concurrency: %s", translator.concurrency_limiter.stats())
+    if translator.hedging_policy is not None:
+        logger.info(
+            "Hedged requests: %s, hedge tokens: %s",
+            translator.hedging_policy.stats(),
+            translator.hedge_token_count.value,
+        )
+    if len(translator.endpoint_pool) > 1:
+        logger.info("OpenAI endpoints: %s", translator.endpoint_pool.stats())
+    memory_cache_stats = get_memory_cache_stats()
+    logger.info(
+        "In-process translation cache: hits=%s misses=%s entries=%s bytes=%s",
+        memory_cache_stats["hits"],
+        memory_cache_stats["misses"],
+        memory_cache_stats["entries"],
+        memory_cache_stats["bytes"],
     )
     if term_extraction_translator is not translator:
         logger.info(
-            "Term extraction translator raw tokens: total=%s prompt=%s completion=%s cache_hit_prompt=%s",
+            "Term extraction translator raw tokens: total=%s prompt=%s completion=%s cache_hit_prompt=%s cache_miss_prompt=%s hedge=%s",
             term_extraction_translator.token_count.value,
             term_extraction_translator.prompt_token_count.value,
             term_extraction_translator.completion_token_count.value,
             term_extraction_translator.cache_hit_prompt_token_count.value,
+            term_extraction_translator.cache_miss_prompt_token_count.value,
+            term_extraction_translator.hedge_token_count.value,
         )
 
 
@@ -29,6 +29,10 @@ class ProgressMonitor:
         self.total_parts = total_parts
         self.raw_stages = stages
         self.part_results = {}
+        # Runtime statistics reported with progress events, shared with part monitors.
+        self.stats_providers: dict[str, Callable[[], dict]] = (
+            parent_monitor.stats_providers if parent_monitor else {}
+        )
 
         # Convert stages list to dict with name and weight
         self.stage = {}
@@ -85,6 +89,19 @@ class ProgressMonitor:
             total_parts=total_parts,
         )
 
+    def add_stats_provider(self, name: str, provider: Callable[[], dict]):
+        """Report ``provider()`` under ``name`` in the stats of progress events."""
+        self.stats_providers[name] = provider
+
+    def get_stats(self) -> dict[str, dict]:
+        stats = {}
+        for name, provider in list(self.stats_providers.items()):
+            try:
+                stats[name] = provider()
+            except Exception as e:
+                logger.debug(f"Error in stats provider {name}: {e}")
+        return stats
+
     def _handle_part_progress(self, **kwargs):
         """Handle progress updates from part monitors"""
         if self.progress_change_callback and not self.disable:
@@ -231,6 +248,7 @@ class ProgressMonitor:
                 overall_progress=self.calculate_current_progress(stage),
                 part_index=self.part_index + 1,
                 total_parts=self.total_parts,
+                **({"stats": self.get_stats()} if self.stats_providers else {}),
             )
             self.last_report_time = time.time()
 
@@ -0,0 +1,355 @@
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import uuid
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+
+from babeldoc.babeldoc_exception.BabelDOCException import BatchJobPendingError
+from babeldoc.translator.cache import flush_cache_writes
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+class BatchRequestCollector:
+    """
+    Collects the requests a translator would send for its cache misses, so that they
+    can be submitted through a batch API instead. Identical texts are collected once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict[str, tuple[str, dict]] = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._requests)
+
+    @staticmethod
+    def custom_id(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def custom_ids(self) -> list[str]:
+        with self._lock:
+            return sorted(self._requests)
+
+    def add(self, text: str, body: dict) -> str:
+        custom_id = self.custom_id(text)
+        with self._lock:
+            self._requests.setdefault(custom_id, (text, body))
+        return custom_id
+
+    def write(self, request_file: Path, index_file: Path):
+        """
+        Write the batch input file, one request per line, and the index mapping the
+        ``custom_id`` of every request back to the text that is the cache key.
+        """
+        with self._lock:
+            requests = dict(self._requests)
+        with request_file.open("w", encoding="utf-8") as f:
+            for custom_id, (_text, body) in requests.items():
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": body,
+                }
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        index = {custom_id: text for custom_id, (text, _body) in requests.items()}
+        index_file.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+
+
+class BatchBackend(ABC):
+    """
+    A service running batches of chat completion requests, e.g. the OpenAI Batch API.
+
+    Every method receives the translator the batch belongs to, so that one backend can
+    serve translators with different endpoints.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def submit(self, request_file: Path, translator) -> str:
+        """Submit a JSONL request file and return the id of the batch."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_complete(self, batch_id: str, translator) -> bool:
+        """Whether the results of a batch are available."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def fetch_results(self, batch_id: str, translator) -> list[dict]:
+        """Output lines of a completed batch, in the format of the OpenAI Batch API."""
+        raise NotImplementedError
+
+
+class LocalFilesystemBatchBackend(BatchBackend):
+    """
+    Stand-in backend keeping every batch in a directory under ``root``.
+
+    A batch is complete once ``output.jsonl`` exists in its directory. The output is
+    written by :meth:`complete`, right at submission if a ``responder`` is given.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path, responder: Callable[[dict], str] | None = None):
+        self.root = Path(root)
+        self.responder = responder
+
+    def _batch_dir(self, batch_id: str) -> Path:
+        return self.root / batch_id
+
+    def submit(self, request_file: Path, translator=None) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch_dir = self._batch_dir(batch_id)
+        batch_dir.mkdir(parents=True)
+        shutil.copyfile(request_file, batch_dir / "input.jsonl")
+        if self.responder is not None:
+            self.complete(batch_id, self.responder)
+        return batch_id
+
+    def complete(self, batch_id: str, responder: Callable[[dict], str]):
+        """Answer every request of a batch with ``responder(body)``."""
+        batch_dir = self._batch_dir(batch_id)
+        lines = []
+        with (batch_dir / "input.jsonl").open(encoding="utf-8") as f:
+            for line in f:
+                request = json.loads(line)
+                try:
+                    content = responder(request["body"])
+                except Exception as e:
+                    lines.append(
+                        {
+                            "custom_id": request["custom_id"],
+                            "response": None,
+                            "error": {"message": str(e)},
+                        }
+                    )
+                    continue
+                lines.append(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {
+                                "choices": [
+                                    {
+                                        "index": 0,
+                                        "message": {
+                                            "role": "assistant",
+                                            "content": content,
+                                        },
+                                    }
+                                ]
+                            },
+                        },
+                        "error": None,
+                    }
+                )
+        output_file = batch_dir / "output.jsonl"
+        tmp_file = output_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        tmp_file.replace(output_file)
+
+    def is_complete(self, batch_id: str, translator=None) -> bool:
+        return (self._batch_dir(batch_id) / "output.jsonl").exists()
+
+    def fetch_results(self, batch_id: str, translator=None) -> list[dict]:
+        with (self._batch_dir(batch_id) / "output.jsonl").open(encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """The OpenAI Batch API, using the client of the primary endpoint of the translator."""
+
+    name = "openai"
+
+    def __init__(self, completion_window: str = "24h"):
+        self.completion_window = completion_window
+
+    def submit(self, request_file: Path, translator) -> str:
+        with request_file.open("rb") as f:
+            input_file = translator.client.files.create(file=f, purpose="batch")
+        batch = translator.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def is_complete(self, batch_id: str, translator) -> bool:
+        batch = translator.client.batches.retrieve(batch_id)
+        if batch.status == "failed":
+            raise RuntimeError(f"batch {batch_id} failed: {batch.errors}")
+        # Expired and cancelled batches keep the results of the finished requests,
+        # the others are collected again by the next round.
+        return batch.status in ("completed", "expired", "cancelled")
+
+    def fetch_results(self, batch_id: str, translator) -> list[dict]:
+        batch = translator.client.batches.retrieve(batch_id)
+        results = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = translator.client.files.content(file_id).text
+            results.extend(json.loads(line) for line in content.splitlines() if line)
+        return results
+
+
+def get_result_content(result: dict) -> str | None:
+    """Message content of a batch output line, None for failed requests."""
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code") != 200:
+        return None
+    try:
+        return response["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def raise_if_requests_deferred(*translators):
+    """Stop the pipeline after a stage that deferred requests to a batch."""
+    collectors = {
+        id(collector): collector
+        for translator in translators
+        if (collector := getattr(translator, "batch_collector", None)) is not None
+    }
+    deferred_count = sum(len(collector) for collector in collectors.values())
+    if deferred_count:
+        raise BatchJobPendingError(
+            f"{deferred_count} requests deferred to the batch API", deferred_count
+        )
+
+
+class BatchJob:
+    """
+    Persistent state of a translation driven through a batch API.
+
+    A job runs in rounds. Each round replays the pipeline with the translation cache:
+    requests missing from the cache are collected and submitted as batches, and the
+    pipeline stops after the stage that needed them. Once the batches are complete
+    their results are written to the cache and the next round gets further, until a
+    round runs through without a cache miss. Later stages depend on the output of
+    earlier ones (e.g. translation prompts contain the extracted glossary), so a
+    document usually takes a round for term extraction, one for translation and one for
+    the paragraphs that fell back to single requests. A round that would submit exactly
+    the requests of the previous one makes no progress and fails the job.
+
+    The state lives in ``job_dir/state.json``, every step can run in a new process.
+    """
+
+    def __init__(self, job_dir: Path, backend: BatchBackend):
+        self.job_dir = Path(job_dir)
+        self.backend = backend
+        self.state_file = self.job_dir / "state.json"
+        if self.state_file.exists():
+            self.state = json.loads(self.state_file.read_text(encoding="utf-8"))
+        else:
+            self.state = {
+                "round": 0,
+                "submissions": [],
+                "last_requests": None,
+                "done": False,
+            }
+
+    @property
+    def round(self) -> int:
+        return self.state["round"]
+
+    @property
+    def done(self) -> bool:
+        return self.state["done"]
+
+    def save(self):
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+        tmp_file.replace(self.state_file)
+
+    def collect_results(self, translators: dict) -> bool:
+        """
+        Write the results of the submitted batches to the translation caches.
+        :param translators: translators by role, as used for :meth:`submit`
+        :return: False while a batch is still running
+        """
+        submissions = self.state["submissions"]
+        for submission in submissions:
+            translator = translators[submission["role"]]
+            if not self.backend.is_complete(submission["batch_id"], translator):
+                logger.info(f"Batch {submission['batch_id']} is still running")
+                return False
+
+        for submission in submissions:
+            translator = translators[submission["role"]]
+            index = json.loads(
+                Path(submission["index_file"]).read_text(encoding="utf-8")
+            )
+            applied = 0
+            for result in self.backend.fetch_results(
+                submission["batch_id"], translator
+            ):
+                text = index.get(result.get("custom_id"))
+                content = get_result_content(result)
+                if text is None or content is None:
+                    continue
+                translator.cache.set(text, content.strip())
+                applied += 1
+            logger.info(
+                f"Batch {submission['batch_id']}: {applied} of {len(index)} "
+                "requests answered"
+            )
+        flush_cache_writes()
+        self.state["submissions"] = []
+        self.save()
+        return True
+
+    def submit(self, collectors: dict, translators: dict):
+        """Submit the requests collected in this round, one batch per translator."""
+        requests = hashlib.sha256()
+        for role, collector in sorted(collectors.items()):
+            requests.update(role.encode())
+            for custom_id in collector.custom_ids():
+                requests.update(custom_id.encode())
+        requests = requests.hexdigest()
+        if requests == self.state["last_requests"]:
+            raise RuntimeError(
+                f"Batch job {self.job_dir} makes no progress, the requests of round "
+                f"{self.round} were not answered"
+            )
+        self.state["last_requests"] = requests
+        self.state["round"] += 1
+        round_dir = self.job_dir / f"round-{self.round}"
+        round_dir.mkdir(parents=True, exist_ok=True)
+        for role, collector in collectors.items():
+            if not len(collector):
+                continue
+            request_file = round_dir / f"{role}.requests.jsonl"
+            index_file = round_dir / f"{role}.index.json"
+            collector.write(request_file, index_file)
+            batch_id = self.backend.submit(request_file, translators[role])
+            logger.info(
+                f"Submitted {len(collector)} {role} requests as batch {batch_id}"
+            )
+            self.state["submissions"].append(
+                {
+                    "role": role,
+                    "batch_id": batch_id,
+                    "index_file": str(index_file),
+                }
+            )
+        self.save()
+
+    def finish(self):
+        self.state["done"] = True
+        self.save()
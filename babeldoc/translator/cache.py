@@ -1,13 +1,22 @@
+import atexit
+import hashlib
 import json
 import logging
-import random
+import os
+import queue
+import sys
 import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 import peewee
+import pyzstd
 from peewee import SQL
 from peewee import AutoField
+from peewee import BlobField
 from peewee import CharField
+from peewee import IntegerField
 from peewee import Model
 from peewee import SqliteDatabase
 from peewee import TextField
@@ -20,37 +29,266 @@ logger = logging.getLogger(__name__)
 # we don't init the database here
 db = SqliteDatabase(None)
 
-# Cleanup configuration
-CLEAN_PROBABILITY = 0.001  # 0.1% chance to trigger cleanup
-MAX_CACHE_ROWS = 50_000  # Keep only the latest 50,000 rows
+# Eviction configuration: when the texts stored in the cache exceed MAX_CACHE_BYTES,
+# the least recently used rows are deleted until EVICTION_TARGET_RATIO of the budget is used
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+EVICTION_TARGET_RATIO = 0.9
+# Seconds between two background maintenance runs (eviction + incremental vacuum)
+MAINTENANCE_INTERVAL = 600
+# Delay before the first maintenance run after the cache is used
+MAINTENANCE_INITIAL_DELAY = 30
+# Rows deleted per statement during eviction
+EVICTION_BATCH_SIZE = 500
 
-# Thread-level mutex to ensure only one cleanup runs at a time within the process
-_cleanup_lock = threading.Lock()
+# Thread-level mutex to ensure only one maintenance run at a time within the process
+_maintenance_lock = threading.Lock()
 
+# Size in bytes of the blake2b digests used as cache keys
+KEY_DIGEST_SIZE = 16
+
+# Number of rows copied per transaction when migrating cache.v1.db
+MIGRATION_BATCH_SIZE = 1000
+# Seconds after which the lock of a migration is considered left over by a crashed process
+MIGRATION_LOCK_TIMEOUT = 3600
+
+# Write-behind configuration: pending writes are committed in one transaction
+# every WRITE_BATCH_SIZE rows or WRITE_FLUSH_INTERVAL seconds, whichever comes first
+WRITE_BATCH_SIZE = 200
+WRITE_FLUSH_INTERVAL = 0.2
+# Attempts to commit a batch while the database is locked by another process
+WRITE_MAX_ATTEMPTS = 10
+
+# Maximum number of texts resolved by a single ``IN (...)`` query in get_many
+PREFETCH_CHUNK_SIZE = 500
+
+# Texts of at least COMPRESS_MIN_BYTES UTF-8 bytes are stored zstd-compressed,
+# 0 stores every text as is
+COMPRESS_MIN_BYTES = 0
+COMPRESS_LEVEL = 9
+
+# Format of the archives written by export_cache
+EXPORT_FORMAT = "babeldoc-translation-cache"
+EXPORT_FORMAT_VERSION = 1
+# Rows read or written per transaction by export_cache, import_cache and
+# compress_cache_entries
+TRANSFER_BATCH_SIZE = 1000
+
+# In-process LRU configuration, setting either bound to 0 disables the LRU
+MEMORY_CACHE_MAX_ENTRIES = 20_000
+MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _MemoryCache:
+    """Thread-safe LRU kept in front of the SQLite table.
+
+    Keys are the key digests of the SQLite rows.
+    The size of an entry is approximated by ``sys.getsizeof`` of its key and translation.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self._lock = threading.Lock()
+        self._data: OrderedDict[bytes, tuple[str, int]] = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries != 0 and self.max_bytes != 0
+
+    def get(
+        self, key: bytes, count: bool = True, count_miss: bool = True
+    ) -> str | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                if count and count_miss:
+                    self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if count:
+                self.hits += 1
+            return item[0]
+
+    def put(self, key: bytes, translation: str):
+        if not self.enabled:
+            return
+        size = sys.getsizeof(key) + sys.getsizeof(translation)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._data[key] = (translation, size)
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._data and (
+            (self.max_entries > 0 and len(self._data) > self.max_entries)
+            or (self.max_bytes > 0 and self.total_bytes > self.max_bytes)
+        ):
+            _, (_, size) = self._data.popitem(last=False)
+            self.total_bytes -= size
+
+    def configure(self, max_entries: int | None = None, max_bytes: int | None = None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if not self.enabled:
+                self._data.clear()
+                self.total_bytes = 0
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._data),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_memory_cache = _MemoryCache(MEMORY_CACHE_MAX_ENTRIES, MEMORY_CACHE_MAX_BYTES)
+
+
+def configure_memory_cache(
+    max_entries: int | None = None, max_bytes: int | None = None
+) -> None:
+    """Resize the in-process LRU. ``None`` keeps the current bound,
+    setting either bound to 0 disables the LRU."""
+    _memory_cache.configure(max_entries=max_entries, max_bytes=max_bytes)
+
+
+def get_memory_cache_stats() -> dict:
+    """Return hit/miss counters and current size of the in-process LRU."""
+    return _memory_cache.stats()
+
+
+class _CompressibleTextField(TextField):
+    """Text column whose values may be stored as zstd-compressed UTF-8 blobs."""
+
+    def db_value(self, value):
+        if isinstance(value, bytes):
+            return value
+        return super().db_value(value)
+
+    def python_value(self, value):
+        if isinstance(value, bytes | memoryview):
+            return pyzstd.decompress(bytes(value)).decode("utf-8", "surrogatepass")
+        return super().python_value(value)
+
+
+def _compress_text(text: str) -> str | bytes:
+    """The value stored for ``text``, compressed if it is large enough."""
+    if COMPRESS_MIN_BYTES <= 0:
+        return text
+    data = text.encode("utf-8", "surrogatepass")
+    if len(data) < COMPRESS_MIN_BYTES:
+        return text
+    compressed = pyzstd.compress(data, COMPRESS_LEVEL)
+    return compressed if len(compressed) < len(data) else text
+
+
+def _stored_size(value: str | bytes) -> int:
+    if isinstance(value, bytes):
+        return len(value)
+    return len(value.encode("utf-8", "surrogatepass"))
+
+
+class _TranslationCacheParams(Model):
+    """Distinct (engine, params) pairs, referenced by id from the cache rows."""
 
-class _TranslationCache(Model):
     id = AutoField()
+    params_digest = BlobField(unique=True)
     translate_engine = CharField(max_length=20)
     translate_engine_params = TextField()
-    original_text = TextField()
-    translation = TextField()
 
     class Meta:
         database = db
+        table_name = "translation_cache_params"
+
+
+class _TranslationCache(Model):
+    id = AutoField()
+    # blake2b digest of (translate_engine, translate_engine_params, original_text)
+    key_digest = BlobField()
+    params_id = IntegerField()
+    original_text = _CompressibleTextField()
+    translation = _CompressibleTextField()
+    # Unix time of the last read or write, used for LRU eviction
+    last_access = IntegerField(default=0, index=True)
+    # Stored size of original_text + translation, i.e. after compression
+    size = IntegerField(default=0)
+
+    class Meta:
+        database = db
+        table_name = "translation_cache"
         constraints = [
-            SQL(
-                """
-            UNIQUE (
-                translate_engine,
-                translate_engine_params,
-                original_text
-                )
-            ON CONFLICT REPLACE
-            """,
-            ),
+            SQL("UNIQUE (key_digest) ON CONFLICT REPLACE"),
         ]
 
 
+class _TranslationCacheMeta(Model):
+    """Counters of the cache table, kept up to date by triggers."""
+
+    key = CharField(primary_key=True)
+    value = IntegerField(default=0)
+
+    class Meta:
+        database = db
+        table_name = "translation_cache_meta"
+
+
+# Keep the running sum of _TranslationCache.size in _TranslationCacheMeta, so that
+# eviction never scans the whole table. Rows replaced on a key_digest conflict only
+# fire the delete trigger with recursive_triggers enabled.
+_TOTAL_BYTES_KEY = "total_bytes"
+_TOTAL_BYTES_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS translation_cache_size_insert
+    AFTER INSERT ON translation_cache BEGIN
+        UPDATE translation_cache_meta SET value = value + NEW.size
+        WHERE key = 'total_bytes';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS translation_cache_size_delete
+    AFTER DELETE ON translation_cache BEGIN
+        UPDATE translation_cache_meta SET value = value - OLD.size
+        WHERE key = 'total_bytes';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS translation_cache_size_update
+    AFTER UPDATE OF size ON translation_cache BEGIN
+        UPDATE translation_cache_meta SET value = value + NEW.size - OLD.size
+        WHERE key = 'total_bytes';
+    END""",
+)
+
+
+class _TranslationCacheV1(Model):
+    """Schema of cache.v1.db, only used to migrate old entries."""
+
+    id = AutoField()
+    translate_engine = CharField(max_length=20)
+    translate_engine_params = TextField()
+    original_text = TextField()
+    translation = TextField()
+
+    class Meta:
+        table_name = "_translationcache"
+
+
 class TranslationCache:
     @staticmethod
     def _sort_dict_recursively(obj):
@@ -77,6 +315,9 @@ class TranslationCache:
         self.params = params
         params = self._sort_dict_recursively(params)
         self.translate_engine_params = json.dumps(params)
+        self._key_hasher = _params_hasher(
+            self.translate_engine, self.translate_engine_params
+        )
 
     def update_params(self, params: dict = None):
         if params is None:
@@ -88,19 +329,28 @@ class TranslationCache:
         self.params[k] = v
         self.replace_params(self.params)
 
+    def _key_digest(self, original_text: str) -> bytes:
+        hasher = self._key_hasher.copy()
+        hasher.update(original_text.encode("utf-8", "surrogatepass"))
+        return hasher.digest()
+
     # Since peewee and the underlying sqlite are thread-safe,
     # get and set operations don't need locks.
     def get(self, original_text: str) -> str | None:
+        key_digest = self._key_digest(original_text)
+        translation = _memory_cache.get(key_digest)
+        if translation is not None:
+            _cache_writer.touch(key_digest)
+            return translation
         try:
             result = _TranslationCache.get_or_none(
-                translate_engine=self.translate_engine,
-                translate_engine_params=self.translate_engine_params,
-                original_text=original_text,
+                _TranslationCache.key_digest == key_digest
             )
-            # Trigger cache cleanup with a small probability.
-            if result and random.random() < CLEAN_PROBABILITY:  # noqa: S311
-                self._cleanup()
-            return result.translation if result else None
+            if result is None or result.original_text != original_text:
+                return None
+            _memory_cache.put(key_digest, result.translation)
+            _cache_writer.touch(key_digest)
+            return result.translation
         except peewee.OperationalError as e:
             if "database is locked" in str(e):
                 logger.debug("Cache is locked")
@@ -108,58 +358,781 @@ class TranslationCache:
             else:
                 raise
 
+    def get_from_memory(self, original_text: str) -> str | None:
+        """The translation held by the in-process LRU, without touching SQLite.
+
+        A miss is not counted, the caller is expected to fall back to :meth:`get`.
+        """
+        key_digest = self._key_digest(original_text)
+        translation = _memory_cache.get(key_digest, count_miss=False)
+        if translation is not None:
+            _cache_writer.touch(key_digest)
+        return translation
+
+    def get_many(self, original_texts) -> dict[str, str]:
+        """Resolve many texts at once.
+
+        Texts not held by the in-process LRU are looked up with batched ``IN (...)``
+        queries and the hits are added to the LRU, so the following ``get`` calls
+        are served from memory. Lookups made here are not counted as LRU hits or misses.
+
+        Returns:
+            Mapping of original text to translation for every cache hit.
+        """
+        results = {}
+        missing = {}
+        for original_text in dict.fromkeys(original_texts):
+            key_digest = self._key_digest(original_text)
+            translation = _memory_cache.get(key_digest, count=False)
+            if translation is None:
+                missing[key_digest] = original_text
+            else:
+                _cache_writer.touch(key_digest)
+                results[original_text] = translation
+        missing_digests = list(missing)
+        try:
+            for i in range(0, len(missing_digests), PREFETCH_CHUNK_SIZE):
+                chunk = missing_digests[i : i + PREFETCH_CHUNK_SIZE]
+                query = _TranslationCache.select(
+                    _TranslationCache.key_digest,
+                    _TranslationCache.original_text,
+                    _TranslationCache.translation,
+                ).where(_TranslationCache.key_digest.in_(chunk))
+                for key_digest, original_text, translation in query.tuples():
+                    key_digest = bytes(key_digest)
+                    if missing.get(key_digest) != original_text:
+                        continue
+                    _memory_cache.put(key_digest, translation)
+                    _cache_writer.touch(key_digest)
+                    results[original_text] = translation
+        except peewee.OperationalError as e:
+            if "database is locked" in str(e):
+                logger.debug("Cache is locked")
+            else:
+                raise
+        return results
+
     def set(self, original_text: str, translation: str):
+        key_digest = self._key_digest(original_text)
+        # Write-through: the in-process LRU is updated immediately,
+        # the SQLite row is committed by the background writer.
+        _memory_cache.put(key_digest, translation)
+        _cache_writer.put(
+            (
+                key_digest,
+                self.translate_engine,
+                self.translate_engine_params,
+                original_text,
+                translation,
+            )
+        )
+
+    def recent_entries(self, limit: int) -> list[tuple[str, str]]:
+        """The ``limit`` most recently used (original text, translation) pairs stored
+        with the engine and params of this cache, pending writes included."""
+        flush_cache_writes()
+        params_digest = _params_hasher(
+            self.translate_engine, self.translate_engine_params
+        ).digest()
         try:
-            _TranslationCache.create(
-                translate_engine=self.translate_engine,
-                translate_engine_params=self.translate_engine_params,
-                original_text=original_text,
-                translation=translation,
+            params_id = (
+                _TranslationCacheParams.select(_TranslationCacheParams.id)
+                .where(_TranslationCacheParams.params_digest == params_digest)
+                .scalar()
             )
-            # Trigger cache cleanup with a small probability.
-            if random.random() < CLEAN_PROBABILITY:  # noqa: S311
-                self._cleanup()
+            if params_id is None:
+                return []
+            query = (
+                _TranslationCache.select(
+                    _TranslationCache.original_text, _TranslationCache.translation
+                )
+                .where(_TranslationCache.params_id == params_id)
+                .order_by(_TranslationCache.last_access.desc())
+                .limit(limit)
+            )
+            return list(query.tuples())
         except peewee.OperationalError as e:
             if "database is locked" in str(e):
                 logger.debug("Cache is locked")
-            else:
+                return []
+            raise
+
+
+class _CacheWriter:
+    """Background thread committing cache writes in batched transactions.
+
+    ``TranslationCache.set`` only enqueues rows, so translation threads never wait
+    on SQLite locks. A batch that hits "database is locked" is retried instead of dropped.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self._params_ids: dict[tuple[str, str], int] = {}
+        # Key digests read since the last write, their last_access is updated in bulk
+        self._touched: set[bytes] = set()
+        self._touched_lock = threading.Lock()
+
+    def put(self, row: tuple):
+        self._ensure_started()
+        _maintenance.ensure_started()
+        self._queue.put(row)
+
+    def touch(self, key_digest: bytes):
+        with self._touched_lock:
+            self._touched.add(key_digest)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every write enqueued before this call is committed."""
+        if self._thread is None:
+            if not self._touched:
+                return True
+            self._ensure_started()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def reset_params_ids(self):
+        self._params_ids.clear()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="translation_cache_writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            rows = []
+            events = []
+            item = self._queue.get()
+            deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+            while True:
+                if isinstance(item, threading.Event):
+                    # Commit immediately so that flush() returns quickly.
+                    events.append(item)
+                    break
+                rows.append(item)
+                if len(rows) >= WRITE_BATCH_SIZE:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            try:
+                self._write(rows)
+            except Exception as e:
+                logger.warning(f"Failed to write {len(rows)} cache entries: {e}")
+            try:
+                self._write_touched()
+            except Exception as e:
+                logger.warning(f"Failed to update cache access time: {e}")
+            for event in events:
+                event.set()
+
+    def _write(self, rows: list[tuple]):
+        if not rows:
+            return
+        now = int(time.time())
+        for attempt in range(WRITE_MAX_ATTEMPTS):
+            try:
+                with _TranslationCache._meta.database.atomic():
+                    records = [
+                        _build_record(
+                            key_digest,
+                            self._get_params_id(engine, params),
+                            original_text,
+                            translation,
+                            now,
+                        )
+                        for key_digest, engine, params, original_text, translation in rows
+                    ]
+                    _TranslationCache.insert_many(
+                        records
+                    ).on_conflict_replace().execute()
+                break
+            except peewee.OperationalError as e:
+                if "database is locked" not in str(e):
+                    raise
+                logger.debug("Cache is locked, retry writing")
+                time.sleep(min(0.05 * 2**attempt, 2))
+        else:
+            logger.warning(f"Cache is locked, dropped {len(rows)} cache entries")
+
+    def _write_touched(self):
+        with self._touched_lock:
+            touched, self._touched = self._touched, set()
+        if not touched:
+            return
+        now = int(time.time())
+        touched = list(touched)
+        try:
+            with _TranslationCache._meta.database.atomic():
+                for i in range(0, len(touched), PREFETCH_CHUNK_SIZE):
+                    _TranslationCache.update(last_access=now).where(
+                        _TranslationCache.key_digest.in_(
+                            touched[i : i + PREFETCH_CHUNK_SIZE]
+                        )
+                    ).execute()
+        except peewee.OperationalError as e:
+            if "database is locked" not in str(e):
                 raise
+            # Access times are only a hint for eviction, try again with the next batch.
+            with self._touched_lock:
+                self._touched.update(touched)
+
+    def _get_params_id(self, translate_engine: str, translate_engine_params: str):
+        key = (translate_engine, translate_engine_params)
+        params_id = self._params_ids.get(key)
+        if params_id is None:
+            params_id = _get_or_create_params_id(
+                translate_engine, translate_engine_params
+            )
+            self._params_ids[key] = params_id
+        return params_id
 
-    def _cleanup(self) -> None:
-        """Remove old cache entries, keeping only the latest MAX_CACHE_ROWS records."""
-        # Quick exit if another thread is already performing cleanup.
-        if not _cleanup_lock.acquire(blocking=False):
+
+class _CacheMaintenance:
+    """Daemon thread running :func:`run_cache_maintenance` periodically."""
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is not None:
             return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="translation_cache_maintenance", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        time.sleep(MAINTENANCE_INITIAL_DELAY)
+        while True:
+            try:
+                run_cache_maintenance()
+            except Exception as e:
+                logger.warning(f"Translation cache maintenance failed: {e}")
+            time.sleep(MAINTENANCE_INTERVAL)
+
+
+_cache_writer = _CacheWriter()
+_maintenance = _CacheMaintenance()
+
+
+def configure_cache_eviction(
+    max_bytes: int | None = None, interval: float | None = None
+) -> None:
+    """Set the byte budget of the SQLite cache (0 disables eviction)
+    and the interval in seconds between maintenance runs. ``None`` keeps the current value.
+    """
+    global MAX_CACHE_BYTES, MAINTENANCE_INTERVAL
+    if max_bytes is not None:
+        MAX_CACHE_BYTES = max_bytes
+    if interval is not None:
+        MAINTENANCE_INTERVAL = interval
+
+
+def run_cache_maintenance() -> int:
+    """Evict the least recently used entries over MAX_CACHE_BYTES and release free pages.
+
+    Runs on the maintenance thread, can also be called directly.
+
+    Returns:
+        Number of evicted entries.
+    """
+    # Quick exit if another thread is already performing maintenance.
+    if not _maintenance_lock.acquire(blocking=False):
+        return 0
+    try:
+        # Persist pending writes and access times first, eviction relies on them.
+        flush_cache_writes()
+        evicted = _evict_least_recently_used(MAX_CACHE_BYTES)
+        _incremental_vacuum()
+        return evicted
+    except peewee.OperationalError as e:
+        if "database is locked" not in str(e):
+            raise
+        logger.debug("Cache is locked, skip maintenance")
+        return 0
+    finally:
+        _maintenance_lock.release()
+
+
+def _evict_least_recently_used(max_bytes: int) -> int:
+    if max_bytes <= 0:
+        return 0
+    total_bytes = (
+        _TranslationCacheMeta.select(_TranslationCacheMeta.value)
+        .where(_TranslationCacheMeta.key == _TOTAL_BYTES_KEY)
+        .scalar()
+    )
+    if not total_bytes or total_bytes <= max_bytes:
+        return 0
+    bytes_to_free = total_bytes - int(max_bytes * EVICTION_TARGET_RATIO)
+    logger.info("Evicting least recently used translation cache entries...")
+    evicted = 0
+    while bytes_to_free > 0:
+        rows = (
+            _TranslationCache.select(_TranslationCache.id, _TranslationCache.size)
+            .order_by(_TranslationCache.last_access, _TranslationCache.id)
+            .limit(EVICTION_BATCH_SIZE)
+            .tuples()
+        )
+        ids = []
+        for row_id, size in rows:
+            ids.append(row_id)
+            bytes_to_free -= size
+            if bytes_to_free <= 0:
+                break
+        if not ids:
+            break
+        with _TranslationCache._meta.database.atomic():
+            _TranslationCache.delete().where(_TranslationCache.id.in_(ids)).execute()
+        evicted += len(ids)
+    logger.info(f"Evicted {evicted} translation cache entries")
+    return evicted
+
+
+def _incremental_vacuum(rebuild: bool = False):
+    """Release the free pages of the database.
+
+    cache.v2.db is created with incremental auto_vacuum. Other databases are only
+    rebuilt with a full VACUUM when ``rebuild`` is set by an explicit maintenance
+    command, never from the maintenance thread.
+    """
+    database = _TranslationCache._meta.database
+    if database.execute_sql("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        database.execute_sql("PRAGMA incremental_vacuum")
+    elif rebuild:
+        # auto_vacuum can only be switched on by rebuilding the database once.
+        logger.info("Rebuilding translation cache to enable incremental vacuum...")
+        database.execute_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        database.execute_sql("VACUUM")
+    else:
+        logger.debug("Incremental vacuum is not enabled, skip releasing free pages")
+
+
+def _build_record(
+    key_digest: bytes,
+    params_id: int,
+    original_text: str,
+    translation: str,
+    last_access: int,
+) -> dict:
+    original_text = _compress_text(original_text)
+    translation = _compress_text(translation)
+    return {
+        "key_digest": key_digest,
+        "params_id": params_id,
+        "original_text": original_text,
+        "translation": translation,
+        "last_access": last_access,
+        "size": _stored_size(original_text) + _stored_size(translation),
+    }
+
+
+def configure_cache_compression(min_bytes: int) -> None:
+    """Store texts of at least ``min_bytes`` UTF-8 bytes compressed, 0 disables it.
+
+    Compressed and plain rows can be mixed, reads handle both.
+    """
+    global COMPRESS_MIN_BYTES
+    COMPRESS_MIN_BYTES = max(min_bytes, 0)
+
+
+def compress_cache_entries() -> int:
+    """Compress the stored texts of at least COMPRESS_MIN_BYTES in place.
+
+    Returns:
+        Number of rewritten entries.
+    """
+    if COMPRESS_MIN_BYTES <= 0:
+        return 0
+    flush_cache_writes()
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = list(
+            _TranslationCache.select(
+                _TranslationCache.id,
+                _TranslationCache.original_text,
+                _TranslationCache.translation,
+            )
+            .where(
+                (_TranslationCache.id > last_id)
+                & (_TranslationCache.size >= COMPRESS_MIN_BYTES)
+            )
+            .order_by(_TranslationCache.id)
+            .limit(TRANSFER_BATCH_SIZE)
+            .tuples()
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        with _TranslationCache._meta.database.atomic():
+            for row_id, original_text, translation in rows:
+                stored_original = _compress_text(original_text)
+                stored_translation = _compress_text(translation)
+                if isinstance(stored_original, str) and isinstance(
+                    stored_translation, str
+                ):
+                    continue
+                _TranslationCache.update(
+                    original_text=stored_original,
+                    translation=stored_translation,
+                    size=_stored_size(stored_original)
+                    + _stored_size(stored_translation),
+                ).where(_TranslationCache.id == row_id).execute()
+                rewritten += 1
+    _incremental_vacuum(rebuild=True)
+    logger.info(f"Compressed {rewritten} translation cache entries")
+    return rewritten
+
+
+def export_cache(path: Path) -> int:
+    """Write every cache entry to a zstd-compressed JSON Lines archive.
+
+    The first line describes the format, then every (engine, params) pair is written
+    once before the entries referencing it.
+
+    Returns:
+        Number of exported entries.
+    """
+    flush_cache_writes()
+    exported = 0
+    written_params = set()
+    params = {
+        params_id: (engine, engine_params)
+        for params_id, engine, engine_params in _TranslationCacheParams.select(
+            _TranslationCacheParams.id,
+            _TranslationCacheParams.translate_engine,
+            _TranslationCacheParams.translate_engine_params,
+        ).tuples()
+    }
+    with pyzstd.open(path, "wt", encoding="utf-8", level_or_option=COMPRESS_LEVEL) as f:
+        f.write(
+            json.dumps({"format": EXPORT_FORMAT, "version": EXPORT_FORMAT_VERSION})
+            + "\n"
+        )
+        query = (
+            _TranslationCache.select(
+                _TranslationCache.params_id,
+                _TranslationCache.original_text,
+                _TranslationCache.translation,
+                _TranslationCache.last_access,
+            )
+            .order_by(_TranslationCache.id)
+            .tuples()
+        )
+        for params_id, original_text, translation, last_access in query.iterator():
+            if params_id not in params:
+                continue
+            if params_id not in written_params:
+                engine, engine_params = params[params_id]
+                f.write(
+                    json.dumps(
+                        {"params": params_id, "engine": engine, "value": engine_params},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+                written_params.add(params_id)
+            f.write(
+                json.dumps(
+                    {
+                        "p": params_id,
+                        "o": original_text,
+                        "t": translation,
+                        "a": last_access,
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+            exported += 1
+    logger.info(f"Exported {exported} translation cache entries to {path}")
+    return exported
+
+
+def import_cache(path: Path, conflict: str = "keep") -> tuple[int, int]:
+    """Merge the entries of an archive written by :func:`export_cache`.
+
+    Args:
+        path: the archive
+        conflict: what to do with entries already in the cache: "keep" the local
+            translation, "replace" it, or keep the "newer" one by last access time
+
+    Returns:
+        Numbers of imported and skipped entries.
+    """
+    if conflict not in ("keep", "replace", "newer"):
+        raise ValueError(f"unknown conflict rule: {conflict}")
+    flush_cache_writes()
+    imported = skipped = 0
+    params = {}
+    batch = []
+
+    def write_batch():
+        nonlocal imported, skipped
+        digests = [record["key_digest"] for record in batch]
+        existing = {}
+        if conflict != "replace":
+            existing = {
+                bytes(key_digest): last_access
+                for key_digest, last_access in _TranslationCache.select(
+                    _TranslationCache.key_digest, _TranslationCache.last_access
+                )
+                .where(_TranslationCache.key_digest.in_(digests))
+                .tuples()
+            }
+        records = [
+            record
+            for record in batch
+            if record["key_digest"] not in existing
+            or (
+                conflict == "newer"
+                and record["last_access"] > existing[record["key_digest"]]
+            )
+        ]
+        skipped += len(batch) - len(records)
+        if records:
+            with _TranslationCache._meta.database.atomic():
+                _TranslationCache.insert_many(records).on_conflict_replace().execute()
+        imported += len(records)
+        batch.clear()
+
+    with pyzstd.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != EXPORT_FORMAT:
+            raise ValueError(f"{path} is not a translation cache archive")
+        if header.get("version", 0) > EXPORT_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} was written by a newer version (format {header['version']})"
+            )
+        for line in f:
+            item = json.loads(line)
+            if "params" in item:
+                params[item["params"]] = (
+                    item["engine"],
+                    item["value"],
+                    _get_or_create_params_id(item["engine"], item["value"]),
+                )
+                continue
+            engine, engine_params, params_id = params[item["p"]]
+            hasher = _params_hasher(engine, engine_params)
+            hasher.update(item["o"].encode("utf-8", "surrogatepass"))
+            batch.append(
+                _build_record(
+                    hasher.digest(), params_id, item["o"], item["t"], item["a"]
+                )
+            )
+            if len(batch) >= TRANSFER_BATCH_SIZE:
+                write_batch()
+        if batch:
+            write_batch()
+    # Entries already read into the in-process LRU may be outdated now.
+    _memory_cache.clear()
+    logger.info(
+        f"Imported {imported} translation cache entries from {path}, skipped {skipped}"
+    )
+    return imported, skipped
+
+
+def flush_cache_writes(timeout: float | None = None) -> bool:
+    """Wait until all pending translation cache writes are committed.
+
+    Returns:
+        False if the timeout expired before the pending writes were committed.
+    """
+    return _cache_writer.flush(timeout)
+
+
+atexit.register(flush_cache_writes, 10)
+
+
+def _params_hasher(translate_engine: str, translate_engine_params: str):
+    hasher = hashlib.blake2b(digest_size=KEY_DIGEST_SIZE)
+    hasher.update(translate_engine.encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(translate_engine_params.encode("utf-8", "surrogatepass"))
+    hasher.update(b"\0")
+    return hasher
+
+
+def _get_or_create_params_id(translate_engine: str, translate_engine_params: str):
+    params_digest = _params_hasher(translate_engine, translate_engine_params).digest()
+    _TranslationCacheParams.insert(
+        params_digest=params_digest,
+        translate_engine=translate_engine,
+        translate_engine_params=translate_engine_params,
+    ).on_conflict_ignore().execute()
+    return (
+        _TranslationCacheParams.select(_TranslationCacheParams.id)
+        .where(_TranslationCacheParams.params_digest == params_digest)
+        .scalar()
+    )
+
+
+def migrate_legacy_cache(cache_folder: Path = CACHE_FOLDER) -> int:
+    """Copy the entries of the cache.v1.db written by older versions into the current
+    database.
+
+    The first process to take the migration lock copies the entries and renames the
+    legacy files to cache.v1.db.migrated, other processes skip the migration.
+
+    Returns:
+        Number of migrated entries.
+    """
+    legacy_db_path = cache_folder / "cache.v1.db"
+    if not legacy_db_path.exists():
+        return 0
+    lock_path = cache_folder / "cache.v1.db.migrating"
+    if not _acquire_migration_lock(lock_path):
+        logger.info("Translation cache is migrated by another process, skip")
+        return 0
+    try:
+        # Another process may have finished the migration before the lock was taken.
+        if not legacy_db_path.exists():
+            return 0
+        migrated = _migrate_v1(legacy_db_path)
+        migrated_path = legacy_db_path.with_name(legacy_db_path.name + ".migrated")
+        for suffix in ("", "-wal", "-shm"):
+            path = Path(str(legacy_db_path) + suffix)
+            if path.exists():
+                path.replace(Path(str(migrated_path) + suffix))
+        logger.info(f"Renamed {legacy_db_path} to {migrated_path}")
+        return migrated
+    except Exception as e:
+        logger.warning(f"Failed to migrate translation cache from v1: {e}")
+        return 0
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def _acquire_migration_lock(lock_path: Path) -> bool:
+    """Create the lock file exclusively, taking over a lock older than
+    MIGRATION_LOCK_TIMEOUT."""
+    for _ in range(2):
         try:
-            logger.info("Cleaning up translation cache...")
-            max_id = _TranslationCache.select(fn.MAX(_TranslationCache.id)).scalar()
-            # Nothing to do if table is empty or below threshold
-            if not max_id or max_id <= MAX_CACHE_ROWS:
-                return
-            threshold = max_id - MAX_CACHE_ROWS
-            # Delete rows with id *less than or equal* to threshold so that at most MAX_CACHE_ROWS remain.
-            _TranslationCache.delete().where(
-                _TranslationCache.id <= threshold
-            ).execute()
-        finally:
-            _cleanup_lock.release()
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                age = time.time() - lock_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if age < MIGRATION_LOCK_TIMEOUT:
+                return False
+            logger.warning(
+                f"Removing stale translation cache migration lock {lock_path}"
+            )
+            lock_path.unlink(missing_ok=True)
+    return False
+
+
+def _migrate_v1(legacy_db_path: Path) -> int:
+    """Copy every entry of cache.v1.db into the current database."""
+    logger.info(f"Migrating translation cache from {legacy_db_path}")
+    legacy_db = SqliteDatabase(legacy_db_path, pragmas={"busy_timeout": 1000})
+    migrated = 0
+    try:
+        with legacy_db.bind_ctx([_TranslationCacheV1]):
+            if not legacy_db.table_exists(_TranslationCacheV1._meta.table_name):
+                return 0
+            params_ids = {}
+            rows = []
+            now = int(time.time())
+            query = (
+                _TranslationCacheV1.select(
+                    _TranslationCacheV1.translate_engine,
+                    _TranslationCacheV1.translate_engine_params,
+                    _TranslationCacheV1.original_text,
+                    _TranslationCacheV1.translation,
+                )
+                .order_by(_TranslationCacheV1.id)
+                .tuples()
+            )
+            for engine, params, original_text, translation in query.iterator():
+                params_key = (engine, params)
+                if params_key not in params_ids:
+                    params_ids[params_key] = _get_or_create_params_id(engine, params)
+                hasher = _params_hasher(engine, params)
+                hasher.update(original_text.encode("utf-8", "surrogatepass"))
+                rows.append(
+                    _build_record(
+                        hasher.digest(),
+                        params_ids[params_key],
+                        original_text,
+                        translation,
+                        now,
+                    )
+                )
+                if len(rows) >= MIGRATION_BATCH_SIZE:
+                    migrated += _insert_migrated_rows(rows)
+                    rows = []
+            migrated += _insert_migrated_rows(rows)
+    finally:
+        legacy_db.close()
+    logger.info(f"Migrated {migrated} translation cache entries")
+    return migrated
+
+
+def _insert_migrated_rows(rows: list[dict]) -> int:
+    if not rows:
+        return 0
+    with _TranslationCache._meta.database.atomic():
+        _TranslationCache.insert_many(rows).on_conflict_replace().execute()
+    return len(rows)
 
 
 def init_db(remove_exists=False):
     CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
-    # The current version does not support database migration, so add the version number to the file name.
-    cache_db_path = CACHE_FOLDER / "cache.v1.db"
+    # Bump the version number in the file name on schema changes,
+    # older files are migrated by migrate_legacy_cache.
+    cache_db_path = CACHE_FOLDER / "cache.v2.db"
     logger.info(f"Initializing cache database at {cache_db_path}")
     if remove_exists and cache_db_path.exists():
         cache_db_path.unlink()
     db.init(
         cache_db_path,
         pragmas={
+            # Must be set before the first table is created.
+            "auto_vacuum": 2,
             "journal_mode": "wal",
             "busy_timeout": 1000,
+            "recursive_triggers": 1,
         },
     )
-    db.create_tables([_TranslationCache], safe=True)
+    _create_tables(db)
+
+
+def _create_tables(database: SqliteDatabase):
+    with database.atomic():
+        database.create_tables(
+            [_TranslationCacheParams, _TranslationCache, _TranslationCacheMeta],
+            safe=True,
+        )
+        # Seeded once from the existing rows, the triggers maintain it afterwards.
+        _TranslationCacheMeta.insert(
+            key=_TOTAL_BYTES_KEY,
+            value=_TranslationCache.select(
+                fn.COALESCE(fn.SUM(_TranslationCache.size), 0)
+            ),
+        ).on_conflict_ignore().execute()
+        for trigger in _TOTAL_BYTES_TRIGGERS:
+            database.execute_sql(trigger)
 
 
 def init_test_db():
@@ -169,21 +1142,34 @@ def init_test_db():
     cache_db_path = temp_file.name
     temp_file.close()
 
+    flush_cache_writes()
     test_db = SqliteDatabase(
         cache_db_path,
         pragmas={
             "journal_mode": "wal",
             "busy_timeout": 1000,
+            "recursive_triggers": 1,
         },
     )
-    test_db.bind([_TranslationCache], bind_refs=False, bind_backrefs=False)
+    test_db.bind(
+        [_TranslationCacheParams, _TranslationCache, _TranslationCacheMeta],
+        bind_refs=False,
+        bind_backrefs=False,
+    )
     test_db.connect()
-    test_db.create_tables([_TranslationCache], safe=True)
+    _create_tables(test_db)
+    _memory_cache.clear()
+    _cache_writer.reset_params_ids()
     return test_db
 
 
 def clean_test_db(test_db):
-    test_db.drop_tables([_TranslationCache])
+    flush_cache_writes()
+    _memory_cache.clear()
+    _cache_writer.reset_params_ids()
+    test_db.drop_tables(
+        [_TranslationCacheParams, _TranslationCache, _TranslationCacheMeta]
+    )
     test_db.close()
     db_path = Path(test_db.database)
     if db_path.exists():
@@ -0,0 +1,260 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+
+def is_endpoint_failure(exception: BaseException | None) -> bool:
+    """Whether an error means the endpoint is unhealthy rather than the request bad."""
+    if isinstance(exception, openai.APIConnectionError):
+        return True
+    return isinstance(exception, openai.APIStatusError) and (
+        exception.status_code == 429 or exception.status_code >= 500
+    )
+
+
+class OpenAIEndpoint:
+    """
+    One OpenAI compatible endpoint of an :class:`EndpointPool`, with its health.
+
+    The circuit breaker of the endpoint opens after ``failure_threshold`` consecutive
+    failures (rate limit errors, 5xx responses, timeouts and connection errors). While
+    open the endpoint receives no requests. Once the cooldown is over a single probe
+    request is let through: its success closes the circuit, its failure opens it again
+    with a doubled cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        base_url: str | None,
+        api_key: str | None,
+        weight: float = 1.0,
+        max_retries: int = openai.DEFAULT_MAX_RETRIES,
+        failure_threshold: int = 3,
+        cooldown: float = 5.0,
+        max_cooldown: float = 120.0,
+        smoothing: float = 0.2,
+    ):
+        if weight <= 0:
+            raise ValueError("weight must be a positive number")
+        self.base_url = base_url
+        self.api_key = api_key
+        self.weight = weight
+        self.max_retries = max_retries
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+        self.client = openai.OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            max_retries=max_retries,
+            http_client=httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=None, max_keepalive_connections=None
+                ),
+                timeout=60,  # Set a reasonable timeout
+            ),
+        )
+        self._async_client: openai.AsyncOpenAI | None = None
+        self._async_client_loop: asyncio.AbstractEventLoop | None = None
+        self._async_client_lock = threading.Lock()
+
+        # Guarded by the lock of the pool.
+        self.state = self.CLOSED
+        self.in_flight = 0
+        self.latency = None
+        self.consecutive_failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.request_count = 0
+        self.failure_count = 0
+        self.trip_count = 0
+
+    def get_async_client(self) -> openai.AsyncOpenAI:
+        # httpx connection pools are bound to the event loop that created them,
+        # so a new client is created whenever a different loop is running.
+        loop = asyncio.get_running_loop()
+        with self._async_client_lock:
+            if self._async_client is None or self._async_client_loop is not loop:
+                self._async_client = openai.AsyncOpenAI(
+                    base_url=self.base_url,
+                    api_key=self.api_key,
+                    max_retries=self.max_retries,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=None, max_keepalive_connections=None
+                        ),
+                        timeout=60,
+                    ),
+                )
+                self._async_client_loop = loop
+            return self._async_client
+
+    async def aclose(self):
+        with self._async_client_lock:
+            client = self._async_client
+            client_loop = self._async_client_loop
+            self._async_client = None
+            self._async_client_loop = None
+        if client is not None and client_loop is asyncio.get_running_loop():
+            await client.close()
+
+    def _is_available(self, now: float) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return now >= self.open_until
+        # Half open: only the probe request may be in flight.
+        return self.in_flight == 0
+
+    def _score(self, default_latency: float) -> float:
+        # Expected time to drain the requests already routed here, per unit of weight.
+        # Recent failures make the endpoint less attractive before the circuit opens.
+        latency = self.latency if self.latency is not None else default_latency
+        return (
+            (self.in_flight + 1) * latency * (1 + self.consecutive_failures)
+        ) / self.weight
+
+    def _on_success(self, latency: float | None):
+        self.request_count += 1
+        if latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info(f"Endpoint {self.base_url} recovered, closing its circuit")
+            self.state = self.CLOSED
+            self.cooldown = self.base_cooldown
+
+    def _on_failure(self, now: float):
+        self.request_count += 1
+        self.failure_count += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._trip(now)
+        elif (
+            self.state == self.CLOSED
+            and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._trip(now)
+
+    def _trip(self, now: float):
+        self.state = self.OPEN
+        self.open_until = now + self.cooldown
+        self.trip_count += 1
+        logger.warning(
+            f"Endpoint {self.base_url} failed {self.consecutive_failures} times in a row, "
+            f"opening its circuit for {self.cooldown:.0f}s"
+        )
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "latency_ms": round((self.latency or 0) * 1000),
+            "requests": self.request_count,
+            "failures": self.failure_count,
+            "circuit_trips": self.trip_count,
+        }
+
+
+class EndpointPool:
+    """
+    Routes the requests of a translator over several OpenAI compatible endpoints,
+    e.g. several API keys of one provider, a secondary provider and a local vLLM.
+
+    Every request goes to the available endpoint with the lowest expected wait, i.e.
+    in-flight requests times smoothed latency divided by weight, so slow or busy
+    endpoints get less traffic and a degraded one is skipped once its circuit opens.
+    When every circuit is open the endpoint that will be retried first is used anyway,
+    a pool never refuses a request.
+    """
+
+    def __init__(self, endpoints: list[OpenAIEndpoint]):
+        if not endpoints:
+            raise ValueError("an endpoint pool needs at least one endpoint")
+        self.endpoints = endpoints
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def acquire(self) -> OpenAIEndpoint:
+        now = time.monotonic()
+        with self._lock:
+            available = [e for e in self.endpoints if e._is_available(now)]
+            # An endpoint whose cooldown is over is probed first, its failure
+            # history would otherwise keep it from ever being tried again.
+            probes = [e for e in available if e.state == e.OPEN]
+            if probes:
+                endpoint = probes[0]
+            elif available:
+                known = [e.latency for e in available if e.latency is not None]
+                default_latency = sum(known) / len(known) if known else 1.0
+                endpoint = min(available, key=lambda e: e._score(default_latency))
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.open_until)
+            if endpoint.state == endpoint.OPEN:
+                endpoint.state = endpoint.HALF_OPEN
+            endpoint.in_flight += 1
+            return endpoint
+
+    def release(
+        self,
+        endpoint: OpenAIEndpoint,
+        latency: float | None = None,
+        error: BaseException | None = None,
+    ):
+        """
+        Return an endpoint acquired with :meth:`acquire`.
+
+        Errors that are not endpoint failures, e.g. a rejected prompt, do not count
+        against the health of the endpoint, the endpoint did answer.
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+            if is_endpoint_failure(error):
+                endpoint._on_failure(time.monotonic())
+            elif error is None or endpoint.state == endpoint.HALF_OPEN:
+                endpoint._on_success(latency if error is None else None)
+
+    @contextlib.contextmanager
+    def route(self):
+        """Acquire an endpoint for the duration of the block and record the outcome."""
+        endpoint = self.acquire()
+        start = time.monotonic()
+        try:
+            yield endpoint
+        except BaseException as e:
+            self.release(endpoint, error=e)
+            raise
+        self.release(endpoint, time.monotonic() - start)
+
+    def has_available(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            return any(e._is_available(now) for e in self.endpoints)
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [e.stats() for e in self.endpoints]
+
+    async def aclose(self):
+        for endpoint in self.endpoints:
+            await endpoint.aclose()
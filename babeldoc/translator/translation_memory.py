@@ -0,0 +1,151 @@
+import heapq
+import logging
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+
+import Levenshtein
+
+logger = logging.getLogger(__name__)
+
+# Placeholders and numbers, a translation is only reused verbatim if its source has
+# exactly the same ones
+_PLACEHOLDER_PATTERN = re.compile(r"<[^<>]{1,32}>|\{v?\d+\}")
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+@dataclass
+class TranslationMemoryMatch:
+    source: str
+    translation: str
+    similarity: float
+    # Whether the translation can replace a new one, see TranslationMemory.lookup
+    reusable: bool = False
+
+
+class TranslationMemory:
+    """
+    Fuzzy lookup of translated texts similar to a new one.
+
+    Every source text is sketched by the ``sketch_size`` smallest hashes of its
+    character n-grams (a bottom-k MinHash) and put in one bucket per hash. Texts that
+    share buckets with a query are candidates, and the Levenshtein ratio of the best
+    candidates decides. Near-duplicates, e.g. a paragraph of the previous revision of a
+    document with another date, share most of their n-grams and so most buckets.
+
+    A match with a similarity of at least ``reuse_threshold`` whose source has the same
+    placeholders and numbers as the query is reusable as is; the others are hints.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        reuse_threshold: float | None = None,
+        ngram: int = 3,
+        sketch_size: int = 8,
+        max_candidates: int = 8,
+        max_entries: int = 100_000,
+    ):
+        self.threshold = threshold
+        self.reuse_threshold = reuse_threshold
+        self.ngram = ngram
+        self.sketch_size = sketch_size
+        self.max_candidates = max_candidates
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: list[tuple[str, str]] = []
+        self._ids: dict[str, int] = {}
+        self._buckets: dict[int, list[int]] = defaultdict(list)
+
+        self.lookups = 0
+        self.matches = 0
+        self.reused = 0
+        self._similarity_sum = 0.0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _sketch(self, text: str) -> list[int]:
+        text = " ".join(text.split())
+        if len(text) < self.ngram:
+            return []
+        ngrams = {text[i : i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+        return heapq.nsmallest(self.sketch_size, {hash(ngram) for ngram in ngrams})
+
+    def add(self, source: str, translation: str):
+        sketch = self._sketch(source)
+        if not sketch:
+            return
+        with self._lock:
+            entry_id = self._ids.get(source)
+            if entry_id is not None:
+                self._entries[entry_id] = (source, translation)
+                return
+            if len(self._entries) >= self.max_entries:
+                return
+            entry_id = len(self._entries)
+            self._entries.append((source, translation))
+            self._ids[source] = entry_id
+            for h in sketch:
+                self._buckets[h].append(entry_id)
+
+    def lookup(self, source: str) -> TranslationMemoryMatch | None:
+        """The most similar translated text above ``threshold``, if any."""
+        sketch = self._sketch(source)
+        with self._lock:
+            self.lookups += 1
+            if not sketch or not self._entries:
+                return None
+            shared: dict[int, int] = defaultdict(int)
+            for h in sketch:
+                for entry_id in self._buckets.get(h, ()):
+                    shared[entry_id] += 1
+            candidates = heapq.nlargest(
+                self.max_candidates, shared.items(), key=lambda item: item[1]
+            )
+            candidates = [self._entries[entry_id] for entry_id, _ in candidates]
+
+        best = None
+        for candidate_source, translation in candidates:
+            if candidate_source == source:
+                continue
+            # ratio() cannot reach the threshold for very different lengths.
+            lengths = sorted((len(candidate_source), len(source)))
+            if 2 * lengths[0] / (lengths[0] + lengths[1]) < self.threshold:
+                continue
+            similarity = Levenshtein.ratio(candidate_source, source)
+            if similarity >= self.threshold and (
+                best is None or similarity > best.similarity
+            ):
+                best = TranslationMemoryMatch(candidate_source, translation, similarity)
+        if best is None:
+            return None
+        best.reusable = (
+            self.reuse_threshold is not None
+            and best.similarity >= self.reuse_threshold
+            and _PLACEHOLDER_PATTERN.findall(best.source)
+            == _PLACEHOLDER_PATTERN.findall(source)
+            and _NUMBER_PATTERN.findall(best.source) == _NUMBER_PATTERN.findall(source)
+        )
+        with self._lock:
+            self.matches += 1
+            self._similarity_sum += best.similarity
+        return best
+
+    def record_reuse(self):
+        with self._lock:
+            self.reused += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "reused": self.reused,
+                "mean_similarity": round(self._similarity_sum / self.matches, 4)
+                if self.matches
+                else 0.0,
+            }
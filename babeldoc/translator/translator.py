@@ -1,22 +1,33 @@
+import asyncio
+import collections
 import contextlib
+import hashlib
 import logging
 import threading
 import time
 import unicodedata
+import weakref
 from abc import ABC
 from abc import abstractmethod
+from concurrent.futures import Future
 
-import httpx
 import openai
 from tenacity import before_sleep_log
 from tenacity import retry
-from tenacity import retry_if_exception_type
 from tenacity import stop_after_attempt
 from tenacity import wait_exponential
 
+from babeldoc.babeldoc_exception.BabelDOCException import BatchRequestDeferredError
 from babeldoc.babeldoc_exception.BabelDOCException import ContentFilterError
+from babeldoc.translator.batch import BatchRequestCollector
 from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.endpoint_pool import EndpointPool
+from babeldoc.translator.endpoint_pool import OpenAIEndpoint
+from babeldoc.translator.endpoint_pool import is_endpoint_failure
+from babeldoc.utils.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from babeldoc.utils.adaptive_concurrency import AdmissionSample
 from babeldoc.utils.atomic_integer import AtomicInteger
+from babeldoc.utils.hedging import HedgingPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -25,55 +36,414 @@ def remove_control_characters(s):
     return "".join(ch for ch in s if unicodedata.category(ch)[0] != "C")
 
 
-class RateLimiter:
+def _validate_limits(max_qps: int, max_tpm: int | None, burst: int):
+    if max_qps <= 0:
+        raise ValueError("max_qps must be a positive number")
+    if max_tpm is not None and max_tpm < 0:
+        raise ValueError("max_tpm must not be negative")
+    if burst < 1:
+        raise ValueError("burst must be at least 1")
+
+
+class TokenBucketRateLimiter:
     """
-    A rate limiter using the leaky bucket algorithm to ensure a smooth, constant rate of requests.
-    This implementation is thread-safe and robust against system clock changes.
+    A token bucket rate limiter enforcing a requests-per-second and an optional tokens-per-minute budget.
+
+    Every request reserves its share of both buckets under the lock and sleeps outside of it,
+    so waiting threads do not serialize behind each other. Buckets may go into debt: a request
+    waits until the refill has paid back the debt it created.
+
+    The request bucket holds ``burst`` requests. The token bucket holds one minute of tokens,
+    matching the window providers use for their TPM quota. The token cost of a request is
+    estimated from ``rate_limit_params["paragraph_token_count"]`` and corrected with the
+    actual usage reported to :meth:`on_success`.
+
+    The refill rate adapts to the provider: :meth:`on_rate_limited` halves it (AIMD) and each
+    successful request raises it again by a fixed step until the configured limits are reached.
     """
 
-    def __init__(self, max_qps: int):
-        if max_qps <= 0:
-            raise ValueError("max_qps must be a positive number")
-        self.max_qps = max_qps
-        self.min_interval = 1.0 / max_qps
+    MIN_RATE_SCALE = 1 / 32
+    RATE_SCALE_STEP = 0.02
+    # Concurrent requests usually hit the same 429 storm; only the first one backs off.
+    BACKOFF_COOLDOWN = 1.0
+
+    def __init__(self, max_qps: int, max_tpm: int | None = None, burst: int = 1):
         self.lock = threading.Lock()
-        # Use monotonic time to prevent issues with system time changes
-        self.next_request_time = time.monotonic()
+        self.rate_scale = 1.0
+        self.rate_limited_count = 0
+        self._last_backoff = None
+        self.max_qps = max_qps
+        self.max_tpm = max_tpm or None
+        self.burst = burst
+        self._last_refill = time.monotonic()
+        self._request_level = 0.0
+        self._token_level = 0.0
+        self.set_limits(max_qps, max_tpm, burst)
+        # Start with full buckets, like an idle limiter.
+        self._request_level = float(self.burst)
+        self._token_level = self.token_capacity
 
-    def wait(self, _rate_limit_params: dict = None):
+    def set_limits(self, max_qps: int, max_tpm: int | None = None, burst: int = 1):
         """
-        Blocks until the next request can be processed, ensuring the rate limit is not exceeded.
+        Updates the budgets. This operation is thread-safe.
+        :param max_qps: maximum requests per second
+        :param max_tpm: maximum tokens per minute, None or 0 for no token budget
+        :param burst: number of requests that may be sent back to back after an idle period
         """
+        _validate_limits(max_qps, max_tpm, burst)
         with self.lock:
-            now = time.monotonic()
+            self._refill(time.monotonic())
+            self.max_qps = max_qps
+            self.max_tpm = max_tpm or None
+            self.burst = burst
+            self._request_level = min(self._request_level, burst)
+            self._token_level = min(self._token_level, self.token_capacity)
+
+    def set_max_qps(self, max_qps: int):
+        self.set_limits(max_qps, self.max_tpm, self.burst)
+
+    @property
+    def token_capacity(self) -> float:
+        return float(self.max_tpm or 0)
+
+    @staticmethod
+    def estimate_tokens(rate_limit_params: dict = None) -> int:
+        """Estimated token usage of a request: its input plus a translation of similar length."""
+        if not rate_limit_params:
+            return 0
+        return 2 * int(rate_limit_params.get("paragraph_token_count") or 0)
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if elapsed <= 0:
+            return
+        self._request_level = min(
+            self.burst,
+            self._request_level + elapsed * self.max_qps * self.rate_scale,
+        )
+        if self.max_tpm:
+            self._token_level = min(
+                self.token_capacity,
+                self._token_level + elapsed * self.max_tpm / 60 * self.rate_scale,
+            )
 
-            wait_duration = self.next_request_time - now
+    def _reserve(self, rate_limit_params: dict = None) -> float:
+        """Take one request and its tokens from the buckets and return how long to wait."""
+        tokens = self.estimate_tokens(rate_limit_params)
+        with self.lock:
+            self._refill(time.monotonic())
+            self._request_level -= 1
+            wait_duration = -self._request_level / (self.max_qps * self.rate_scale)
+            if self.max_tpm and tokens:
+                self._token_level -= min(tokens, self.token_capacity)
+                wait_duration = max(
+                    wait_duration,
+                    -self._token_level / (self.max_tpm / 60 * self.rate_scale),
+                )
+            return wait_duration
+
+    def _try_reserve(self, rate_limit_params: dict = None) -> float:
+        """
+        Take one request and its tokens only if both buckets hold them now.
+        Returns 0 on success, otherwise how long until they do. Unlike :meth:`_reserve`,
+        the buckets never go into debt, which lets the caller pick the next request.
+        """
+        tokens = (
+            min(self.estimate_tokens(rate_limit_params), self.token_capacity)
+            if self.max_tpm
+            else 0
+        )
+        with self.lock:
+            self._refill(time.monotonic())
+            wait_duration = (1 - self._request_level) / (self.max_qps * self.rate_scale)
+            if tokens:
+                wait_duration = max(
+                    wait_duration,
+                    (tokens - self._token_level)
+                    / (self.max_tpm / 60 * self.rate_scale),
+                )
             if wait_duration > 0:
-                time.sleep(wait_duration)
+                return wait_duration
+            self._request_level -= 1
+            self._token_level -= tokens
+            return 0.0
+
+    def wait(self, rate_limit_params: dict = None):
+        """
+        Blocks until the request fits into the request and token budgets.
+        """
+        wait_duration = self._reserve(rate_limit_params)
+        if wait_duration > 0:
+            time.sleep(wait_duration)
 
-            # Update the next allowed request time.
-            # If the limiter has been idle, the next request should start from 'now'.
+    async def async_wait(self, rate_limit_params: dict = None):
+        """
+        Asynchronous variant of :meth:`wait`.
+        """
+        wait_duration = self._reserve(rate_limit_params)
+        if wait_duration > 0:
+            await asyncio.sleep(wait_duration)
+
+    def on_success(self, rate_limit_params: dict = None, total_tokens: int = None):
+        """
+        Report a successful request.
+        :param rate_limit_params: the params the request was reserved with
+        :param total_tokens: actual token usage, used to correct the estimate
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate_scale = min(1.0, self.rate_scale + self.RATE_SCALE_STEP)
+            if self.max_tpm and total_tokens:
+                self._token_level -= total_tokens - min(
+                    self.estimate_tokens(rate_limit_params), self.token_capacity
+                )
+                self._token_level = min(self._token_level, self.token_capacity)
+
+    def on_rate_limited(self):
+        """
+        Report that the provider rejected a request with a rate limit error.
+        """
+        with self.lock:
             now = time.monotonic()
-            self.next_request_time = (
-                max(self.next_request_time, now) + self.min_interval
-            )
+            self._refill(now)
+            self.rate_limited_count += 1
+            if (
+                self._last_backoff is not None
+                and now - self._last_backoff < self.BACKOFF_COOLDOWN
+            ):
+                return
+            self._last_backoff = now
+            self.rate_scale = max(self.MIN_RATE_SCALE, self.rate_scale / 2)
+            # The provider is out of quota right now, drop the burst allowance.
+            self._request_level = min(self._request_level, 0.0)
+            self._token_level = min(self._token_level, 0.0)
+
+
+class RateLimiterHandle:
+    """
+    A translator's access to the rate limiter of its channel, see :class:`RateLimiterRegistry`.
+
+    Requests wait on the handle's own limits first and are then queued on the channel budget,
+    which is granted to the waiting handles in turn. Rate limit errors and token usage are
+    reported to the channel, since the provider quota is shared.
+    """
+
+    def __init__(
+        self,
+        registry: "RateLimiterRegistry",
+        channel: "_RateLimitChannel",
+        max_qps: int,
+        max_tpm: int | None,
+        burst: int,
+    ):
+        self.max_qps = max_qps
+        self.max_tpm = max_tpm or None
+        self.burst = burst
+        self.channel = channel
+        self.share = TokenBucketRateLimiter(max_qps, max_tpm, burst)
+        self._release = weakref.finalize(self, registry._release, channel, id(self))
+
+    def set_limits(self, max_qps: int, max_tpm: int | None = None, burst: int = 1):
+        _validate_limits(max_qps, max_tpm, burst)
+        self.max_qps = max_qps
+        self.max_tpm = max_tpm or None
+        self.burst = burst
+        self.channel.rebalance()
 
     def set_max_qps(self, max_qps: int):
+        self.set_limits(max_qps, self.max_tpm, self.burst)
+
+    def wait(self, rate_limit_params: dict = None):
+        self.share.wait(rate_limit_params)
+        self.channel.wait(id(self), rate_limit_params)
+
+    async def async_wait(self, rate_limit_params: dict = None):
+        await self.share.async_wait(rate_limit_params)
+        await self.channel.async_wait(id(self), rate_limit_params)
+
+    def on_success(self, rate_limit_params: dict = None, total_tokens: int = None):
+        self.share.on_success(rate_limit_params, total_tokens)
+        self.channel.limiter.on_success(rate_limit_params, total_tokens)
+
+    def on_rate_limited(self):
+        self.channel.limiter.on_rate_limited()
+
+    def close(self):
+        """Detach this handle from its channel."""
+        self._release()
+
+
+class _ChannelWaiter:
+    """A request queued on a :class:`_RateLimitChannel`, woken when it is granted."""
+
+    def __init__(
+        self,
+        rate_limit_params: dict = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ):
+        self.rate_limit_params = rate_limit_params
+        self.granted = threading.Event()
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+
+    def grant(self):
+        self.granted.set()
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class _RateLimitChannel:
+    def __init__(self, key: tuple):
+        self.key = key
+        self.lock = threading.Lock()
+        self.handles: dict[int, weakref.ref[RateLimiterHandle]] = {}
+        self.limiter: TokenBucketRateLimiter | None = None
+        # Waiting requests per handle, in the order the handles are served.
+        self._waiters: collections.OrderedDict[
+            int, collections.deque[_ChannelWaiter]
+        ] = collections.OrderedDict()
+
+    def _dispatch(self) -> float:
         """
-        Updates the maximum queries per second. This operation is thread-safe.
+        Grant the budget available now to the waiting requests, one handle after the other.
+        Idle handles take no turn, so a single busy handle gets the whole budget.
+        Returns how long until the next request can be granted, 0 if none is waiting.
         """
-        if max_qps <= 0:
-            raise ValueError("max_qps must be a positive number")
         with self.lock:
-            self.max_qps = max_qps
-            self.min_interval = 1.0 / max_qps
+            while self._waiters:
+                handle_id, waiters = next(iter(self._waiters.items()))
+                waiter = waiters[0]
+                wait_duration = self.limiter._try_reserve(waiter.rate_limit_params)
+                if wait_duration > 0:
+                    return wait_duration
+                waiters.popleft()
+                if waiters:
+                    self._waiters.move_to_end(handle_id)
+                else:
+                    del self._waiters[handle_id]
+                waiter.grant()
+            return 0.0
+
+    def _enqueue(self, handle_id: int, waiter: _ChannelWaiter):
+        with self.lock:
+            self._waiters.setdefault(handle_id, collections.deque()).append(waiter)
+
+    def _dequeue(self, handle_id: int, waiter: _ChannelWaiter):
+        with self.lock:
+            waiters = self._waiters.get(handle_id)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[handle_id]
+
+    def wait(self, handle_id: int, rate_limit_params: dict = None):
+        """Blocks until the channel grants the request of the handle."""
+        waiter = _ChannelWaiter(rate_limit_params)
+        self._enqueue(handle_id, waiter)
+        # Every waiter dispatches when the next request fits, no timer thread is needed.
+        while not waiter.granted.wait(self._dispatch()):
+            pass
+
+    async def async_wait(self, handle_id: int, rate_limit_params: dict = None):
+        """Asynchronous variant of :meth:`wait`."""
+        waiter = _ChannelWaiter(rate_limit_params, asyncio.get_running_loop())
+        self._enqueue(handle_id, waiter)
+        try:
+            while True:
+                wait_duration = self._dispatch()
+                if waiter.granted.is_set():
+                    return
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(asyncio.shield(waiter.future), wait_duration)
+        except asyncio.CancelledError:
+            self._dequeue(handle_id, waiter)
+            raise
+
+    def rebalance(self):
+        """
+        Size the channel budget to the largest limits requested by its handles. Each handle
+        is only capped by its own limits, the budget it does not use is left to the others.
+        """
+        with self.lock:
+            handles = [h for ref in self.handles.values() if (h := ref()) is not None]
+            if not handles:
+                return
+            max_qps = max(h.max_qps for h in handles)
+            tpms = [h.max_tpm for h in handles if h.max_tpm]
+            max_tpm = max(tpms) if tpms else None
+            burst = max(h.burst for h in handles)
+            if self.limiter is None:
+                self.limiter = TokenBucketRateLimiter(max_qps, max_tpm, burst)
+            else:
+                self.limiter.set_limits(max_qps, max_tpm, burst)
+            for h in handles:
+                h.share.set_limits(h.max_qps, h.max_tpm, h.burst)
+
+
+class RateLimiterRegistry:
+    """
+    Rate limiters keyed by channel: provider, base URL and API key.
+
+    Translators talking to the same channel share one budget, translators on different
+    channels do not throttle each other. Each translator holds a :class:`RateLimiterHandle`,
+    which is released by :meth:`RateLimiterHandle.close` or when it is garbage collected.
+    """
 
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: dict[tuple, _RateLimitChannel] = {}
 
-_translate_rate_limiter = RateLimiter(5)
+    @staticmethod
+    def channel_key(provider: str, base_url: str | None, api_key: str | None) -> tuple:
+        api_key_digest = (
+            hashlib.sha256(api_key.encode()).hexdigest() if api_key else None
+        )
+        return provider, (base_url or "").rstrip("/"), api_key_digest
+
+    def acquire(
+        self,
+        provider: str,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        max_qps: int = 4,
+        max_tpm: int | None = None,
+        burst: int = 1,
+    ) -> RateLimiterHandle:
+        key = self.channel_key(provider, base_url, api_key)
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = _RateLimitChannel(key)
+            handle = RateLimiterHandle(self, channel, max_qps, max_tpm, burst)
+            with channel.lock:
+                channel.handles[id(handle)] = weakref.ref(handle)
+        channel.rebalance()
+        return handle
 
+    def _release(self, channel: _RateLimitChannel, handle_id: int):
+        with self._lock:
+            with channel.lock:
+                channel.handles.pop(handle_id, None)
+                empty = not channel.handles
+            if empty and self._channels.get(channel.key) is channel:
+                del self._channels[channel.key]
+        channel.rebalance()
 
-def set_translate_rate_limiter(max_qps):
-    _translate_rate_limiter.set_max_qps(max_qps)
+
+rate_limiter_registry = RateLimiterRegistry()
+
+# Limiter of translators that are not bound to a channel of the registry.
+_translate_rate_limiter = TokenBucketRateLimiter(5)
+
+
+def set_translate_rate_limiter(max_qps, max_tpm=None, burst=1):
+    """Configure the limiter of translators that are not bound to a registry channel."""
+    _translate_rate_limiter.set_limits(max_qps, max_tpm, burst)
 
 
 class BaseTranslator(ABC):
@@ -81,6 +451,8 @@ class BaseTranslator(ABC):
     # cache.py: translate_engine = CharField(max_length=20)
     name = "base"
     lang_map = {}
+    # Whether do_translate_batch translates several texts with one request.
+    supports_batch_translate = False
 
     def __init__(self, lang_in, lang_out, ignore_cache):
         self.ignore_cache = ignore_cache
@@ -97,8 +469,18 @@ class BaseTranslator(ABC):
             },
         )
 
+        self.rate_limiter: TokenBucketRateLimiter | RateLimiterHandle = (
+            _translate_rate_limiter
+        )
+
         self.translate_call_count = 0
         self.translate_cache_call_count = 0
+        self.translate_dedup_call_count = 0
+        self.concurrency_limiter: AdaptiveConcurrencyLimiter | None = None
+        self.hedging_policy: HedgingPolicy | None = None
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.batch_collector: BatchRequestCollector | None = None
 
     def __del__(self):
         with contextlib.suppress(Exception):
@@ -108,6 +490,114 @@ class BaseTranslator(ABC):
             logger.info(
                 f"{self.name} translate cache call count: {self.translate_cache_call_count}",
             )
+            logger.info(
+                f"{self.name} translate dedup call count: {self.translate_dedup_call_count}",
+            )
+
+    def prefetch_cache(self, texts) -> dict[str, str]:
+        """
+        Resolve the cache entries of many texts with a few batched queries.
+        Hits are kept in the in-process cache, so the following translate/llm_translate calls
+        for these texts do not touch the database.
+        :param texts: texts (or LLM prompts) that are about to be translated
+        :return: mapping of text to cached translation for every hit
+        """
+        if self.ignore_cache:
+            return {}
+        try:
+            return self.cache.get_many(texts)
+        except Exception as e:
+            logger.debug(f"try prefetch cache failed, ignore it: {e}")
+            return {}
+
+    def set_rate_limits(self, max_qps: int, max_tpm: int | None = None, burst=1):
+        """
+        Configure the rate limits of this translator.
+        :param max_qps: maximum requests per second
+        :param max_tpm: maximum tokens per minute, None for no token budget
+        :param burst: number of requests that may be sent back to back
+        """
+        self.rate_limiter.set_limits(max_qps, max_tpm, burst)
+
+    def set_concurrency_limiter(self, limiter: AdaptiveConcurrencyLimiter | None):
+        """
+        Bound the number of in-flight requests of this translator, see AdaptiveConcurrencyLimiter.
+        :param limiter: the limiter, or None to admit every request
+        """
+        self.concurrency_limiter = limiter
+
+    def set_hedging_policy(self, policy: HedgingPolicy | None):
+        """
+        Hedge slow LLM requests, see HedgingPolicy. Streamed requests are not hedged.
+        :param policy: the policy, or None to send every request once
+        """
+        self.hedging_policy = policy
+
+    def _admit(self):
+        if self.concurrency_limiter is None:
+            return contextlib.nullcontext(AdmissionSample())
+        return self.concurrency_limiter.admit()
+
+    def _aadmit(self):
+        if self.concurrency_limiter is None:
+            return contextlib.nullcontext(AdmissionSample())
+        return self.concurrency_limiter.aadmit()
+
+    def report_rate_limited(self):
+        """Report a rate limit error of the provider to the rate and concurrency limiters."""
+        self.rate_limiter.on_rate_limited()
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.on_rate_limited()
+
+    def _defer_to_batch(self, kind: str, text, rate_limit_params: dict = None):
+        """
+        In batch API mode, collect the request of a cache miss instead of sending it.
+        :param kind: "translate" or "llm_translate"
+        :raises BatchRequestDeferredError: if the request was collected
+        """
+        if self.batch_collector is None:
+            return
+        body = self.build_batch_request(kind, text, rate_limit_params)
+        self.batch_collector.add(text, body)
+        raise BatchRequestDeferredError(f"{kind} request deferred to the batch API")
+
+    def build_batch_request(
+        self, kind: str, text, rate_limit_params: dict = None
+    ) -> dict:
+        """
+        Body of the chat completion request :meth:`do_translate` or
+        :meth:`do_llm_translate` would send, override this method to support the
+        batch API mode.
+        :param kind: "translate" or "llm_translate"
+        :param text: text to translate
+        :return: request body
+        """
+        raise NotImplementedError(f"{self.name} does not support the batch API")
+
+    def _join_flight(self, key: tuple[str, str]) -> tuple[Future, bool]:
+        """
+        Singleflight: identical requests in flight at the same time share one call.
+        :param key: request kind and text
+        :return: the future of the call, and whether the caller owns it and must resolve it
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.translate_dedup_call_count += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _finish_flight(
+        self, key: tuple[str, str], future: Future, translation=None, exception=None
+    ):
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(translation)
 
     def add_cache_impact_parameters(self, k: str, v):
         """
@@ -132,12 +622,43 @@ class BaseTranslator(ABC):
                     return cache
             except Exception as e:
                 logger.debug(f"try get cache failed, ignore it: {e}")
-        _translate_rate_limiter.wait()
-        translation = self.do_translate(text, rate_limit_params)
-        if not (self.ignore_cache or ignore_cache):
-            self.cache.set(text, translation)
+        self._defer_to_batch("translate", text, rate_limit_params)
+        flight, is_owner = self._join_flight(("translate", text))
+        if not is_owner:
+            return flight.result()
+        try:
+            with self._admit() as admission:
+                self.rate_limiter.wait(rate_limit_params)
+                admission.start()
+                translation = self.do_translate(text, rate_limit_params)
+            if not (self.ignore_cache or ignore_cache):
+                self.cache.set(text, translation)
+        except BaseException as e:
+            self._finish_flight(("translate", text), flight, exception=e)
+            raise
+        self._finish_flight(("translate", text), flight, translation)
         return translation
 
+    def translate_batch(
+        self, texts: list[str], ignore_cache=False, rate_limit_params: dict = None
+    ) -> list[str]:
+        """
+        Translate several texts. Services setting :attr:`supports_batch_translate`
+        translate them with one :meth:`do_translate_batch` request, the others
+        translate every text with :meth:`translate`.
+        :param texts: texts to translate
+        :return: translated texts, in the order of ``texts``
+        """
+        if not self.supports_batch_translate or self.batch_collector is not None:
+            return [
+                self.translate(text, ignore_cache, rate_limit_params) for text in texts
+            ]
+        self.translate_call_count += len(texts)
+        with self._admit() as admission:
+            self.rate_limiter.wait(rate_limit_params)
+            admission.start()
+            return self.do_translate_batch(texts, rate_limit_params)
+
     def llm_translate(self, text, ignore_cache=False, rate_limit_params: dict = None):
         """
         Translate the text, and the other part should call this method.
@@ -153,8 +674,18 @@ class BaseTranslator(ABC):
                     return cache
             except Exception as e:
                 logger.debug(f"try get cache failed, ignore it: {e}")
-        _translate_rate_limiter.wait()
-        translation = self.do_llm_translate(text, rate_limit_params)
+        self._defer_to_batch("llm_translate", text, rate_limit_params)
+        flight, is_owner = self._join_flight(("llm_translate", text))
+        if not is_owner:
+            return flight.result()
+        try:
+            with self._admit() as admission:
+                self.rate_limiter.wait(rate_limit_params)
+                admission.start()
+                translation = self.do_llm_translate(text, rate_limit_params)
+        except BaseException as e:
+            self._finish_flight(("llm_translate", text), flight, exception=e)
+            raise
         if not (self.ignore_cache or ignore_cache):
             try:
                 self.cache.set(text, translation)
@@ -162,8 +693,71 @@ class BaseTranslator(ABC):
                 logger.debug(
                     f"try set cache failed, ignore it: {e}, text: {text}, translation: {translation}"
                 )
+        self._finish_flight(("llm_translate", text), flight, translation)
         return translation
 
+    def llm_translate_stream(
+        self, text, ignore_cache=False, rate_limit_params: dict = None
+    ):
+        """
+        Streaming variant of :meth:`llm_translate`.
+        Cache hits and requests already in flight are yielded as one chunk.
+        The output is cached only if the stream completes.
+        :param text: text to translate
+        :return: iterator over chunks of the translated text
+        """
+        self.translate_call_count += 1
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                cache = self.cache.get(text)
+                if cache is not None:
+                    self.translate_cache_call_count += 1
+                    yield cache
+                    return
+            except Exception as e:
+                logger.debug(f"try get cache failed, ignore it: {e}")
+        self._defer_to_batch("llm_translate", text, rate_limit_params)
+        flight, is_owner = self._join_flight(("llm_translate", text))
+        if not is_owner:
+            yield flight.result()
+            return
+        chunks = []
+        try:
+            with self._admit() as admission:
+                self.rate_limiter.wait(rate_limit_params)
+                admission.start()
+                for chunk in self.do_llm_translate_stream(text, rate_limit_params):
+                    chunks.append(chunk)
+                    yield chunk
+        except GeneratorExit:
+            self._finish_flight(
+                ("llm_translate", text),
+                flight,
+                exception=RuntimeError("LLM stream closed before completion"),
+            )
+            raise
+        except BaseException as e:
+            self._finish_flight(("llm_translate", text), flight, exception=e)
+            raise
+        translation = "".join(chunks).strip()
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                self.cache.set(text, translation)
+            except Exception as e:
+                logger.debug(
+                    f"try set cache failed, ignore it: {e}, text: {text}, translation: {translation}"
+                )
+        self._finish_flight(("llm_translate", text), flight, translation)
+
+    def do_llm_translate_stream(self, text, rate_limit_params: dict = None):
+        """
+        Actual streaming translate text, override this method if the service can stream.
+        By default the whole output of :meth:`do_llm_translate` is yielded as one chunk.
+        :param text: text to translate
+        :return: iterator over chunks of the translated text
+        """
+        yield self.do_llm_translate(text, rate_limit_params)
+
     @abstractmethod
     def do_llm_translate(self, text, rate_limit_params: dict = None):
         """
@@ -173,6 +767,18 @@ class BaseTranslator(ABC):
         """
         raise NotImplementedError
 
+    def do_translate_batch(
+        self, texts: list[str], rate_limit_params: dict = None
+    ) -> list[str]:
+        """
+        Actual batch translate, override this method and set
+        :attr:`supports_batch_translate` if the service translates several texts per
+        request.
+        :param texts: texts to translate
+        :return: translated texts, in the order of ``texts``
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def do_translate(self, text, rate_limit_params: dict = None):
         """
@@ -200,6 +806,201 @@ class BaseTranslator(ABC):
         return self.get_rich_text_left_placeholder(placeholder_id)
 
 
+class AsyncBaseTranslator(BaseTranslator):
+    """
+    Base class for translators with native coroutine entry points.
+    The synchronous ``translate``/``llm_translate`` inherited from BaseTranslator keep working,
+    so code paths running on worker threads (e.g. the fallback ILTranslator) can still use it.
+    """
+
+    async def _aget_cache(self, text):
+        """Cache lookup that does not block the event loop.
+
+        Hits of the in-process LRU are returned inline, the SQLite lookup runs on a
+        worker thread since it may wait for the busy timeout. Writes only enqueue.
+        """
+        cache = self.cache.get_from_memory(text)
+        if cache is None:
+            cache = await asyncio.to_thread(self.cache.get, text)
+        return cache
+
+    async def atranslate(
+        self, text, ignore_cache=False, rate_limit_params: dict = None
+    ):
+        """
+        Asynchronous variant of :meth:`translate`.
+        :param text: text to translate
+        :return: translated text
+        """
+        self.translate_call_count += 1
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                cache = await self._aget_cache(text)
+                if cache is not None:
+                    self.translate_cache_call_count += 1
+                    return cache
+            except Exception as e:
+                logger.debug(f"try get cache failed, ignore it: {e}")
+        self._defer_to_batch("translate", text, rate_limit_params)
+        flight, is_owner = self._join_flight(("translate", text))
+        if not is_owner:
+            return await asyncio.wrap_future(flight)
+        try:
+            async with self._aadmit() as admission:
+                await self.rate_limiter.async_wait(rate_limit_params)
+                admission.start()
+                translation = await self.ado_translate(text, rate_limit_params)
+            if not (self.ignore_cache or ignore_cache):
+                self.cache.set(text, translation)
+        except BaseException as e:
+            self._finish_flight(("translate", text), flight, exception=e)
+            raise
+        self._finish_flight(("translate", text), flight, translation)
+        return translation
+
+    async def allm_translate(
+        self, text, ignore_cache=False, rate_limit_params: dict = None
+    ):
+        """
+        Asynchronous variant of :meth:`llm_translate`.
+        :param text: text to translate
+        :return: translated text
+        """
+        self.translate_call_count += 1
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                cache = await self._aget_cache(text)
+                if cache is not None:
+                    self.translate_cache_call_count += 1
+                    return cache
+            except Exception as e:
+                logger.debug(f"try get cache failed, ignore it: {e}")
+        self._defer_to_batch("llm_translate", text, rate_limit_params)
+        flight, is_owner = self._join_flight(("llm_translate", text))
+        if not is_owner:
+            return await asyncio.wrap_future(flight)
+        try:
+            async with self._aadmit() as admission:
+                await self.rate_limiter.async_wait(rate_limit_params)
+                admission.start()
+                translation = await self.ado_llm_translate(text, rate_limit_params)
+        except BaseException as e:
+            self._finish_flight(("llm_translate", text), flight, exception=e)
+            raise
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                self.cache.set(text, translation)
+            except Exception as e:
+                logger.debug(
+                    f"try set cache failed, ignore it: {e}, text: {text}, translation: {translation}"
+                )
+        self._finish_flight(("llm_translate", text), flight, translation)
+        return translation
+
+    async def allm_translate_stream(
+        self, text, ignore_cache=False, rate_limit_params: dict = None
+    ):
+        """
+        Asynchronous variant of :meth:`llm_translate_stream`.
+        :param text: text to translate
+        :return: async iterator over chunks of the translated text
+        """
+        self.translate_call_count += 1
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                cache = await self._aget_cache(text)
+                if cache is not None:
+                    self.translate_cache_call_count += 1
+                    yield cache
+                    return
+            except Exception as e:
+                logger.debug(f"try get cache failed, ignore it: {e}")
+        self._defer_to_batch("llm_translate", text, rate_limit_params)
+        flight, is_owner = self._join_flight(("llm_translate", text))
+        if not is_owner:
+            yield await asyncio.wrap_future(flight)
+            return
+        chunks = []
+        try:
+            async with self._aadmit() as admission:
+                await self.rate_limiter.async_wait(rate_limit_params)
+                admission.start()
+                async for chunk in self.ado_llm_translate_stream(
+                    text, rate_limit_params
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+        except GeneratorExit:
+            self._finish_flight(
+                ("llm_translate", text),
+                flight,
+                exception=RuntimeError("LLM stream closed before completion"),
+            )
+            raise
+        except BaseException as e:
+            self._finish_flight(("llm_translate", text), flight, exception=e)
+            raise
+        translation = "".join(chunks).strip()
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                self.cache.set(text, translation)
+            except Exception as e:
+                logger.debug(
+                    f"try set cache failed, ignore it: {e}, text: {text}, translation: {translation}"
+                )
+        self._finish_flight(("llm_translate", text), flight, translation)
+
+    async def ado_llm_translate_stream(self, text, rate_limit_params: dict = None):
+        """
+        Asynchronous variant of :meth:`do_llm_translate_stream`.
+        :param text: text to translate
+        :return: async iterator over chunks of the translated text
+        """
+        yield await self.ado_llm_translate(text, rate_limit_params)
+
+    @abstractmethod
+    async def ado_translate(self, text, rate_limit_params: dict = None):
+        """
+        Actual translate text, override this method
+        :param text: text to translate
+        :return: translated text
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def ado_llm_translate(self, text, rate_limit_params: dict = None):
+        """
+        Actual translate text, override this method
+        :param text: text to translate
+        :return: translated text
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release resources bound to the current event loop."""
+        return
+
+
+_retry_backoff = wait_exponential(multiplier=1, min=1, max=15)
+
+
+def _retry_on_endpoint_failure(retry_state) -> bool:
+    exception = retry_state.outcome.exception()
+    if isinstance(exception, openai.RateLimitError):
+        return True
+    # Other endpoint failures are only retried when another endpoint can take over.
+    pool: EndpointPool = retry_state.args[0].endpoint_pool
+    return is_endpoint_failure(exception) and len(pool) > 1 and pool.has_available()
+
+
+def _wait_before_retry(retry_state) -> float:
+    # Fail over to a healthy endpoint right away, back off when there is none.
+    pool: EndpointPool = retry_state.args[0].endpoint_pool
+    if len(pool) > 1 and pool.has_available():
+        return 0
+    return _retry_backoff(retry_state)
+
+
 class OpenAITranslator(BaseTranslator):
     # https://github.com/openai/openai-python
     name = "openai"
@@ -216,7 +1017,14 @@ class OpenAITranslator(BaseTranslator):
         send_dashscope_header=False,
         send_temperature=True,
         reasoning=None,
+        endpoints: list[dict] | None = None,
     ):
+        """
+        :param endpoints: additional endpoints serving the same model, as dicts with
+            ``base_url``, ``api_key`` and an optional ``weight`` (default 1). Requests
+            are balanced over ``base_url``/``api_key`` and these endpoints, see
+            :class:`EndpointPool`.
+        """
         super().__init__(lang_in, lang_out, ignore_cache)
         self.options = {"temperature": 0}  # 随机采样可能会打断公式标记
         self.extra_body = {}
@@ -226,16 +1034,30 @@ class OpenAITranslator(BaseTranslator):
         #     }
         #     self.add_cache_impact_parameters("reasoning-effort", 'minimal')
         self.reasoning = reasoning
-        self.client = openai.OpenAI(
-            base_url=base_url,
-            api_key=api_key,
-            http_client=httpx.Client(
-                limits=httpx.Limits(
-                    max_connections=None, max_keepalive_connections=None
-                ),
-                timeout=60,  # Set a reasonable timeout
-            ),
+        endpoint_configs = [{"base_url": base_url, "api_key": api_key}]
+        endpoint_configs.extend(endpoints or [])
+        # With several endpoints failed requests are retried on another endpoint
+        # instead of by the client against the same one.
+        max_retries = openai.DEFAULT_MAX_RETRIES if len(endpoint_configs) == 1 else 0
+        self.endpoint_pool = EndpointPool(
+            [
+                OpenAIEndpoint(
+                    config.get("base_url"),
+                    config.get("api_key"),
+                    weight=config.get("weight", 1.0),
+                    max_retries=max_retries,
+                )
+                for config in endpoint_configs
+            ]
         )
+        # The rate limits apply to the translator as a whole, the channel is shared by
+        # translators balancing over the same endpoints.
+        self.rate_limiter = rate_limiter_registry.acquire(
+            self.name,
+            "|".join((c.get("base_url") or "").rstrip("/") for c in endpoint_configs),
+            "|".join(c.get("api_key") or "" for c in endpoint_configs),
+        )
+        self.client = self.endpoint_pool.endpoints[0].client
         if send_temperature:
             self.add_cache_impact_parameters("temperature", self.options["temperature"])
         self.model = model
@@ -255,11 +1077,13 @@ class OpenAITranslator(BaseTranslator):
         self.prompt_token_count = AtomicInteger()
         self.completion_token_count = AtomicInteger()
         self.cache_hit_prompt_token_count = AtomicInteger()
+        self.cache_miss_prompt_token_count = AtomicInteger()
+        self.hedge_token_count = AtomicInteger()
 
     @retry(
-        retry=retry_if_exception_type(openai.RateLimitError),
+        retry=_retry_on_endpoint_failure,
         stop=stop_after_attempt(100),
-        wait=wait_exponential(multiplier=1, min=1, max=15),
+        wait=_wait_before_retry,
         before_sleep=before_sleep_log(logger, logging.WARNING),
     )
     def do_translate(self, text, rate_limit_params: dict = None) -> str:
@@ -267,13 +1091,18 @@ class OpenAITranslator(BaseTranslator):
         if self.send_temperature:
             options.update(self.options)
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            **options,
-            messages=self.prompt(text),
-            extra_body=self.extra_body,
-        )
-        self.update_token_count(response)
+        try:
+            with self.endpoint_pool.route() as endpoint:
+                response = endpoint.client.chat.completions.create(
+                    model=self.model,
+                    **options,
+                    messages=self.prompt(text),
+                    extra_body=self.extra_body,
+                )
+        except openai.RateLimitError:
+            self.report_rate_limited()
+            raise
+        self.record_response(response, rate_limit_params)
         return response.choices[0].message.content.strip()
 
     def prompt(self, text):
@@ -289,20 +1118,49 @@ class OpenAITranslator(BaseTranslator):
         ]
 
     @retry(
-        retry=retry_if_exception_type(openai.RateLimitError),
+        retry=_retry_on_endpoint_failure,
         stop=stop_after_attempt(100),
-        wait=wait_exponential(multiplier=1, min=1, max=15),
+        wait=_wait_before_retry,
         before_sleep=before_sleep_log(logger, logging.WARNING),
     )
     def do_llm_translate(self, text, rate_limit_params: dict = None):
         if text is None:
             return None
+        if self.hedging_policy is None:
+            return self._send_llm_request(text, rate_limit_params)
+        return self.hedging_policy.call(
+            lambda hedge: self._send_llm_request(text, rate_limit_params, hedge)
+        )
 
+    def _send_llm_request(
+        self, text, rate_limit_params: dict = None, hedge: bool = False
+    ) -> str:
+        # The original request was admitted by the caller, a hedge is extra traffic
+        # and waits for the rate limiter itself.
+        if hedge:
+            self.rate_limiter.wait(rate_limit_params)
+        try:
+            with self.endpoint_pool.route() as endpoint:
+                response = endpoint.client.chat.completions.create(
+                    **self._build_llm_request(text, rate_limit_params)
+                )
+            self.record_response(response, rate_limit_params, hedge=hedge)
+            return response.choices[0].message.content.strip()
+        except openai.RateLimitError:
+            self.report_rate_limited()
+            raise
+        except openai.BadRequestError as e:
+            self._raise_content_filter_error(e)
+            raise
+
+    def _build_llm_request(self, text, rate_limit_params: dict = None) -> dict:
         options = {}
         if self.send_temperature:
             options.update(self.options)
-        if self.enable_json_mode_if_requested and rate_limit_params.get(
-            "request_json_mode", False
+        if (
+            self.enable_json_mode_if_requested
+            and rate_limit_params
+            and rate_limit_params.get("request_json_mode", False)
         ):
             options["response_format"] = {"type": "json_object"}
 
@@ -311,49 +1169,128 @@ class OpenAITranslator(BaseTranslator):
             extra_headers["X-DashScope-DataInspection"] = (
                 '{"input": "disable", "output": "disable"}'
             )
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+        return {
+            "model": self.model,
+            **options,
+            "max_tokens": 2048,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": text,
+                },
+            ],
+            "extra_headers": extra_headers,
+            "extra_body": self.extra_body,
+        }
+
+    def build_batch_request(
+        self, kind: str, text, rate_limit_params: dict = None
+    ) -> dict:
+        if kind == "translate":
+            options = {}
+            if self.send_temperature:
+                options.update(self.options)
+            request = {
+                "model": self.model,
                 **options,
-                max_tokens=2048,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": text,
-                    },
-                ],
-                extra_headers=extra_headers,
-                extra_body=self.extra_body,
-            )
-            self.update_token_count(response)
-            return response.choices[0].message.content.strip()
+                "messages": self.prompt(text),
+                "extra_body": self.extra_body,
+            }
+        else:
+            request = self._build_llm_request(text, rate_limit_params)
+            # Headers cannot be set per request of a batch.
+            request.pop("extra_headers")
+        extra_body = request.pop("extra_body", None) or {}
+        return {**request, **extra_body}
+
+    @staticmethod
+    def _raise_content_filter_error(e: openai.BadRequestError):
+        if (
+            "系统检测到输入或生成内容可能包含不安全或敏感内容，请您避免输入易产生敏感内容的提示语，感谢您的配合。"
+            in e.message
+        ):
+            raise ContentFilterError(e.message) from e
+
+    @retry(
+        retry=_retry_on_endpoint_failure,
+        stop=stop_after_attempt(100),
+        wait=_wait_before_retry,
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    def _create_llm_stream(self, text, rate_limit_params: dict = None):
+        # The endpoint is held until the response headers arrive, the time to first
+        # byte is what its latency tracking sees of a stream.
+        try:
+            with self.endpoint_pool.route() as endpoint:
+                return endpoint.client.chat.completions.create(
+                    **self._build_llm_request(text, rate_limit_params),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+        except openai.RateLimitError:
+            self.report_rate_limited()
+            raise
         except openai.BadRequestError as e:
-            if (
-                "系统检测到输入或生成内容可能包含不安全或敏感内容，请您避免输入易产生敏感内容的提示语，感谢您的配合。"
-                in e.message
-            ):
-                raise ContentFilterError(e.message) from e
-            else:
-                raise
+            self._raise_content_filter_error(e)
+            raise
+
+    def do_llm_translate_stream(self, text, rate_limit_params: dict = None):
+        # Rate limit errors are raised when the request is made, so only the
+        # creation of the stream is retried.
+        stream = self._create_llm_stream(text, rate_limit_params)
+        last_chunk = None
+        with stream:
+            for chunk in stream:
+                last_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        # With include_usage the last chunk carries the usage of the whole request.
+        self.record_response(last_chunk, rate_limit_params)
+
+    def report_rate_limited(self):
+        # While other endpoints are available the circuit breakers move the load
+        # away from the rate limited one, the translator keeps its pace.
+        if len(self.endpoint_pool) > 1 and self.endpoint_pool.has_available():
+            return
+        super().report_rate_limited()
+
+    def record_response(
+        self, response, rate_limit_params: dict = None, hedge: bool = False
+    ):
+        """
+        Account the token usage of a successful response.
+        :param hedge: the response answers a duplicate request sent by the hedging
+            policy, its tokens are also counted in ``hedge_token_count``
+        """
+        usage = getattr(response, "usage", None)
+        if usage:
+            self.update_token_count(response)
+            if hedge and usage.total_tokens:
+                self.hedge_token_count.inc(usage.total_tokens)
+        total_tokens = usage.total_tokens if usage else None
+        self.rate_limiter.on_success(rate_limit_params, total_tokens)
 
     def update_token_count(self, response):
         try:
-            if response.usage and response.usage.total_tokens:
-                self.token_count.inc(response.usage.total_tokens)
-            if response.usage and response.usage.prompt_tokens:
-                self.prompt_token_count.inc(response.usage.prompt_tokens)
-            if response.usage and response.usage.completion_tokens:
-                self.completion_token_count.inc(response.usage.completion_tokens)
-            # Support both response.usage.prompt_cache_hit_tokens and response.prompt_tokens_details.cached_tokens
-            hit_count = 0
-            if response.usage and hasattr(response.usage, "prompt_cache_hit_tokens"):
-                hit_count = getattr(response.usage, "prompt_cache_hit_tokens", 0)
-            if hasattr(response, "prompt_tokens_details") and getattr(
-                response.prompt_tokens_details, "cached_tokens", 0
-            ):
-                hit_count += getattr(response.prompt_tokens_details, "cached_tokens", 0)
+            usage = response.usage
+            if usage and usage.total_tokens:
+                self.token_count.inc(usage.total_tokens)
+            if usage and usage.completion_tokens:
+                self.completion_token_count.inc(usage.completion_tokens)
+            if not usage or not usage.prompt_tokens:
+                return
+            self.prompt_token_count.inc(usage.prompt_tokens)
+            # OpenAI reports the cached prefix in usage.prompt_tokens_details.cached_tokens,
+            # DeepSeek in usage.prompt_cache_hit_tokens.
+            details = getattr(usage, "prompt_tokens_details", None)
+            hit_count = getattr(details, "cached_tokens", None) or getattr(
+                usage, "prompt_cache_hit_tokens", None
+            )
+            hit_count = min(int(hit_count or 0), usage.prompt_tokens)
             if hit_count:
                 self.cache_hit_prompt_token_count.inc(hit_count)
+            if usage.prompt_tokens > hit_count:
+                self.cache_miss_prompt_token_count.inc(usage.prompt_tokens - hit_count)
         except Exception as e:
             logger.exception("Error updating token count")
 
@@ -369,3 +1306,107 @@ class OpenAITranslator(BaseTranslator):
 
     def get_rich_text_right_placeholder(self, placeholder_id: int | str):
         return "</style>", r"<\s*\/\s*style\s*>"
+
+
+class AsyncOpenAITranslator(AsyncBaseTranslator, OpenAITranslator):
+    """
+    OpenAITranslator driven by ``openai.AsyncOpenAI``.
+    All coroutines running on the same event loop share one ``httpx.AsyncClient`` per endpoint,
+    so hundreds of requests can be in flight without one OS thread each.
+    The blocking client of OpenAITranslator is kept for synchronous callers.
+    """
+
+    name = "openai"
+
+    async def aclose(self):
+        await self.endpoint_pool.aclose()
+
+    @retry(
+        retry=_retry_on_endpoint_failure,
+        stop=stop_after_attempt(100),
+        wait=_wait_before_retry,
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    async def ado_translate(self, text, rate_limit_params: dict = None) -> str:
+        options = {}
+        if self.send_temperature:
+            options.update(self.options)
+
+        try:
+            with self.endpoint_pool.route() as endpoint:
+                response = await endpoint.get_async_client().chat.completions.create(
+                    model=self.model,
+                    **options,
+                    messages=self.prompt(text),
+                    extra_body=self.extra_body,
+                )
+        except openai.RateLimitError:
+            self.report_rate_limited()
+            raise
+        self.record_response(response, rate_limit_params)
+        return response.choices[0].message.content.strip()
+
+    @retry(
+        retry=_retry_on_endpoint_failure,
+        stop=stop_after_attempt(100),
+        wait=_wait_before_retry,
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    async def ado_llm_translate(self, text, rate_limit_params: dict = None):
+        if text is None:
+            return None
+        if self.hedging_policy is None:
+            return await self._asend_llm_request(text, rate_limit_params)
+        return await self.hedging_policy.acall(
+            lambda hedge: self._asend_llm_request(text, rate_limit_params, hedge)
+        )
+
+    async def _asend_llm_request(
+        self, text, rate_limit_params: dict = None, hedge: bool = False
+    ) -> str:
+        if hedge:
+            await self.rate_limiter.async_wait(rate_limit_params)
+        try:
+            with self.endpoint_pool.route() as endpoint:
+                response = await endpoint.get_async_client().chat.completions.create(
+                    **self._build_llm_request(text, rate_limit_params)
+                )
+            self.record_response(response, rate_limit_params, hedge=hedge)
+            return response.choices[0].message.content.strip()
+        except openai.RateLimitError:
+            self.report_rate_limited()
+            raise
+        except openai.BadRequestError as e:
+            self._raise_content_filter_error(e)
+            raise
+
+    @retry(
+        retry=_retry_on_endpoint_failure,
+        stop=stop_after_attempt(100),
+        wait=_wait_before_retry,
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    async def _acreate_llm_stream(self, text, rate_limit_params: dict = None):
+        try:
+            with self.endpoint_pool.route() as endpoint:
+                return await endpoint.get_async_client().chat.completions.create(
+                    **self._build_llm_request(text, rate_limit_params),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+        except openai.RateLimitError:
+            self.report_rate_limited()
+            raise
+        except openai.BadRequestError as e:
+            self._raise_content_filter_error(e)
+            raise
+
+    async def ado_llm_translate_stream(self, text, rate_limit_params: dict = None):
+        stream = await self._acreate_llm_stream(text, rate_limit_params)
+        last_chunk = None
+        async with stream:
+            async for chunk in stream:
+                last_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        self.record_response(last_chunk, rate_limit_params)
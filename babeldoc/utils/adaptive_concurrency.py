@@ -0,0 +1,208 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionSample:
+    """Timing and outcome of one admitted request."""
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.error = False
+
+    def start(self):
+        """Restart the latency clock, e.g. after waiting for the rate limiter."""
+        self.start_time = time.monotonic()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of in-flight requests of a translator and adapts the limit at runtime.
+
+    The limit follows AIMD driven by latency, like the concurrency limiters of RPC stacks:
+
+    - every request completing while the limit is in use raises it by ``1 / limit``,
+      i.e. by one per round trip;
+    - when the smoothed latency exceeds ``latency_tolerance`` times the best latency seen
+      recently, requests are queueing at the provider and the limit shrinks by
+      ``backoff_ratio``;
+    - a rate limit error halves the limit.
+
+    Requests above the limit wait for a slot, from threads (:meth:`admit`) as well as from
+    coroutines (:meth:`aadmit`).
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.9,
+        smoothing: float = 0.1,
+        baseline_window: int = 500,
+    ):
+        if min_limit < 1:
+            raise ValueError("min_limit must be at least 1")
+        if max_limit is None:
+            max_limit = max(initial_limit, min_limit)
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError("initial_limit must be between min_limit and max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.smoothing = smoothing
+        self.baseline_window = baseline_window
+
+        self._condition = threading.Condition()
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._smoothed_latency = None
+        self._min_latency = None
+        self._window_min_latency = None
+        self._window_samples = 0
+        self._last_decrease = 0.0
+
+        self.request_count = 0
+        self.error_count = 0
+        self.rejected_count = 0
+        self.rate_limited_count = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def _try_acquire(self) -> bool:
+        if self._in_flight < self.limit:
+            self._in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        with self._condition:
+            if self._try_acquire():
+                return
+            self.rejected_count += 1
+            while not self._try_acquire():
+                self._condition.wait()
+
+    async def async_acquire(self):
+        loop = asyncio.get_running_loop()
+        rejected = False
+        while True:
+            with self._condition:
+                if self._try_acquire():
+                    return
+                if not rejected:
+                    self.rejected_count += 1
+                    rejected = True
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def _wake_waiters(self):
+        """Wake up everyone waiting for a slot. Must be called with the lock held."""
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(_set_waiter_result, waiter)
+
+    def release(self, sample: AdmissionSample):
+        latency = time.monotonic() - sample.start_time
+        with self._condition:
+            limit_in_use = self._in_flight >= self.limit
+            self._in_flight -= 1
+            self.request_count += 1
+            if sample.error:
+                self.error_count += 1
+            else:
+                self._update_limit(latency, limit_in_use)
+            self._wake_waiters()
+
+    def _update_limit(self, latency: float, limit_in_use: bool):
+        if self._smoothed_latency is None:
+            self._smoothed_latency = latency
+        else:
+            self._smoothed_latency += self.smoothing * (
+                latency - self._smoothed_latency
+            )
+        # The baseline is the best latency of the previous window, so that it can follow
+        # the provider when it gets slower for good.
+        if self._window_min_latency is None or latency < self._window_min_latency:
+            self._window_min_latency = latency
+        if self._min_latency is None or latency < self._min_latency:
+            self._min_latency = latency
+        self._window_samples += 1
+        if self._window_samples >= self.baseline_window:
+            self._min_latency = self._window_min_latency
+            self._window_min_latency = None
+            self._window_samples = 0
+
+        now = time.monotonic()
+        if self._smoothed_latency > self.latency_tolerance * self._min_latency:
+            # Decrease at most once per round trip, the requests in flight were all
+            # admitted under the old limit.
+            if now - self._last_decrease > self._smoothed_latency:
+                self._last_decrease = now
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        elif limit_in_use:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def on_rate_limited(self):
+        with self._condition:
+            self.rate_limited_count += 1
+            now = time.monotonic()
+            if now - self._last_decrease > 1.0:
+                self._last_decrease = now
+                self._limit = max(self.min_limit, self._limit / 2)
+
+    @contextlib.contextmanager
+    def admit(self):
+        """Wait for a slot and hold it for the duration of the block."""
+        self.acquire()
+        sample = AdmissionSample()
+        try:
+            yield sample
+        except BaseException:
+            sample.error = True
+            raise
+        finally:
+            self.release(sample)
+
+    @contextlib.asynccontextmanager
+    async def aadmit(self):
+        """Asynchronous variant of :meth:`admit`."""
+        await self.async_acquire()
+        sample = AdmissionSample()
+        try:
+            yield sample
+        except BaseException:
+            sample.error = True
+            raise
+        finally:
+            self.release(sample)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "concurrency_limit": self.limit,
+                "in_flight": self._in_flight,
+                "latency_ms": round((self._smoothed_latency or 0) * 1000),
+                "min_latency_ms": round((self._min_latency or 0) * 1000),
+                "requests": self.request_count,
+                "errors": self.error_count,
+                "rejected": self.rejected_count,
+                "rate_limited": self.rate_limited_count,
+            }
+
+
+def _set_waiter_result(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
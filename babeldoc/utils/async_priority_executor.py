@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import logging
+import random
+import sys
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPriorityExecutor:
+    """
+    Executor that runs coroutine functions on a private event loop thread.
+
+    It mirrors the ``submit(fn, *args, priority=..., **kwargs)`` interface of
+    PriorityThreadPoolExecutor (lowest priority first), but ``fn`` must be a
+    coroutine function and ``max_workers`` bounds the number of coroutines in
+    flight instead of the number of OS threads.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ""):
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix or f"{self}"
+        self._counter = itertools.count()
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self._all_future: list[Future] = []
+        self._on_shutdown = []
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            name=f"{self._thread_name_prefix}_loop",
+            target=self._run_loop,
+            daemon=True,
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._workers = [
+            self._loop.create_task(self._worker()) for _ in range(self._max_workers)
+        ]
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    async def _worker(self):
+        while True:
+            _priority, _count, item = await self._queue.get()
+            try:
+                if item is None:
+                    return
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                    if not isinstance(e, Exception):
+                        raise
+                else:
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def add_shutdown_callback(self, async_fn):
+        """Register a coroutine function awaited on the loop before it stops,
+        e.g. to close HTTP clients bound to this loop."""
+        self._on_shutdown.append(async_fn)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Schedule ``fn(*args, **kwargs)`` on the event loop.
+
+        Added keyword:
+
+        - priority (integer later sys.maxsize)
+        """
+        priority = kwargs.pop("priority", random.randint(0, sys.maxsize - 1))  # noqa: S311
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            f = Future()
+            entry = (priority, next(self._counter), (f, fn, args, kwargs))
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, entry)
+            self._all_future.append(f)
+            return f
+
+    async def _drain(self):
+        await self._queue.join()
+        for _ in self._workers:
+            self._queue.put_nowait((sys.maxsize, next(self._counter), None))
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for callback in self._on_shutdown:
+            try:
+                await callback()
+            except Exception as e:
+                logger.warning("Exception in shutdown callback %s: %s", callback, e)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        logger.debug("Shutting down executor %s", self._thread_name_prefix)
+        with self._shutdown_lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+        if cancel_futures:
+            for f in self._all_future:
+                f.cancel()
+        drained = asyncio.run_coroutine_threadsafe(self._drain(), self._loop)
+        drained.add_done_callback(
+            lambda _: self._loop.call_soon_threadsafe(self._loop.stop)
+        )
+        if wait:
+            drained.result()
+            self._thread.join()
+        logger.debug("shutdown finish %s", self._thread_name_prefix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+        return False
+
+    def __del__(self):
+        for f in self._all_future:
+            if f.done() and not f.cancelled():
+                try:
+                    f.result()
+                except Exception as e:
+                    logger.warning("Exception in future %s: %s", f, e, exc_info=True)
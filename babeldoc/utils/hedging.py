@@ -0,0 +1,198 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgingPolicy:
+    """
+    Hedged requests: a request still running after the ``percentile`` of the recently
+    observed latencies is sent a second time, and the first successful answer wins.
+
+    A few slow completions otherwise decide when a page, and at the end of a job the
+    whole translation, is done. The duplicate goes through the endpoint pool of the
+    translator like any request, so it usually lands on another endpoint than the
+    straggler. Hedges are capped at ``max_ratio`` of the requests and only start once
+    ``min_samples`` latencies are known; the delay never drops below ``min_delay``.
+
+    The request is a callable taking ``hedge``, which tells the duplicate apart for
+    token accounting. :meth:`call` runs it from threads, :meth:`acall` from coroutines.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_ratio: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        min_delay: float = 1.0,
+        max_workers: int = 256,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if not 0 <= max_ratio <= 1:
+            raise ValueError("max_ratio must be between 0 and 1")
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._executor: ThreadPoolExecutor | None = None
+
+        self.request_count = 0
+        self.hedge_count = 0
+        self.hedge_win_count = 0
+
+    def delay(self) -> float | None:
+        """Time after which a request is hedged, None while too few latencies are known."""
+        with self._lock:
+            if len(self._latencies) < max(self.min_samples, 1):
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def record_latency(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _start_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def try_acquire_hedge(self) -> bool:
+        """Take a hedge from the budget of ``max_ratio`` hedges per request."""
+        with self._lock:
+            if self.hedge_count + 1 > self.max_ratio * self.request_count:
+                return False
+            self.hedge_count += 1
+            return True
+
+    def _record_win(self):
+        with self._lock:
+            self.hedge_win_count += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="babeldoc-hedge"
+                )
+            return self._executor
+
+    def _track_latency(self, start: float):
+        def done(future):
+            if not future.cancelled() and future.exception() is None:
+                self.record_latency(time.monotonic() - start)
+
+        return done
+
+    def call(self, request: Callable[[bool], T]) -> T:
+        """Run ``request(hedge=False)``, hedged with ``request(hedge=True)`` if slow."""
+        self._start_request()
+        delay = self.delay()
+        start = time.monotonic()
+        if delay is None:
+            result = request(False)
+            self.record_latency(time.monotonic() - start)
+            return result
+
+        # The request runs on a worker thread so that the caller can give up waiting
+        # for it; a hedged straggler finishes in the background.
+        executor = self._get_executor()
+        primary = executor.submit(request, False)
+        primary.add_done_callback(self._track_latency(start))
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.try_acquire_hedge():
+            return primary.result()
+
+        logger.debug(f"Hedging a request running for more than {delay:.1f}s")
+        hedge = executor.submit(request, True)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._record_win()
+                    return future.result()
+            if not pending:
+                # Both failed, report the error of the original request.
+                return primary.result()
+
+    async def acall(self, request: Callable[[bool], Awaitable[T]]) -> T:
+        """Asynchronous variant of :meth:`call`, the losing request is cancelled."""
+        self._start_request()
+        delay = self.delay()
+        start = time.monotonic()
+        if delay is None:
+            result = await request(False)
+            self.record_latency(time.monotonic() - start)
+            return result
+
+        primary = asyncio.ensure_future(request(False))
+        primary.add_done_callback(self._track_latency(start))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.try_acquire_hedge():
+                return await primary
+
+            logger.debug(f"Hedging a request running for more than {delay:.1f}s")
+            hedge = asyncio.ensure_future(request(True))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._record_win()
+                        return task.result()
+                if not pending:
+                    return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    task.add_done_callback(_consume_exception)
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        with self._lock:
+            return {
+                "requests": self.request_count,
+                "hedges": self.hedge_count,
+                "hedge_wins": self.hedge_win_count,
+                "hedge_delay_ms": round(delay * 1000) if delay is not None else None,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _consume_exception(task: asyncio.Future):
+    # Errors of cancelled losers are not interesting, and must not be logged as
+    # never retrieved.
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        task.exception()
@@ -0,0 +1,76 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parses the objects of a JSON array while the array text is still arriving.
+
+    :meth:`feed` accepts arbitrary chunks of the text and returns the objects that were
+    completed by the chunk. Anything before the opening ``[`` (e.g. a markdown code fence)
+    is skipped. A bare top-level object instead of an array is returned as a single item.
+    Items that are not valid JSON are logged and skipped.
+    """
+
+    def __init__(self):
+        self._buffer: list[str] = []
+        self._collecting = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Nesting depth at which items start: 1 inside an array, 0 for a bare object.
+        self._item_depth = None
+        self._finished = False
+
+    def feed(self, chunk: str) -> list:
+        items = []
+        for char in chunk:
+            if self._finished:
+                break
+            if self._item_depth is None:
+                if char == "[":
+                    self._item_depth = self._depth = 1
+                elif char == "{":
+                    self._item_depth = self._depth = 0
+                if char != "{":
+                    continue
+
+            if self._collecting:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._depth == self._item_depth:
+                    self._collecting = True
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._collecting and self._depth == self._item_depth:
+                    self._collecting = False
+                    item = self._parse_item("".join(self._buffer))
+                    if item is not None:
+                        items.append(item)
+                    self._finished = self._item_depth == 0
+                elif self._depth < self._item_depth:
+                    self._finished = True
+        return items
+
+    @staticmethod
+    def _parse_item(text: str):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skip invalid item in streamed JSON array: {e}")
+            return None
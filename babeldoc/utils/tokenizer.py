@@ -0,0 +1,112 @@
+import logging
+import threading
+from collections import OrderedDict
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKENIZER_MODEL = "gpt-4o"
+
+
+class Tokenizer:
+    """
+    Token counting shared by all stages of the process.
+
+    The encoding is loaded on first use. Exact counts are memoized per text hash in a
+    bounded LRU, so paragraphs counted again for batching, scheduling priorities and
+    rate limiting are only encoded once. :meth:`approx_count` estimates the count
+    from the UTF-8 length without encoding at all.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_TOKENIZER_MODEL,
+        max_entries: int = 65536,
+        encoding: tiktoken.Encoding | None = None,
+    ):
+        self.model = model
+        self.max_entries = max_entries
+        self._encoding = encoding
+        self._lock = threading.Lock()
+        # Keyed by hash(text) instead of the text, so cached counts do not keep
+        # whole paragraphs alive.
+        self._counts: OrderedDict[int, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        if self._encoding is None:
+            with self._lock:
+                if self._encoding is None:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+        return self._encoding
+
+    def encode(self, text: str) -> list[int]:
+        return self.encoding.encode(text, disallowed_special=())
+
+    def count(self, text: str | None, cache: bool = True) -> int:
+        """Exact token count of ``text``, 0 if it cannot be encoded."""
+        if not text:
+            return 0
+        key = hash(text)
+        if cache:
+            with self._lock:
+                count = self._counts.get(key)
+                if count is not None:
+                    self._counts.move_to_end(key)
+                    self.hits += 1
+                    return count
+                self.misses += 1
+        try:
+            count = len(self.encode(text))
+        except Exception:
+            return 0
+        if cache:
+            with self._lock:
+                self._counts[key] = count
+                if len(self._counts) > self.max_entries:
+                    self._counts.popitem(last=False)
+        return count
+
+    @staticmethod
+    def approx_count(text: str | None) -> int:
+        """
+        Rough token count for heuristics: one token per 4 bytes of UTF-8, i.e. 4
+        characters of English or about one per CJK character.
+        """
+        if not text:
+            return 0
+        return (len(text.encode("utf-8", "surrogatepass")) + 3) // 4
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._counts),
+            }
+
+
+_tokenizer: Tokenizer | None = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer() -> Tokenizer:
+    """The process-wide :class:`Tokenizer`."""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = Tokenizer()
+    return _tokenizer
+
+
+def as_tokenizer(tokenizer=None) -> Tokenizer:
+    """Wrap a tiktoken encoding passed by a caller, or return the shared tokenizer."""
+    if tokenizer is None:
+        return get_tokenizer()
+    if isinstance(tokenizer, Tokenizer):
+        return tokenizer
+    return Tokenizer(encoding=tokenizer)
@@ -12,7 +12,6 @@ from babeldoc.format.pdf.translation_config import TranslationConfig
 from babeldoc.format.pdf.translation_config import WatermarkOutputMode
 from babeldoc.progress_monitor import ProgressMonitor
 from babeldoc.translator.translator import OpenAITranslator
-from babeldoc.translator.translator import set_translate_rate_limiter
 
 from backend.config import Settings
 from backend.events import EVENT_STORE
@@ -254,7 +253,7 @@ def _prepare_config(
     working_dir = job_dir / "_working"
     working_dir.mkdir(parents=True, exist_ok=True)
 
-    set_translate_rate_limiter(max(qps, 1))
+    translator.set_rate_limits(max(qps, 1))
 
     config = TranslationConfig(
         input_file=str(input_path),
@@ -369,14 +368,19 @@ def run_translation_job(
             def _finish_callback(**_kwargs):
                 return
 
-            with ProgressMonitor(
-                get_translation_stage(config),
-                progress_change_callback=_progress_callback,
-                finish_callback=_finish_callback,
-                cancel_event=cancel_event,
-                report_interval=config.report_interval,
-            ) as pm:
-                result = do_translate(pm, config)
+            try:
+                with ProgressMonitor(
+                    get_translation_stage(config),
+                    progress_change_callback=_progress_callback,
+                    finish_callback=_finish_callback,
+                    cancel_event=cancel_event,
+                    report_interval=config.report_interval,
+                ) as pm:
+                    result = do_translate(pm, config)
+            finally:
+                # Hand the rate limit share of this job back to the other
+                # jobs running on the same channel.
+                translator.rate_limiter.close()
         except CancelledError:
             update_job_status(settings, record.id, "canceled", error="canceled")
             EVENT_STORE.append_event(
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+from babeldoc.utils.adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_limit_grows_under_load_and_is_enforced():
+    """Requests never exceed the limit, which grows while latency stays flat."""
+    limiter = AdaptiveConcurrencyLimiter(2, max_limit=6)
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def task():
+        nonlocal in_flight, peak
+        with limiter.admit():
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                assert in_flight <= limiter.max_limit
+            time.sleep(0.005)
+            with lock:
+                in_flight -= 1
+
+    threads = [threading.Thread(target=task) for _ in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = limiter.stats()
+    assert stats["concurrency_limit"] == 6
+    assert stats["requests"] == 100
+    assert stats["rejected"] > 0
+    assert peak <= 6
+
+
+def test_rate_limit_and_errors():
+    """Rate limit errors halve the limit, other errors are only counted."""
+    limiter = AdaptiveConcurrencyLimiter(8)
+    try:
+        with limiter.admit():
+            raise ValueError
+    except ValueError:
+        pass
+    assert limiter.stats()["errors"] == 1
+    assert limiter.limit == 8
+
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.limit == 4
+    assert limiter.stats()["rate_limited"] == 2
+
+
+def test_async_admission():
+    """Coroutines wait for a slot without blocking the event loop."""
+    limiter = AdaptiveConcurrencyLimiter(3)
+    in_flight = 0
+    peak = 0
+
+    async def task():
+        nonlocal in_flight, peak
+        async with limiter.aadmit():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+    async def main():
+        await asyncio.gather(*[task() for _ in range(30)])
+
+    asyncio.run(main())
+    assert peak == 3
+    assert limiter.stats()["in_flight"] == 0
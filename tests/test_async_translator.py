@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+import pytest
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import configure_memory_cache
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.translator import AsyncBaseTranslator
+from babeldoc.utils.async_priority_executor import AsyncPriorityExecutor
+
+
+class _UpperTranslator(AsyncBaseTranslator):
+    name = "async_upper"
+
+    def __init__(self):
+        super().__init__("en", "zh", False)
+        self.requests = []
+
+    async def ado_translate(self, text, rate_limit_params=None):
+        self.requests.append(text)
+        return text.upper()
+
+    async def ado_llm_translate(self, text, rate_limit_params=None):
+        return await self.ado_translate(text, rate_limit_params)
+
+    def do_translate(self, text, rate_limit_params=None):
+        raise NotImplementedError
+
+    def do_llm_translate(self, text, rate_limit_params=None):
+        raise NotImplementedError
+
+
+def _blocker(release: threading.Event):
+    async def block():
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+
+    return block
+
+
+def test_executor_runs_lowest_priority_first():
+    """Queued coroutines start by priority, ties in submission order."""
+    release = threading.Event()
+    order = []
+
+    async def record(name):
+        order.append(name)
+
+    with AsyncPriorityExecutor(max_workers=1) as executor:
+        executor.submit(_blocker(release), priority=0)
+        for name, priority in (("c", 3), ("a", 1), ("b1", 2), ("b2", 2)):
+            executor.submit(record, name, priority=priority)
+        release.set()
+    assert order == ["a", "b1", "b2", "c"]
+
+
+def test_executor_shutdown_cancels_queued_futures_and_drains():
+    """cancel_futures drops the queued work, the running one finishes and the
+    shutdown callbacks are awaited on the loop."""
+    release = threading.Event()
+    ran = []
+    closed = []
+
+    async def record(name):
+        ran.append(name)
+
+    async def close():
+        closed.append(True)
+
+    executor = AsyncPriorityExecutor(max_workers=1)
+    executor.add_shutdown_callback(close)
+    running = executor.submit(_blocker(release), priority=0)
+    queued = [executor.submit(record, i, priority=1) for i in range(3)]
+    timer = threading.Timer(0.1, release.set)
+    timer.start()
+    executor.shutdown(wait=True, cancel_futures=True)
+    timer.join()
+
+    assert running.result() is None
+    assert all(future.cancelled() for future in queued)
+    assert ran == []
+    assert closed == [True]
+    with pytest.raises(RuntimeError):
+        executor.submit(record, "late")
+
+
+def test_atranslate_cache_does_not_block_the_loop():
+    """Misses are translated once, hits come from memory inline or from SQLite on a
+    worker thread."""
+    test_db = init_test_db()
+    try:
+        translator = _UpperTranslator()
+        lookup_threads = []
+        cache_get = translator.cache.get
+
+        def get(text):
+            lookup_threads.append(threading.current_thread())
+            return cache_get(text)
+
+        translator.cache.get = get
+
+        async def run():
+            loop_thread = threading.current_thread()
+            assert await translator.atranslate("hello") == "HELLO"
+            assert await translator.atranslate("hello") == "HELLO"
+            assert translator.requests == ["hello"]
+            # The first lookup missed the memory tier and went to SQLite.
+            assert len(lookup_threads) == 1
+            assert lookup_threads[0] is not loop_thread
+
+            flush_cache_writes()
+            configure_memory_cache(max_entries=0)
+            configure_memory_cache(max_entries=10)
+            assert await translator.atranslate("hello") == "HELLO"
+            assert translator.requests == ["hello"]
+            assert len(lookup_threads) == 2
+            assert lookup_threads[1] is not loop_thread
+
+        asyncio.run(run())
+        assert translator.translate_cache_call_count == 2
+    finally:
+        configure_memory_cache(max_entries=20_000)
+        clean_test_db(test_db)
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from babeldoc.babeldoc_exception.BabelDOCException import BatchJobPendingError
+from babeldoc.babeldoc_exception.BabelDOCException import BatchRequestDeferredError
+from babeldoc.translator.batch import BatchJob
+from babeldoc.translator.batch import BatchRequestCollector
+from babeldoc.translator.batch import LocalFilesystemBatchBackend
+from babeldoc.translator.batch import raise_if_requests_deferred
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.translator import OpenAITranslator
+
+
+@pytest.fixture
+def test_db():
+    test_db = init_test_db()
+    yield test_db
+    clean_test_db(test_db)
+
+
+def _upper(body: dict) -> str:
+    return body["messages"][-1]["content"].upper()
+
+
+@pytest.mark.usefixtures("test_db")
+def test_cache_misses_are_deferred_and_answered_from_the_batch(tmp_path):
+    """Each round defers the cache misses, the next one translates them from the cache."""
+    translator = OpenAITranslator("en", "zh", "gpt-4o-mini", api_key="key")
+    translator.add_cache_impact_parameters("prompt", "test_batch")
+    backend = LocalFilesystemBatchBackend(tmp_path / "batches")
+    job = BatchJob(tmp_path / "job", backend)
+    translators = {"translator": translator}
+
+    collector = BatchRequestCollector()
+    translator.batch_collector = collector
+    for text in ("hello", "world", "hello"):
+        with pytest.raises(BatchRequestDeferredError):
+            translator.llm_translate(text)
+    assert len(collector) == 2
+    with pytest.raises(BatchJobPendingError):
+        raise_if_requests_deferred(translator, translator)
+    job.submit({"translator": collector}, translators)
+
+    # A new process resumes from the state file.
+    job = BatchJob(tmp_path / "job", backend)
+    assert job.round == 1
+    assert not job.collect_results(translators)
+    (request_file,) = (tmp_path / "job" / "round-1").glob("*.requests.jsonl")
+    lines = [json.loads(line) for line in request_file.read_text().splitlines()]
+    assert {line["url"] for line in lines} == {"/v1/chat/completions"}
+    assert "extra_headers" not in lines[0]["body"]
+    backend.complete(job.state["submissions"][0]["batch_id"], _upper)
+    assert job.collect_results(translators)
+
+    translator.batch_collector = BatchRequestCollector()
+    assert translator.llm_translate("hello") == "HELLO"
+    assert translator.llm_translate("world") == "WORLD"
+    raise_if_requests_deferred(translator)
+
+
+@pytest.mark.usefixtures("test_db")
+def test_rounds_without_progress_fail(tmp_path):
+    """Requests the batch does not answer are not submitted forever."""
+    translator = OpenAITranslator("en", "zh", "gpt-4o-mini", api_key="key")
+    translator.add_cache_impact_parameters("prompt", "test_batch_errors")
+
+    def fail(_body):
+        raise ValueError("invalid request")
+
+    backend = LocalFilesystemBatchBackend(tmp_path / "batches", responder=fail)
+    job = BatchJob(tmp_path / "job", backend)
+    translators = {"translator": translator}
+    for _ in range(2):
+        collector = BatchRequestCollector()
+        translator.batch_collector = collector
+        with pytest.raises(BatchRequestDeferredError):
+            translator.translate("hello")
+        if job.round:
+            with pytest.raises(RuntimeError):
+                job.submit({"translator": collector}, translators)
+        else:
+            job.submit({"translator": collector}, translators)
+            assert job.collect_results(translators)
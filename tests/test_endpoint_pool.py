@@ -0,0 +1,83 @@
+import httpx
+import openai
+from babeldoc.translator.endpoint_pool import EndpointPool
+from babeldoc.translator.endpoint_pool import OpenAIEndpoint
+
+
+def _status_error(status_code: int) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://example.com/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def _pool(*weights: float, cooldown: float = 5.0) -> EndpointPool:
+    return EndpointPool(
+        [
+            OpenAIEndpoint(
+                f"https://e{i}.example.com/v1", "key", weight, cooldown=cooldown
+            )
+            for i, weight in enumerate(weights)
+        ]
+    )
+
+
+def test_routes_to_least_loaded_endpoint_by_weight():
+    """In-flight requests are spread in proportion to the weights."""
+    pool = _pool(1, 3)
+    held = [pool.acquire() for _ in range(8)]
+    assert [e.in_flight for e in pool.endpoints] == [2, 6]
+    for endpoint in held:
+        pool.release(endpoint, 0.1)
+    assert [e.in_flight for e in pool.endpoints] == [0, 0]
+
+    # A slow endpoint gets less traffic than its weight alone would give it.
+    pool.endpoints[1].latency = 1.0
+    pool.endpoints[0].latency = 0.1
+    assert pool.acquire() is pool.endpoints[0]
+
+
+def test_circuit_opens_on_repeated_failures_and_recovers():
+    """A failing endpoint is skipped during its cooldown and probed afterwards."""
+    pool = _pool(1, 1, cooldown=60)
+    bad, good = pool.endpoints
+    bad.in_flight += 1
+    pool.release(bad, error=_status_error(503))
+    # A failure makes the endpoint less attractive before its circuit opens.
+    assert bad.state == bad.CLOSED
+    endpoint = pool.acquire()
+    assert endpoint is good
+    pool.release(endpoint, 1.0)
+    for _ in range(2):
+        bad.in_flight += 1
+        pool.release(bad, error=_status_error(429))
+    assert bad.state == bad.OPEN
+    assert all(pool.acquire() is good for _ in range(5))
+
+    # Once the cooldown is over a single probe is let through.
+    bad.open_until = 0
+    for endpoint in pool.endpoints:
+        endpoint.in_flight = 0
+    good.latency = 10.0
+    probe = pool.acquire()
+    assert probe is bad
+    assert bad.state == bad.HALF_OPEN
+    assert pool.acquire() is good
+    pool.release(probe, 0.1)
+    assert bad.state == bad.CLOSED
+
+
+def test_rejected_requests_do_not_trip_the_circuit():
+    """Client errors mean the endpoint answered, they do not count as failures."""
+    pool = _pool(1)
+    (endpoint,) = pool.endpoints
+    for _ in range(5):
+        pool.release(pool.acquire(), error=_status_error(400))
+    assert endpoint.state == endpoint.CLOSED
+    assert endpoint.failure_count == 0
+
+    # With every circuit open the endpoint retried first is still used.
+    for _ in range(3):
+        pool.release(pool.acquire(), error=_status_error(500))
+    assert endpoint.state == endpoint.OPEN
+    assert not pool.has_available()
+    assert pool.acquire() is endpoint
@@ -0,0 +1,50 @@
+import threading
+from types import SimpleNamespace
+
+from babeldoc.glossary import Glossary
+from babeldoc.glossary import GlossaryEntry
+from babeldoc.glossary import GlossaryMatchIndex
+
+
+def _paragraph(debug_id, text):
+    return SimpleNamespace(debug_id=debug_id, unicode=text)
+
+
+def test_paragraphs_are_scanned_once_per_glossary():
+    """Lookups of indexed paragraphs merge their entries without scanning again."""
+    glossary = Glossary(
+        "terms",
+        [GlossaryEntry("neural network", "神经网络"), GlossaryEntry("GPU", "GPU")],
+    )
+    paragraphs = [
+        _paragraph("a", "A Neural  Network runs on a GPU."),
+        _paragraph("b", "Another neural network."),
+        _paragraph("c", "Nothing here."),
+    ]
+    index = GlossaryMatchIndex()
+    index.index_document(
+        SimpleNamespace(page=[SimpleNamespace(pdf_paragraph=paragraphs)]), [glossary]
+    )
+    assert index.scan_count == 3
+
+    assert index.get_active_entries(paragraphs[1:], [glossary]) == {
+        "terms": [("neural network", "神经网络")]
+    }
+    assert index.get_active_entries(paragraphs, [glossary]) == {
+        "terms": [("GPU", "GPU"), ("neural network", "神经网络")]
+    }
+    assert index.get_active_entries(paragraphs[2:], [glossary]) == {}
+    assert index.scan_count == 3
+
+
+def test_scratch_is_reused_per_thread():
+    glossary = Glossary("terms", [GlossaryEntry("GPU", "GPU")])
+    assert glossary.get_active_entries_for_text("a GPU") == [("GPU", "GPU")]
+    scratch = glossary._get_scratch(0)
+    assert glossary._get_scratch(0) is scratch
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(glossary._get_scratch(0)))
+    thread.start()
+    thread.join()
+    assert other[0] is not scratch
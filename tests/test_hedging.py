@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from babeldoc.utils.hedging import HedgingPolicy
+
+
+def _warm_up(policy, latency=0.01, count=20):
+    for _ in range(count):
+        policy.call(lambda _hedge: None)
+        policy.record_latency(latency)
+
+
+def test_delay_and_budget():
+    """No hedging before enough samples, then at most max_ratio hedges."""
+    policy = HedgingPolicy(percentile=90, max_ratio=0.1, min_samples=10, min_delay=0)
+    assert policy.delay() is None
+    for latency in range(1, 11):
+        policy.record_latency(latency / 10)
+    assert policy.delay() == 1.0
+    policy.request_count = 10
+    assert policy.try_acquire_hedge()
+    assert not policy.try_acquire_hedge()
+    policy.request_count = 20
+    assert policy.try_acquire_hedge()
+
+
+def test_slow_request_is_hedged_and_first_answer_wins():
+    """The hedge answers while the original request is stuck."""
+    policy = HedgingPolicy(max_ratio=1.0, min_samples=5, min_delay=0)
+    _warm_up(policy)
+    release = threading.Event()
+
+    def request(hedge):
+        if hedge:
+            return "hedge"
+        release.wait(5)
+        return "primary"
+
+    try:
+        assert policy.call(request) == "hedge"
+    finally:
+        release.set()
+    stats = policy.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+    policy.shutdown()
+
+
+def test_async_loser_is_cancelled():
+    """Coroutines do not finish the losing request."""
+    policy = HedgingPolicy(max_ratio=1.0, min_samples=1, min_delay=0)
+    policy.record_latency(0.01)
+    cancelled = []
+
+    async def request(hedge):
+        if hedge:
+            return "hedge"
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    async def run():
+        result = await policy.acall(request)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "hedge"
+    assert cancelled == [True]
@@ -0,0 +1,41 @@
+import json
+
+from babeldoc.utils.incremental_json import IncrementalJSONArrayParser
+
+ITEMS = [
+    {"id": 0, "output": 'braces {v1} and "quotes" ]}[ \\'},
+    {"id": 1, "output": "nested", "extra": [1, {"a": 2}]},
+    {"id": 2, "output": "中文"},
+]
+
+
+def _feed_in_chunks(text: str, size: int) -> list:
+    parser = IncrementalJSONArrayParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i : i + size]))
+    return items
+
+
+def test_items_are_returned_as_soon_as_complete():
+    """Every chunking of the text yields the same items, in order."""
+    text = "```json\n" + json.dumps(ITEMS, ensure_ascii=False, indent=2) + "\n```"
+    for size in (1, 2, 3, 7, len(text)):
+        assert _feed_in_chunks(text, size) == ITEMS
+
+
+def test_truncated_stream_keeps_completed_items():
+    """Items completed before the text is cut off are kept."""
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    truncated = text[: text.index('{"id": 2') + 10]
+    assert _feed_in_chunks(truncated, 4) == ITEMS[:2]
+
+
+def test_bare_object_and_invalid_items():
+    """A bare object is a single item; invalid items are skipped."""
+    parser = IncrementalJSONArrayParser()
+    assert parser.feed('{"id": 0, "output": "x"} {"id": 1}') == [
+        {"id": 0, "output": "x"}
+    ]
+    parser = IncrementalJSONArrayParser()
+    assert parser.feed('[{"id": 0}, {bad}, {"id": 2}]') == [{"id": 0}, {"id": 2}]
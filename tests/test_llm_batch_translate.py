@@ -0,0 +1,308 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from babeldoc.format.pdf.document_il import PdfParagraph
+from babeldoc.format.pdf.document_il.midend import il_translator_llm_only
+from babeldoc.format.pdf.document_il.midend.il_translator import ILTranslator
+from babeldoc.format.pdf.document_il.midend.il_translator import PageTranslateTracker
+from babeldoc.format.pdf.document_il.midend.il_translator_llm_only import BatchParagraph
+from babeldoc.format.pdf.document_il.midend.il_translator_llm_only import (
+    BatchTranslateContext,
+)
+from babeldoc.format.pdf.document_il.midend.il_translator_llm_only import (
+    ILTranslatorLLMOnly,
+)
+from babeldoc.format.pdf.translation_config import SharedContextCrossSplitPart
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.translator import BaseTranslator
+from babeldoc.translator.translator import OpenAITranslator
+
+
+def _translate(items):
+    return json.dumps(
+        [{"id": item["id"], "output": f"译 {item['input']}"} for item in items]
+    )
+
+
+class _LLMEngine(BaseTranslator):
+    """Answers batch prompts with ``respond(items)``, records the inputs of every request."""
+
+    name = "fake_llm"
+
+    def __init__(self, respond=_translate):
+        super().__init__("en", "zh", False)
+        self.respond = respond
+        self.requests = []
+
+    def do_translate(self, text, rate_limit_params=None):
+        raise NotImplementedError
+
+    def do_llm_translate(self, text, rate_limit_params=None):
+        if text is None:
+            return None
+        items = json.loads(text.split("## Here is the input:\n\n", 1)[1])
+        self.requests.append([item["input"] for item in items])
+        return self.respond(items)
+
+
+class _WordEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+class _Executor:
+    """Runs the submitted tasks when :meth:`run` is called."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args, priority=None, **kwargs):
+        self.tasks.append((fn, args, kwargs))
+
+    def run(self):
+        while self.tasks:
+            fn, args, kwargs = self.tasks.pop(0)
+            fn(*args, **kwargs)
+
+
+@pytest.fixture
+def test_db():
+    test_db = init_test_db()
+    yield test_db
+    clean_test_db(test_db)
+
+
+@pytest.fixture
+def make_translator(monkeypatch):
+    """ILTranslatorLLMOnly without fonts: the simple translator only records fallbacks."""
+
+    def make(engine, prompt_prefix_caching=False):
+        fallbacks = []
+
+        def pre_translate_paragraph(paragraph, *_args):
+            return paragraph.unicode, ILTranslator.TranslateInput(paragraph.unicode, [])
+
+        def post_translate_paragraph(paragraph, _tracker, _input, translated_text):
+            paragraph.unicode = translated_text
+
+        simple_translator = SimpleNamespace(
+            pre_translate_paragraph=pre_translate_paragraph,
+            post_translate_paragraph=post_translate_paragraph,
+            translate_paragraph=lambda paragraph, *_args, **_kwargs: fallbacks.append(
+                paragraph.debug_id
+            ),
+        )
+        monkeypatch.setattr(il_translator_llm_only, "FontMapper", lambda _config: None)
+        monkeypatch.setattr(
+            il_translator_llm_only, "ILTranslator", lambda **_kwargs: simple_translator
+        )
+        shared_context = SharedContextCrossSplitPart()
+        shared_context.initialize_glossaries([])
+        config = SimpleNamespace(
+            shared_context_cross_split_part=shared_context,
+            llm_batch_max_tokens=200,
+            llm_batch_max_paragraphs=5,
+            llm_batch_across_pages=False,
+            auto_extract_glossary=False,
+            custom_system_prompt=None,
+            translation_memory_threshold=None,
+            translation_memory_reuse_threshold=None,
+            raise_if_cancelled=lambda: None,
+            llm_streaming=False,
+            add_formula_placehold_hint=False,
+            disable_same_text_fallback=True,
+            prompt_prefix_caching=prompt_prefix_caching,
+            lang_out="zh",
+        )
+        translator = ILTranslatorLLMOnly(engine, config, tokenizer=_WordEncoding())
+        translator.fallbacks = fallbacks
+        return translator
+
+    return make
+
+
+def _batch(executor, *texts, local_title=None):
+    paragraphs = [
+        PdfParagraph(debug_id=f"{text}#{i}", unicode=text, layout_label="text")
+        for i, text in enumerate(texts)
+    ]
+    return BatchTranslateContext(
+        BatchParagraph(paragraphs, [None] * len(paragraphs), PageTranslateTracker()),
+        SimpleNamespace(advance=lambda _n=1: None),
+        {},
+        {},
+        None,
+        local_title,
+        executor,
+        sum(len(text.split()) for text in texts),
+        0,
+    )
+
+
+def _unicodes(ctx):
+    return [paragraph.unicode for paragraph in ctx.batch_paragraph.paragraphs]
+
+
+@pytest.mark.usefixtures("test_db")
+def test_mixed_batch_sends_only_the_paragraph_cache_misses(make_translator):
+    """Cached paragraphs are applied directly, the others are sent in one request
+    and every translation ends up in the paragraph cache."""
+    engine = _LLMEngine()
+    translator = make_translator(engine)
+    executor = _Executor()
+    ctx = _batch(executor, "cached text", "new text one", "new text two")
+    translator._collect_batch_inputs(ctx)
+    keys = list(ctx.paragraph_cache_keys)
+    translator.paragraph_cache.set(keys[0], "缓存")
+    translator._collect_batch_inputs = lambda _ctx: None
+
+    translator._pending_batches = [ctx]
+    translator.flush_pending_batches(executor)
+    executor.run()
+
+    assert engine.requests == [["new text one", "new text two"]]
+    assert _unicodes(ctx) == ["缓存", "译 new text one", "译 new text two"]
+    flush_cache_writes()
+    assert translator.paragraph_cache.get_many(keys) == dict(
+        zip(keys, _unicodes(ctx), strict=True)
+    )
+
+
+@pytest.mark.usefixtures("test_db")
+@pytest.mark.parametrize("leader_fails", [False, True])
+def test_duplicates_in_flight_are_sent_once(make_translator, leader_fails):
+    """A paragraph already in flight in another batch waits for its translation, or
+    falls back to simple translation along with it."""
+
+    def respond(items):
+        if leader_fails and any(item["input"] == "Repeated header" for item in items):
+            raise ValueError("boom")
+        return _translate(items)
+
+    engine = _LLMEngine(respond)
+    translator = make_translator(engine)
+    executor = _Executor()
+    leader = _batch(executor, "Repeated header", "first body")
+    follower = _batch(executor, "Repeated header", "second body")
+
+    translator._pending_batches = [leader, follower]
+    translator.flush_pending_batches(executor)
+    executor.run()
+
+    assert engine.requests == [
+        ["Repeated header", "first body"],
+        ["second body"],
+    ]
+    assert translator.dedup_count == 1
+    assert not translator._inflight_paragraphs
+    if leader_fails:
+        assert translator.fallbacks == [
+            "Repeated header#0",
+            "first body#1",
+            "Repeated header#0",
+        ]
+        assert _unicodes(follower) == ["Repeated header", "译 second body"]
+    else:
+        assert translator.fallbacks == []
+        assert _unicodes(leader)[0] == _unicodes(follower)[0] == "译 Repeated header"
+
+
+def test_prompt_prefix_is_shared_by_every_batch(make_translator):
+    """With prefix caching, batches differ only after the stable prefix."""
+    translator = make_translator(_LLMEngine(), prompt_prefix_caching=True)
+    title = PdfParagraph(debug_id="title", unicode="Document title")
+    prompts = []
+    for texts, local_title in (
+        (("alpha paragraph",), None),
+        (("beta paragraph", "gamma paragraph"), "Chapter two"),
+    ):
+        ctx = _batch(
+            None,
+            *texts,
+            local_title=local_title
+            and PdfParagraph(debug_id=local_title, unicode=local_title),
+        )
+        ctx.title_paragraph = title
+        translator._collect_batch_inputs(ctx)
+        prompts.append(translator._build_batch_prompt(ctx))
+
+    prefixes = [prompt.split("# Current Batch", 1)[0].encode() for prompt in prompts]
+    assert prefixes[0] == prefixes[1]
+    assert b"Document title" in prefixes[0]
+    encoded = [prompt.encode() for prompt in prompts]
+    assert os.path.commonprefix(encoded).startswith(prefixes[0])
+    assert b"Chapter two" in encoded[1][len(prefixes[1]) :]
+
+
+@pytest.mark.usefixtures("test_db")
+def test_prompt_token_count_splits_cached_prefix():
+    """Cached prompt tokens are read from the OpenAI and the DeepSeek usage fields."""
+    translator = OpenAITranslator(
+        "en", "zh", "gpt-test", base_url="http://localhost", api_key="key"
+    )
+    for usage in (
+        SimpleNamespace(
+            total_tokens=150,
+            completion_tokens=50,
+            prompt_tokens=100,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=80),
+        ),
+        SimpleNamespace(
+            total_tokens=60,
+            completion_tokens=10,
+            prompt_tokens=50,
+            prompt_cache_hit_tokens=30,
+        ),
+        SimpleNamespace(
+            total_tokens=30,
+            completion_tokens=10,
+            prompt_tokens=20,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=None),
+        ),
+    ):
+        translator.update_token_count(SimpleNamespace(usage=usage))
+
+    assert translator.prompt_token_count.value == 170
+    assert translator.cache_hit_prompt_token_count.value == 110
+    assert translator.cache_miss_prompt_token_count.value == 60
+    assert translator.token_count.value == 240
+
+
+@pytest.mark.usefixtures("test_db")
+def test_malformed_output_is_bisected(make_translator):
+    """Complete paragraphs of a malformed output are kept, the missing ones are sent
+    again in halves, and a paragraph failing on its own falls back."""
+    responses = [
+        # Truncated after paragraph 0
+        lambda _items: '[{"id": 0, "output": "译 p zero"}, {"id": 1, "outp',
+        _translate,
+        lambda _items: "not json",
+    ]
+    engine = _LLMEngine(lambda items: responses.pop(0)(items))
+    translator = make_translator(engine)
+    executor = _Executor()
+    ctx = _batch(executor, "p zero", "p one", "p two", "p three")
+
+    translator._pending_batches = [ctx]
+    translator.flush_pending_batches(executor)
+    executor.run()
+
+    assert engine.requests == [
+        ["p zero", "p one", "p two", "p three"],
+        ["p one", "p two"],
+        ["p three"],
+    ]
+    assert _unicodes(ctx) == ["译 p zero", "译 p one", "译 p two", "p three"]
+    assert translator.fallbacks == ["p three#3"]
+    assert translator.recovery_stats() == {
+        "fake_llm": {
+            "malformed_batches": 2,
+            "salvaged_paragraphs": 1,
+            "retry_batches": 2,
+            "fallback_paragraphs": 1,
+        }
+    }
@@ -0,0 +1,37 @@
+from babeldoc.format.pdf.document_il.utils.paragraph_packer import ParagraphGroup
+from babeldoc.format.pdf.document_il.utils.paragraph_packer import ParagraphPacker
+
+
+def _group(name, token_count, size=1):
+    return ParagraphGroup([name] * size, [None] * size, [None] * size, token_count)
+
+
+def _names(batches):
+    return [[p for group in batch for p in group.paragraphs] for batch in batches]
+
+
+def test_batches_end_with_the_page_by_default():
+    """A batch is closed past a budget and at the end of every page."""
+    packer = ParagraphPacker(max_tokens=100, max_paragraphs=2)
+    assert packer.add(_group("a", 10)) == []
+    assert packer.add(_group("b", 10)) == []
+    assert _names(packer.add(_group("c", 10))) == [["a", "b", "c"]]
+    assert _names(packer.add(_group("d", 150))) == [["d"]]
+    packer.add(_group("e", 10))
+    assert _names(packer.end_page()) == [["e"]]
+    assert packer.flush() == []
+
+
+def test_packing_across_pages_keeps_order_and_groups():
+    """Sparse pages share batches, a split paragraph stays in one batch."""
+    packer = ParagraphPacker(max_tokens=100, max_paragraphs=4, across_pages=True)
+    batches = []
+    for page in (["a"], ["b"], ["c"]):
+        for name in page:
+            batches += packer.add(_group(name, 10))
+        batches += packer.end_page()
+    assert batches == []
+    batches += packer.add(_group("split", 20, size=2))
+    assert _names(batches) == [["a", "b", "c", "split", "split"]]
+    packer.add(_group("d", 10))
+    assert _names(packer.flush()) == [["d"]]
@@ -0,0 +1,91 @@
+import asyncio
+import gc
+
+from babeldoc.translator.translator import RateLimiterRegistry
+from babeldoc.translator.translator import TokenBucketRateLimiter
+from babeldoc.translator.translator import _ChannelWaiter
+
+
+def test_token_bucket_backs_off_and_recovers():
+    """Rate limit errors halve the rate once per storm, successes restore it."""
+    limiter = TokenBucketRateLimiter(10, max_tpm=6000, burst=2)
+    assert limiter._reserve() <= 0
+    assert limiter._reserve() <= 0
+    assert limiter._reserve() > 0
+
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.rate_scale == 0.5
+    assert limiter.rate_limited_count == 2
+    for _ in range(25):
+        limiter.on_success()
+    assert limiter.rate_scale == 1.0
+
+
+def test_token_bucket_waits_for_token_budget():
+    """Requests wait once the token budget of the minute is used up."""
+    limiter = TokenBucketRateLimiter(1000, max_tpm=600)
+    assert limiter._reserve({"paragraph_token_count": 300}) <= 0
+    # 10 tokens per second refill, the bucket is 20 tokens in debt now.
+    wait = limiter._reserve({"paragraph_token_count": 10})
+    assert 1.9 < wait <= 2.0
+
+
+def test_registry_shares_channel_budget():
+    """Handles on one channel share its budget, other channels are independent."""
+    registry = RateLimiterRegistry()
+    a = registry.acquire("openai", "https://example.com/v1/", "key", max_qps=8)
+    b = registry.acquire("openai", "https://example.com/v1", "key", max_qps=4)
+    other = registry.acquire("openai", "https://example.com/v1", "other", max_qps=4)
+
+    assert a.channel is b.channel
+    assert a.channel is not other.channel
+    assert a.channel.limiter.max_qps == 8
+    assert a.share.max_qps == 8
+    assert b.share.max_qps == 4
+    assert other.share.max_qps == 4
+
+    b.close()
+    assert a.channel.limiter.max_qps == 8
+    a.set_limits(2)
+    assert a.channel.limiter.max_qps == 2
+
+    del a
+    gc.collect()
+    assert len(registry._channels) == 1
+
+
+def test_channel_grants_waiting_handles_in_turn():
+    """Waiting handles are served round robin, a lone handle gets the whole budget."""
+    registry = RateLimiterRegistry()
+    a = registry.acquire("openai", "https://example.com/v1", "key", max_qps=1, burst=4)
+    b = registry.acquire("openai", "https://example.com/v1", "key", max_qps=1, burst=4)
+    channel = a.channel
+    granted = []
+
+    def queue(handle, name):
+        waiter = _ChannelWaiter()
+        waiter.grant = lambda: granted.append(name)
+        channel._enqueue(id(handle), waiter)
+
+    for i in range(3):
+        queue(a, f"a{i}")
+    for i in range(2):
+        queue(b, f"b{i}")
+    assert channel._dispatch() > 0
+    assert granted == ["a0", "b0", "a1", "b1"]
+
+    # b is idle now, the next request of a is granted as soon as the budget allows.
+    channel.limiter._request_level = 1.0
+    assert channel._dispatch() == 0
+    assert granted[-1] == "a2"
+
+
+def test_channel_wait_and_async_wait():
+    """Requests within the burst are granted without waiting."""
+    registry = RateLimiterRegistry()
+    handle = registry.acquire("openai", None, "key", max_qps=100, burst=3)
+    handle.wait()
+    asyncio.run(handle.async_wait())
+    assert not handle.channel._waiters
+    assert handle.channel.limiter._request_level < 2
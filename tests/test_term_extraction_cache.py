@@ -0,0 +1,88 @@
+import json
+from types import SimpleNamespace
+
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    AutomaticTermExtractor,
+)
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    BatchParagraph,
+)
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    PageTermExtractTracker,
+)
+from babeldoc.format.pdf.translation_config import SharedContextCrossSplitPart
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import init_test_db
+
+
+class _TermTranslator:
+    """Answers every extraction prompt with the terms of the paragraphs it contains."""
+
+    name = "terms"
+    ignore_cache = False
+
+    def __init__(self, model):
+        self.cache = TranslationCache(self.name, {"model": model})
+        self.prompts = []
+
+    def llm_translate(self, prompt, rate_limit_params=None):
+        self.prompts.append(prompt)
+        terms = []
+        if "neural network" in prompt:
+            terms.append({"src": "neural network", "tgt": "神经网络"})
+        if "BabelDOC" in prompt:
+            terms.append({"src": "BabelDOC", "tgt": "BabelDOC"})
+        return json.dumps(terms)
+
+
+def _extract(translator, texts):
+    shared_context = SharedContextCrossSplitPart()
+    shared_context.initialize_glossaries([])
+    config = SimpleNamespace(
+        shared_context_cross_split_part=shared_context,
+        lang_out="zh",
+        raise_if_cancelled=lambda: None,
+    )
+    extractor = AutomaticTermExtractor(translator, config)
+    batch = BatchParagraph(
+        [SimpleNamespace(unicode=text) for text in texts], PageTermExtractTracker()
+    )
+    extractor.extract_terms_from_paragraphs(
+        batch, SimpleNamespace(advance=lambda _n: None)
+    )
+    return shared_context.raw_extracted_terms
+
+
+def test_terms_are_cached_per_paragraph_and_model():
+    """Batches of known paragraphs skip the LLM, whatever the batching."""
+    test_db = init_test_db()
+    try:
+        translator = _TermTranslator("model-a")
+        first = "A neural network translates BabelDOC pages."
+        second = "Nothing to see here."
+        assert _extract(translator, [first, second]) == [
+            ("neural network", "神经网络"),
+            ("BabelDOC", "BabelDOC"),
+        ]
+        assert len(translator.prompts) == 1
+
+        # Known paragraphs come from the cache, only the new one is sent.
+        assert _extract(translator, [second, "Another neural network."]) == [
+            ("neural network", "神经网络")
+        ]
+        assert len(translator.prompts) == 2
+        assert first not in translator.prompts[1]
+        assert second not in translator.prompts[1]
+        assert _extract(translator, [first]) == [
+            ("neural network", "神经网络"),
+            ("BabelDOC", "BabelDOC"),
+        ]
+        assert len(translator.prompts) == 2
+
+        # Another model extracts again.
+        other = _TermTranslator("model-b")
+        _extract(other, [first])
+        assert len(other.prompts) == 1
+    finally:
+        clean_test_db(test_db)
@@ -0,0 +1,58 @@
+import threading
+from types import SimpleNamespace
+
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    BatchParagraph,
+)
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    PageTermExtractTracker,
+)
+from babeldoc.format.pdf.document_il.midend.automatic_term_extractor import (
+    TermExtractionPipeline,
+)
+from babeldoc.format.pdf.translation_config import SharedContextCrossSplitPart
+
+
+class _Extractor:
+    """Extracts one term per page, pages finish when their event is set."""
+
+    def __init__(self, page_count):
+        self.shared_context = SharedContextCrossSplitPart()
+        self.shared_context.initialize_glossaries([])
+        self.translation_config = SimpleNamespace(raise_if_cancelled=lambda: None)
+        self.pipeline = None
+        self.release = [threading.Event() for _ in range(page_count)]
+
+    def procress(self, doc_il, record_token_usage=True):
+        tracker = PageTermExtractTracker()
+        for page_index in range(len(doc_il.page)):
+            self.pipeline.page_submitted(page_index, 1)
+        for page_index in range(len(doc_il.page)):
+            self.release[page_index].wait(5)
+            batch = BatchParagraph([], tracker, page_index, 0)
+            self.pipeline.batch_finished(batch, [(f"term{page_index}", "术语")])
+
+
+def test_pages_wait_for_the_lookahead_and_get_fixed_glossaries():
+    """Page N is translated with the terms of pages up to N + lookahead only."""
+    extractor = _Extractor(3)
+    pipeline = TermExtractionPipeline(
+        extractor, SimpleNamespace(page=[None] * 3), lookahead=1
+    )
+    pipeline.start()
+    try:
+        assert not pipeline.is_ready(0)
+        extractor.release[0].set()
+        extractor.release[1].set()
+        (glossary,) = pipeline.wait_for_page(0)
+        assert [e.source for e in glossary.entries] == ["term0", "term1"]
+        assert not pipeline.is_ready(1)
+        extractor.release[2].set()
+        (glossary,) = pipeline.wait_for_page(1)
+        assert [e.source for e in glossary.entries] == ["term0", "term1", "term2"]
+        assert pipeline.wait_for_page(2) == [glossary]
+    finally:
+        for event in extractor.release:
+            event.set()
+        pipeline.join()
+    assert extractor.pipeline is None
@@ -0,0 +1,43 @@
+from babeldoc.utils.tokenizer import Tokenizer
+from babeldoc.utils.tokenizer import as_tokenizer
+from babeldoc.utils.tokenizer import get_tokenizer
+
+
+class _WordEncoding:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return text.split()
+
+
+def test_counts_are_memoized_and_bounded():
+    """Each text is encoded once while it stays in the LRU."""
+    encoding = _WordEncoding()
+    tokenizer = Tokenizer(encoding=encoding, max_entries=2)
+    assert tokenizer.count("a b c") == 3
+    assert tokenizer.count("a b c") == 3
+    assert encoding.calls == 1
+    assert tokenizer.count(None) == 0
+    assert tokenizer.count("") == 0
+
+    tokenizer.count("d")
+    tokenizer.count("e f")
+    assert tokenizer.stats() == {"hits": 1, "misses": 3, "entries": 2}
+    tokenizer.count("a b c")
+    assert encoding.calls == 4
+    tokenizer.count("x", cache=False)
+    assert tokenizer.stats()["entries"] == 2
+
+
+def test_approx_count_and_sharing():
+    """The estimate needs no encoding, callers share one tokenizer."""
+    assert Tokenizer.approx_count("abcdefgh") == 2
+    assert Tokenizer.approx_count("中文") == 2
+    assert Tokenizer.approx_count(None) == 0
+
+    assert get_tokenizer() is get_tokenizer()
+    assert as_tokenizer() is get_tokenizer()
+    encoding = _WordEncoding()
+    assert as_tokenizer(encoding).encoding is encoding
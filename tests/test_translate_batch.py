@@ -0,0 +1,49 @@
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.translator import BaseTranslator
+
+
+class _UpperTranslator(BaseTranslator):
+    name = "upper"
+
+    def __init__(self, supports_batch_translate=False):
+        super().__init__("en", "zh", False)
+        self.supports_batch_translate = supports_batch_translate
+        self.batches = []
+        self.single = []
+
+    def do_translate_batch(self, texts, rate_limit_params=None):
+        self.batches.append(list(texts))
+        return [text.upper() for text in texts]
+
+    def do_translate(self, text, rate_limit_params=None):
+        self.single.append(text)
+        return text.upper()
+
+    def do_llm_translate(self, text, rate_limit_params=None):
+        raise NotImplementedError
+
+
+def test_translate_batch_sends_one_request():
+    """Services supporting batches get every text with one request."""
+    test_db = init_test_db()
+    try:
+        translator = _UpperTranslator(supports_batch_translate=True)
+        assert translator.translate_batch(["a", "b"]) == ["A", "B"]
+        assert translator.batches == [["a", "b"]]
+        assert translator.single == []
+    finally:
+        clean_test_db(test_db)
+
+
+def test_translate_batch_falls_back_to_single_requests():
+    """Other services translate text by text, through the cache."""
+    test_db = init_test_db()
+    try:
+        translator = _UpperTranslator()
+        translator.cache.set("x", "cached")
+        assert translator.translate_batch(["x", "y"]) == ["cached", "Y"]
+        assert translator.single == ["y"]
+        assert translator.batches == []
+    finally:
+        clean_test_db(test_db)
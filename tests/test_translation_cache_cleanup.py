@@ -2,67 +2,107 @@ from concurrent.futures import ThreadPoolExecutor
 
 from babeldoc.translator.cache import TranslationCache
 from babeldoc.translator.cache import _TranslationCache
+from babeldoc.translator.cache import _TranslationCacheMeta
 from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import configure_memory_cache
+from babeldoc.translator.cache import flush_cache_writes
 from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.cache import run_cache_maintenance
+from peewee import fn
 
 
 def _prepare_records(cache: TranslationCache, num_records: int) -> None:
     """Insert *num_records* unique records into the cache."""
     for i in range(num_records):
-        cache.set(f"text_{i}", f"translation_{i}")
+        cache.set(f"text_{i:04d}", f"translation_{i:04d}")
+    flush_cache_writes()
+
+
+def _total_size() -> int:
+    return _TranslationCache.select(fn.SUM(_TranslationCache.size)).scalar() or 0
+
+
+def test_total_size_follows_writes():
+    """The running byte total matches the table after inserts, replaces,
+    updates and deletes."""
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy")
+        _prepare_records(cache, 50)
+        cache.set("text_0000", "a much longer replacement translation")
+        flush_cache_writes()
+        _TranslationCache.update(size=_TranslationCache.size + 7).where(
+            _TranslationCache.id % 2 == 0
+        ).execute()
+        _TranslationCache.delete().where(_TranslationCache.id % 3 == 0).execute()
+
+        total = _TranslationCacheMeta.get_by_id("total_bytes").value
+        assert total == _total_size() > 0
+    finally:
+        clean_test_db(test_db)
 
 
 def test_cleanup_under_limit(monkeypatch):
-    """When total rows < MAX_CACHE_ROWS, cleanup should do nothing."""
+    """When the cache is within its byte budget, maintenance should do nothing."""
     # Create an isolated test database
     test_db = init_test_db()
     try:
         cache = TranslationCache("dummy")
-        # Make cleanup run every time for deterministic behaviour
-        monkeypatch.setattr("babeldoc.translator.cache.CLEAN_PROBABILITY", 1.0)
-        # Lower the MAX_CACHE_ROWS threshold for quick test execution
-        monkeypatch.setattr("babeldoc.translator.cache.MAX_CACHE_ROWS", 1000)
-
-        _prepare_records(cache, 900)
-        cache.set("extra", "extra")  # This triggers cleanup
-        assert _TranslationCache.select().count() == 901
+        _prepare_records(cache, 100)
+        monkeypatch.setattr(
+            "babeldoc.translator.cache.MAX_CACHE_BYTES", _total_size() + 1
+        )
+
+        assert run_cache_maintenance() == 0
+        assert _TranslationCache.select().count() == 100
     finally:
         clean_test_db(test_db)
 
 
 def test_cleanup_over_limit(monkeypatch):
-    """When rows > MAX_CACHE_ROWS, cleanup should trim to the limit."""
+    """When the cache exceeds its byte budget, the least recently used rows go first."""
     test_db = init_test_db()
     try:
         cache = TranslationCache("dummy")
-        monkeypatch.setattr("babeldoc.translator.cache.CLEAN_PROBABILITY", 1.0)
-        monkeypatch.setattr("babeldoc.translator.cache.MAX_CACHE_ROWS", 500)
+        _prepare_records(cache, 200)
+        # Pretend every row was last used long ago.
+        _TranslationCache.update(last_access=1).execute()
+        # Reading the oldest rows makes them the most recently used.
+        for i in range(10):
+            assert cache.get(f"text_{i:04d}") == f"translation_{i:04d}"
 
-        total_records = 750
-        _prepare_records(cache, total_records)
-        cache.set("extra", "extra")
+        max_bytes = _total_size() // 2
+        monkeypatch.setattr("babeldoc.translator.cache.MAX_CACHE_BYTES", max_bytes)
+        assert run_cache_maintenance() > 0
+        assert _total_size() <= max_bytes
 
-        assert _TranslationCache.select().count() <= 500  # capped at limit
+        configure_memory_cache(max_entries=0)
+        for i in range(10):
+            assert cache.get(f"text_{i:04d}") == f"translation_{i:04d}"
+        assert cache.get("text_0010") is None
     finally:
+        configure_memory_cache(max_entries=20_000)
         clean_test_db(test_db)
 
 
 def test_cleanup_thread_safety(monkeypatch):
-    """Multiple threads attempting cleanup concurrently should not raise errors."""
+    """Maintenance running concurrently with writes should not raise errors."""
     test_db = init_test_db()
     try:
         cache = TranslationCache("dummy")
-        monkeypatch.setattr("babeldoc.translator.cache.CLEAN_PROBABILITY", 1.0)
-        monkeypatch.setattr("babeldoc.translator.cache.MAX_CACHE_ROWS", 500)
+        monkeypatch.setattr("babeldoc.translator.cache.MAX_CACHE_BYTES", 5000)
 
         def task(n):
-            cache.set(f"text_{n}", f"translation_{n}")
+            cache.set(f"text_{n:04d}", f"translation_{n:04d}")
+            if n % 50 == 0:
+                run_cache_maintenance()
 
-        # Use a pool of threads to stress cleanup
+        # Use a pool of threads to stress maintenance
         with ThreadPoolExecutor(max_workers=10) as executor:
-            executor.map(task, range(600))
+            list(executor.map(task, range(600)))
 
-        # After all threads complete, ensure table size is capped
-        assert _TranslationCache.select().count() <= 500
+        # After all threads complete, ensure the table size is capped
+        run_cache_maintenance()
+        assert _total_size() <= 5000
     finally:
         clean_test_db(test_db)
@@ -0,0 +1,99 @@
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import _TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import configure_memory_cache
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import get_memory_cache_stats
+from babeldoc.translator.cache import init_test_db
+
+
+def test_memory_cache_hit_skips_sqlite():
+    """Entries written through the cache are served from memory."""
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy", {"model": "a"})
+        cache.set("hello", "world")
+        # Remove the row from SQLite: a memory hit must not depend on it.
+        flush_cache_writes()
+        _TranslationCache.delete().execute()
+
+        assert cache.get("hello") == "world"
+        stats = get_memory_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 0
+    finally:
+        clean_test_db(test_db)
+
+
+def test_memory_cache_miss_falls_back_to_sqlite():
+    """A memory miss reads SQLite and populates the LRU."""
+    test_db = init_test_db()
+    try:
+        TranslationCache("dummy").set("hello", "world")
+        flush_cache_writes()
+        configure_memory_cache(max_entries=0)
+        configure_memory_cache(max_entries=10)
+
+        cache = TranslationCache("dummy")
+        assert cache.get("hello") == "world"
+        assert cache.get("hello") == "world"
+        assert cache.get("missing") is None
+        stats = get_memory_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        # Different params must not share entries.
+        assert TranslationCache("dummy", {"model": "b"}).get("hello") is None
+    finally:
+        configure_memory_cache(max_entries=20_000)
+        clean_test_db(test_db)
+
+
+def test_memory_cache_bounded_by_entries_and_bytes():
+    """The LRU evicts the least recently used entries first."""
+    test_db = init_test_db()
+    try:
+        configure_memory_cache(max_entries=3)
+        cache = TranslationCache("dummy")
+        for i in range(3):
+            cache.set(f"text_{i}", f"translation_{i}")
+        cache.get("text_0")  # text_1 becomes the least recently used
+        cache.set("text_3", "translation_3")
+        assert get_memory_cache_stats()["entries"] == 3
+
+        flush_cache_writes()
+        _TranslationCache.delete().execute()
+        assert cache.get("text_1") is None
+        assert cache.get("text_0") == "translation_0"
+
+        configure_memory_cache(max_bytes=1)
+        assert get_memory_cache_stats()["entries"] == 0
+    finally:
+        configure_memory_cache(max_entries=20_000, max_bytes=64 * 1024 * 1024)
+        clean_test_db(test_db)
+
+
+def test_get_many_prefetches_into_memory(monkeypatch):
+    """get_many resolves hits in chunks and warms the LRU for later gets."""
+    test_db = init_test_db()
+    try:
+        monkeypatch.setattr("babeldoc.translator.cache.PREFETCH_CHUNK_SIZE", 7)
+        cache = TranslationCache("dummy")
+        for i in range(20):
+            cache.set(f"text_{i}", f"translation_{i}")
+        TranslationCache("other").set("text_0", "other")
+        flush_cache_writes()
+        configure_memory_cache(max_entries=0)
+        configure_memory_cache(max_entries=100)
+
+        texts = [f"text_{i}" for i in range(25)] + ["text_0"]
+        hits = cache.get_many(texts)
+        assert hits == {f"text_{i}": f"translation_{i}" for i in range(20)}
+        assert get_memory_cache_stats()["misses"] == 0
+
+        flush_cache_writes()
+        _TranslationCache.delete().execute()
+        assert cache.get("text_19") == "translation_19"
+        assert get_memory_cache_stats()["hits"] == 1
+    finally:
+        configure_memory_cache(max_entries=20_000)
+        clean_test_db(test_db)
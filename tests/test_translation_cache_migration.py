@@ -0,0 +1,96 @@
+import tempfile
+from pathlib import Path
+
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import _TranslationCache
+from babeldoc.translator.cache import _TranslationCacheParams
+from babeldoc.translator.cache import _TranslationCacheV1
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.cache import migrate_legacy_cache
+from peewee import SqliteDatabase
+
+
+def _create_v1_db(folder: Path, rows: list[tuple[str, str, str, str]]) -> Path:
+    legacy_path = folder / "cache.v1.db"
+    legacy_db = SqliteDatabase(legacy_path)
+    with legacy_db.bind_ctx([_TranslationCacheV1]):
+        legacy_db.create_tables([_TranslationCacheV1])
+        for engine, params, original_text, translation in rows:
+            _TranslationCacheV1.create(
+                translate_engine=engine,
+                translate_engine_params=params,
+                original_text=original_text,
+                translation=translation,
+            )
+    legacy_db.close()
+    return legacy_path
+
+
+def test_migrate_v1_entries():
+    """Entries of cache.v1.db are readable through the v2 schema after migration,
+    and the legacy file is kept under a new name."""
+    test_db = init_test_db()
+    cache = TranslationCache("dummy", {"model": "a", "lang_out": "zh"})
+    other = TranslationCache("other")
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        legacy_path = _create_v1_db(
+            folder,
+            [
+                ("dummy", cache.translate_engine_params, "hello", "你好"),
+                ("dummy", cache.translate_engine_params, "world", "世界"),
+                ("other", other.translate_engine_params, "hello", "bonjour"),
+            ],
+        )
+        try:
+            assert migrate_legacy_cache(folder) == 3
+
+            assert not legacy_path.exists()
+            assert (folder / "cache.v1.db.migrated").exists()
+            assert not (folder / "cache.v1.db.migrating").exists()
+            assert _TranslationCache.select().count() == 3
+            assert _TranslationCacheParams.select().count() == 2
+            assert cache.get("hello") == "你好"
+            assert cache.get("world") == "世界"
+            assert other.get("hello") == "bonjour"
+            assert TranslationCache("dummy").get("hello") is None
+            # Nothing left to migrate on the next start
+            assert migrate_legacy_cache(folder) == 0
+        finally:
+            clean_test_db(test_db)
+
+
+def test_migration_skipped_while_locked():
+    """A process finding the migration lock held leaves cache.v1.db alone."""
+    test_db = init_test_db()
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+        legacy_path = _create_v1_db(folder, [("dummy", "{}", "hello", "你好")])
+        (folder / "cache.v1.db.migrating").touch()
+        try:
+            assert migrate_legacy_cache(folder) == 0
+
+            assert legacy_path.exists()
+            assert _TranslationCache.select().count() == 0
+        finally:
+            clean_test_db(test_db)
+
+
+def test_set_reuses_params_row():
+    """All rows written with the same engine params share one params row."""
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy", {"model": "a"})
+        for i in range(10):
+            cache.set(f"text_{i}", f"translation_{i}")
+        cache.set("text_0", "replaced")
+        flush_cache_writes()
+
+        assert _TranslationCacheParams.select().count() == 1
+        assert _TranslationCache.select().count() == 10
+        assert len(_TranslationCache.get(_TranslationCache.id > 0).key_digest) == 16
+        assert TranslationCache("dummy", {"model": "a"}).get("text_0") == "replaced"
+    finally:
+        clean_test_db(test_db)
@@ -0,0 +1,71 @@
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import _TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import compress_cache_entries
+from babeldoc.translator.cache import configure_memory_cache
+from babeldoc.translator.cache import export_cache
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import import_cache
+from babeldoc.translator.cache import init_test_db
+
+
+def test_export_import_with_conflict_rules(tmp_path):
+    """An exported cache merges into another one, local entries win by default."""
+    archive = tmp_path / "cache.jsonl.zst"
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy", {"lang_out": "zh"})
+        cache.set("hello", "你好")
+        cache.set("world", "世界")
+        assert export_cache(archive) == 2
+    finally:
+        clean_test_db(test_db)
+
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy", {"lang_out": "zh"})
+        cache.set("hello", "local")
+        flush_cache_writes()
+        assert import_cache(archive) == (1, 1)
+        assert cache.get("hello") == "local"
+        assert cache.get("world") == "世界"
+
+        assert import_cache(archive, conflict="newer") == (0, 2)
+        _TranslationCache.update(last_access=0).execute()
+        assert import_cache(archive, conflict="newer") == (2, 0)
+        assert cache.get("hello") == "你好"
+    finally:
+        clean_test_db(test_db)
+
+
+def test_large_entries_are_compressed_in_place(monkeypatch):
+    """Compressed rows read back transparently and take less space."""
+    test_db = init_test_db()
+    try:
+        long_text = "The quick brown fox jumps over the lazy dog. " * 100
+        cache = TranslationCache("dummy")
+        cache.set(long_text, long_text.upper())
+        cache.set("short", "kurz")
+        flush_cache_writes()
+        size_before = _TranslationCache.select().order_by(_TranslationCache.id)[0].size
+
+        monkeypatch.setattr("babeldoc.translator.cache.COMPRESS_MIN_BYTES", 1024)
+        assert compress_cache_entries() == 1
+        row = _TranslationCache.select().order_by(_TranslationCache.id)[0]
+        assert row.size < size_before / 10
+        assert row.original_text == long_text
+
+        configure_memory_cache(max_entries=0)
+        assert cache.get(long_text) == long_text.upper()
+        assert cache.get_many([long_text, "short"]) == {
+            long_text: long_text.upper(),
+            "short": "kurz",
+        }
+        # New writes are compressed as well.
+        cache.set(long_text + "!", "x" * 2000)
+        flush_cache_writes()
+        assert _TranslationCache.select().count() == 3
+        assert cache.get(long_text + "!") == "x" * 2000
+    finally:
+        configure_memory_cache(max_entries=20_000)
+        clean_test_db(test_db)
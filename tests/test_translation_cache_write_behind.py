@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import _TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import configure_memory_cache
+from babeldoc.translator.cache import flush_cache_writes
+from babeldoc.translator.cache import init_test_db
+
+
+def test_concurrent_writes_are_not_lost(monkeypatch):
+    """Writes from many threads are all committed once flushed."""
+    test_db = init_test_db()
+    try:
+        monkeypatch.setattr("babeldoc.translator.cache.WRITE_BATCH_SIZE", 64)
+        cache = TranslationCache("dummy", {"model": "a"})
+
+        def task(n):
+            cache.set(f"text_{n}", f"translation_{n}")
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(task, range(1000)))
+
+        assert flush_cache_writes(timeout=10)
+        assert _TranslationCache.select().count() == 1000
+
+        configure_memory_cache(max_entries=0)
+        assert cache.get("text_999") == "translation_999"
+    finally:
+        configure_memory_cache(max_entries=20_000)
+        clean_test_db(test_db)
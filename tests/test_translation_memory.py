@@ -0,0 +1,44 @@
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.translation_memory import TranslationMemory
+
+V1 = "This Agreement is entered into on 1 March 2024 by and between the parties named below."
+V2 = "This Agreement is entered into on 1 April 2025 by and between the parties named below."
+TYPO = "This Agreement is entred into on 1 March 2024 by and between the parties named below."
+
+
+def test_near_duplicates_are_found_and_reused_only_if_safe():
+    """A typo fix is reused, a changed date is only a hint."""
+    memory = TranslationMemory(threshold=0.85, reuse_threshold=0.97)
+    memory.add(V1, "本协议于 2024 年 3 月 1 日由以下各方签订。")
+    memory.add("Completely unrelated paragraph about something else.", "无关段落。")
+
+    match = memory.lookup(TYPO)
+    assert match.source == V1
+    assert match.similarity > 0.97
+    assert match.reusable
+
+    match = memory.lookup(V2)
+    assert match.source == V1
+    assert not match.reusable
+
+    assert memory.lookup("A short note.") is None
+    memory.record_reuse()
+    stats = memory.stats()
+    assert stats["lookups"] == 3
+    assert stats["matches"] == 2
+    assert stats["reused"] == 1
+
+
+def test_recent_entries_of_a_cache():
+    """The translation memory is loaded from the entries of one cache only."""
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy", {"lang_out": "zh"})
+        cache.set("hello", "你好")
+        TranslationCache("dummy", {"lang_out": "fr"}).set("hello", "bonjour")
+        assert cache.recent_entries(10) == [("hello", "你好")]
+        assert TranslationCache("other").recent_entries(10) == []
+    finally:
+        clean_test_db(test_db)